@@ -0,0 +1,356 @@
+"""
+Offline analytics for interview scores.
+
+``export_interview_scores`` snapshots completed interviews into a Parquet
+dataset, flattening the ``ai_analysis`` dimension scores into columns. Exports
+are incremental: each run appends one part file with the interviews completed
+after the previous run's watermark, from the hot and the archive tables.
+``full=True`` rebuilds the dataset, and so does the next export after a
+rescoring run changed exported interviews (``request_rebuild``). Reports are
+computed from those files only (with DuckDB when installed, otherwise
+vectorised NumPy over Arrow), so analytics never load the primary database.
+Every shard (sharding.py) has its own dataset; reports cover the current
+shard.
+
+    python analytics.py export [--full]
+"""
+
+import glob
+import heapq
+import json
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy.orm import Load
+
+from cache import get_cache
+from database import SessionLocal
+from models import Application, ArchivedApplication, ArchivedInterview, Interview, Job
+from settings import get_settings
+from sharding import DEFAULT_SHARD, current_shard
+
+DIMENSIONS = ["technical_score", "communication_score", "problem_solving_score"]
+METRICS = ["score"] + DIMENSIONS
+
+# Only export interviews completed at least this long ago, so a transaction
+# that commits a little late cannot land behind the watermark.
+SETTLE_LAG = timedelta(minutes=1)
+
+GROUPS = {
+    "job": ["job_id", "job_title"],
+    "recruiter": ["recruiter_id"],
+    "month": ["completed_month"],
+    "week": ["completed_week"],
+    "recommendation": ["recommendation"],
+    "none": [],
+}
+
+SCHEMA = pa.schema([
+    ("interview_id", pa.int64()),
+    ("application_id", pa.int64()),
+    ("job_id", pa.int64()),
+    ("job_title", pa.string()),
+    ("recruiter_id", pa.int64()),
+    ("candidate_id", pa.int64()),
+    ("score", pa.float64()),
+] + [(dimension, pa.float64()) for dimension in DIMENSIONS] + [
+    ("recommendation", pa.string()),
+    ("answer_count", pa.int32()),
+    ("started_at", pa.timestamp("us")),
+    ("completed_at", pa.timestamp("us")),
+    ("completed_month", pa.string()),
+    ("completed_week", pa.string()),
+    ("duration_seconds", pa.float64()),
+])
+
+
+class AnalyticsError(Exception):
+    pass
+
+
+def _dataset_dir() -> str:
+    shard = current_shard.get()
+    if shard == DEFAULT_SHARD:
+        return os.path.join(get_settings().analytics_dir, "interview_scores")
+    return os.path.join(get_settings().analytics_dir, "shards", shard, "interview_scores")
+
+
+def _watermark_path() -> str:
+    return os.path.join(_dataset_dir(), "_watermark.json")
+
+
+def _read_watermark() -> Optional[Dict[str, Any]]:
+    try:
+        with open(_watermark_path()) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_watermark(completed_at: datetime, interview_id: int):
+    tmp = _watermark_path() + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"completed_at": completed_at.isoformat(), "interview_id": interview_id}, f)
+    os.replace(tmp, _watermark_path())
+
+
+def _rebuild_path() -> str:
+    return os.path.join(_dataset_dir(), "_rebuild")
+
+
+def _rebuild_request() -> Optional[str]:
+    try:
+        with open(_rebuild_path()) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def request_rebuild():
+    """Make the next export rebuild the dataset, e.g. after exported interviews were rescored"""
+    os.makedirs(_dataset_dir(), exist_ok=True)
+    tmp = _rebuild_path() + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(uuid.uuid4().hex)
+    os.replace(tmp, _rebuild_path())
+
+
+def _number(value) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _flatten(interview: Interview, application: Application, job: Job) -> Dict[str, Any]:
+    analysis = interview.ai_analysis or {}
+    completed = interview.completed_at
+    iso_year, iso_week, _ = completed.isocalendar()
+    row = {
+        "interview_id": interview.id,
+        "application_id": application.id,
+        "job_id": job.id,
+        "job_title": job.title,
+        "recruiter_id": job.recruiter_id,
+        "candidate_id": application.candidate_id,
+        "score": _number(interview.score),
+        "recommendation": analysis.get("recommendation"),
+        "answer_count": len(interview.answers or []),
+        "started_at": interview.started_at,
+        "completed_at": completed,
+        "completed_month": completed.strftime("%Y-%m"),
+        "completed_week": f"{iso_year}-W{iso_week:02d}",
+        "duration_seconds": (completed - interview.started_at).total_seconds() if interview.started_at else None,
+    }
+    for dimension in DIMENSIONS:
+        row[dimension] = _number(analysis.get(dimension))
+    return row
+
+
+def _completed_query(db, interview_model, application_model, watermark: Optional[Dict[str, Any]]):
+    query = db.query(interview_model, application_model, Job).options(
+        Load(interview_model).undefer_group("transcript")
+    ).join(
+        application_model, application_model.id == interview_model.application_id
+    ).join(
+        Job, Job.id == application_model.job_id
+    ).filter(
+        interview_model.completed_at.isnot(None),
+        interview_model.completed_at < datetime.utcnow() - SETTLE_LAG
+    )
+    if watermark:
+        since = datetime.fromisoformat(watermark["completed_at"])
+        query = query.filter(
+            (interview_model.completed_at > since)
+            | ((interview_model.completed_at == since) & (interview_model.id > watermark["interview_id"]))
+        )
+    return query.order_by(interview_model.completed_at, interview_model.id).yield_per(
+        get_settings().analytics_export_batch
+    )
+
+
+def export_interview_scores(full: bool = False) -> Dict[str, Any]:
+    """Append interviews completed since the last export to the Parquet dataset"""
+    settings = get_settings()
+    directory = _dataset_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    with get_cache().lock("analytics-export", timeout=3600, blocking_timeout=0):
+        rebuild = _rebuild_request()
+        if full or rebuild is not None:
+            for path in glob.glob(os.path.join(directory, "*.parquet")):
+                os.remove(path)
+            if os.path.exists(_watermark_path()):
+                os.remove(_watermark_path())
+        watermark = _read_watermark()
+
+        db = SessionLocal()
+        try:
+            # Archived interviews keep their ids, so both tables merge into
+            # one (completed_at, id) ordered stream.
+            rows_in_order = heapq.merge(
+                _completed_query(db, Interview, Application, watermark),
+                _completed_query(db, ArchivedInterview, ArchivedApplication, watermark),
+                key=lambda row: (row[0].completed_at, row[0].id)
+            )
+
+            part = os.path.join(directory, f"part-{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.parquet")
+            tmp = part + ".tmp"
+            writer = None
+            rows: List[Dict[str, Any]] = []
+            exported = 0
+            last = None
+            try:
+                for interview, application, job in rows_in_order:
+                    rows.append(_flatten(interview, application, job))
+                    last = (interview.completed_at, interview.id)
+                    if len(rows) >= settings.analytics_export_batch:
+                        writer = writer or pq.ParquetWriter(tmp, SCHEMA, compression="zstd")
+                        writer.write_table(pa.Table.from_pylist(rows, schema=SCHEMA))
+                        exported += len(rows)
+                        rows = []
+                if rows:
+                    writer = writer or pq.ParquetWriter(tmp, SCHEMA, compression="zstd")
+                    writer.write_table(pa.Table.from_pylist(rows, schema=SCHEMA))
+                    exported += len(rows)
+            finally:
+                if writer is not None:
+                    writer.close()
+        finally:
+            db.close()
+
+        if exported:
+            os.replace(tmp, part)
+            _write_watermark(*last)
+        # Unless another rebuild was requested meanwhile
+        if rebuild is not None and _rebuild_request() == rebuild:
+            os.remove(_rebuild_path())
+        return {"exported": exported, "file": os.path.basename(part) if exported else None}
+
+
+def _parquet_files() -> List[str]:
+    return sorted(glob.glob(os.path.join(_dataset_dir(), "*.parquet")))
+
+
+def _validate(group_by: str, metric: str, percentiles: List[float]):
+    if group_by not in GROUPS:
+        raise AnalyticsError(f"group_by must be one of: {', '.join(GROUPS)}")
+    if metric not in METRICS:
+        raise AnalyticsError(f"metric must be one of: {', '.join(METRICS)}")
+    if any(not 0 <= p <= 100 for p in percentiles):
+        raise AnalyticsError("percentiles must be between 0 and 100")
+
+
+def _report_duckdb(duckdb, files, keys, metric, percentiles, since, until):
+    where = [f"{metric} IS NOT NULL"]
+    params: List[Any] = [files]
+    if since:
+        where.append("completed_at >= ?")
+        params.append(since)
+    if until:
+        where.append("completed_at < ?")
+        params.append(until)
+    quantiles = ", ".join(f"quantile_cont({metric}, {p / 100}) AS \"p{p:g}\"" for p in percentiles)
+    select_keys = "".join(f"{key}, " for key in keys)
+    group = f"GROUP BY {', '.join(keys)} ORDER BY {', '.join(keys)}" if keys else ""
+    sql = (
+        f"SELECT {select_keys}count(*) AS count, avg({metric}) AS mean, min({metric}) AS min, "
+        f"max({metric}) AS max, stddev_pop({metric}) AS stddev{', ' + quantiles if quantiles else ''} "
+        f"FROM read_parquet(?) WHERE {' AND '.join(where)} {group}"
+    )
+    with duckdb.connect() as conn:
+        cursor = conn.execute(sql, params)
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _report_numpy(files, keys, metric, percentiles, since, until):
+    dataset = ds.dataset(files, format="parquet", schema=SCHEMA)
+    condition = ds.field(metric).is_valid()
+    if since:
+        condition &= ds.field("completed_at") >= pa.scalar(since, pa.timestamp("us"))
+    if until:
+        condition &= ds.field("completed_at") < pa.scalar(until, pa.timestamp("us"))
+    table = dataset.to_table(columns=keys + [metric], filter=condition)
+    if table.num_rows == 0:
+        return []
+    values = table.column(metric).to_numpy()
+
+    if keys:
+        # Dictionary-encode each group column and combine the codes into one
+        # integer per row, then sort once so every group is a contiguous slice.
+        codes = np.zeros(table.num_rows, dtype=np.int64)
+        for key in keys:
+            encoded = pc.dictionary_encode(table.column(key).combine_chunks())
+            indices = pc.fill_null(encoded.indices, len(encoded.dictionary)).to_numpy()
+            codes = codes * (len(encoded.dictionary) + 1) + indices
+        order = np.argsort(codes, kind="stable")
+        bounds = np.flatnonzero(np.diff(codes[order])) + 1
+        key_rows = table.select(keys).to_pylist()
+        groups = [(tuple(key_rows[rows[0]].values()), values[rows]) for rows in np.split(order, bounds)]
+        groups.sort(key=lambda group: tuple((value is None, value) for value in group[0]))
+    else:
+        groups = [((), values)]
+
+    result = []
+    for key, group_values in groups:
+        row = dict(zip(keys, key))
+        row.update({
+            "count": int(group_values.size),
+            "mean": float(group_values.mean()),
+            "min": float(group_values.min()),
+            "max": float(group_values.max()),
+            "stddev": float(group_values.std()),
+        })
+        if percentiles:
+            for p, value in zip(percentiles, np.percentile(group_values, percentiles)):
+                row[f"p{p:g}"] = float(value)
+        result.append(row)
+    return result
+
+
+def score_report(
+    group_by: str = "job",
+    metric: str = "score",
+    percentiles: Optional[List[float]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    engine: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Score distribution per group, computed from the exported Parquet files"""
+    percentiles = [50, 90] if percentiles is None else percentiles
+    _validate(group_by, metric, percentiles)
+    files = _parquet_files()
+    watermark = _read_watermark()
+    if not files:
+        return {"engine": None, "as_of": None, "rows": []}
+
+    keys = GROUPS[group_by]
+    duckdb = None
+    if engine in (None, "duckdb"):
+        try:
+            import duckdb
+        except ImportError:
+            if engine == "duckdb":
+                raise AnalyticsError("DuckDB is not installed")
+    if duckdb is not None:
+        rows = _report_duckdb(duckdb, files, keys, metric, percentiles, since, until)
+    else:
+        rows = _report_numpy(files, keys, metric, percentiles, since, until)
+    return {
+        "engine": "duckdb" if duckdb is not None else "numpy",
+        "as_of": watermark["completed_at"] if watermark else None,
+        "rows": rows,
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "export":
+        print(__doc__)
+        sys.exit(1)
+    print(export_interview_scores(full="--full" in sys.argv))
@@ -0,0 +1,169 @@
+"""
+Archival of finished applications and their interviews.
+
+Applications that reached a final status (completed, accepted, rejected) and
+finished more than ``ARCHIVE_AFTER_DAYS`` ago are moved, together with their
+interview and its transcript, from ``applications`` / ``interviews`` to
+``archived_applications`` / ``archived_interviews``. Rows keep their ids, so
+links stay valid and read endpoints can serve archived rows on request
+(``include_archived=true``). Each moved application is announced with an
+``application.archived`` event.
+
+Rows are moved in batches of ``ARCHIVE_BATCH`` applications, one transaction
+per batch. The scheduler runs the job every ``ARCHIVE_INTERVAL`` seconds on
+one worker at a time; on SQLite it then vacuums the database once enough
+pages are free, so the hot tables shrink on disk too.
+
+    python archive.py run [--vacuum]
+    python archive.py stats
+"""
+
+import logging
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import DateTime, func, insert, literal, or_, select
+
+from cache import get_cache
+from database import SessionLocal
+from events import record_event
+from models import (
+    Application, ApplicationStatus, ArchivedApplication, ArchivedInterview, Interview
+)
+from settings import get_settings
+from sharding import get_engine
+
+logger = logging.getLogger(__name__)
+
+ARCHIVABLE_STATUSES = (ApplicationStatus.COMPLETED, ApplicationStatus.ACCEPTED, ApplicationStatus.REJECTED)
+
+# VACUUM rewrites the whole file and blocks writers meanwhile; only worth it
+# once this share of the pages is free.
+VACUUM_FREE_RATIO = 0.25
+
+# (hot table, archive table)
+TABLES = [
+    (Application.__table__, ArchivedApplication.__table__),
+    (Interview.__table__, ArchivedInterview.__table__),
+]
+
+
+def _candidates(db, cutoff: datetime, limit: int) -> List[Any]:
+    """``(application id, job id, candidate id)`` of the next batch to archive"""
+    finished_at = func.coalesce(Interview.completed_at, Application.applied_at)
+    # SQLite hands out max(id) + 1 for new rows, so archiving the newest row
+    # would let its id be reused while the archived copy still holds it.
+    newest_application = db.query(func.max(Application.id)).scalar_subquery()
+    newest_interview = db.query(func.max(Interview.id)).scalar_subquery()
+    return db.query(Application.id, Application.job_id, Application.candidate_id).outerjoin(
+        Interview, Interview.application_id == Application.id
+    ).filter(
+        Application.status.in_(ARCHIVABLE_STATUSES),
+        finished_at < cutoff,
+        Application.id < newest_application,
+        or_(Interview.id.is_(None), Interview.id < newest_interview)
+    ).order_by(Application.id).limit(limit).all()
+
+
+def _move(db, hot, archived, key, ids: List[int], now: datetime) -> int:
+    columns = [column.name for column in hot.columns]
+    db.execute(insert(archived).from_select(
+        columns + ["archived_at"],
+        select(*hot.columns, literal(now, DateTime)).where(hot.c[key].in_(ids))
+    ))
+    return db.execute(hot.delete().where(hot.c[key].in_(ids))).rowcount
+
+
+def archive_batch(cutoff: datetime, limit: int) -> Dict[str, int]:
+    """Move one batch of finished applications and their interviews; commit it"""
+    db = SessionLocal()
+    try:
+        rows = _candidates(db, cutoff, limit)
+        if not rows:
+            return {"applications": 0, "interviews": 0}
+        ids = sorted({row.id for row in rows})
+        now = datetime.utcnow()
+        interviews = _move(db, Interview.__table__, ArchivedInterview.__table__, "application_id", ids, now)
+        applications = _move(db, Application.__table__, ArchivedApplication.__table__, "id", ids, now)
+        for row in {row.id: row for row in rows}.values():
+            record_event(
+                db, "application.archived", "application", row.id,
+                job_id=row.job_id,
+                candidate_id=row.candidate_id
+            )
+        db.commit()
+        return {"applications": applications, "interviews": interviews}
+    finally:
+        db.close()
+
+
+def free_page_ratio() -> Optional[float]:
+    """Share of free pages in the SQLite database file (None for other databases)"""
+    engine = get_engine()
+    if engine.dialect.name != "sqlite":
+        return None
+    with engine.connect() as conn:
+        pages = conn.exec_driver_sql("PRAGMA page_count").scalar()
+        free = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+    return free / pages if pages else 0.0
+
+
+def vacuum():
+    with get_engine().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("VACUUM")
+
+
+def archive_finished(force_vacuum: bool = False) -> Dict[str, Any]:
+    """Archive everything that is due, then compact the database if worthwhile"""
+    settings = get_settings()
+    cutoff = datetime.utcnow() - timedelta(days=settings.archive_after_days)
+    totals = {"applications": 0, "interviews": 0, "vacuumed": False}
+    with get_cache().lock("archive", timeout=3600, blocking_timeout=0):
+        while True:
+            moved = archive_batch(cutoff, settings.archive_batch)
+            totals["applications"] += moved["applications"]
+            totals["interviews"] += moved["interviews"]
+            if moved["applications"] < settings.archive_batch:
+                break
+        ratio = free_page_ratio()
+        if ratio is not None and (force_vacuum or (totals["applications"] and ratio >= VACUUM_FREE_RATIO)):
+            vacuum()
+            totals["vacuumed"] = True
+    if totals["applications"]:
+        logger.info("Archived %(applications)d applications and %(interviews)d interviews", totals)
+    return totals
+
+
+def _table_bytes(conn) -> Dict[str, int]:
+    """On-disk size per table and index (SQLite builds with the dbstat table only)"""
+    try:
+        return dict(conn.exec_driver_sql("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall())
+    except Exception:
+        return {}
+
+
+def table_stats() -> Dict[str, Any]:
+    """Row counts (and on-disk sizes where available) of the hot and archive tables"""
+    result = {}
+    engine = get_engine()
+    with engine.connect() as conn:
+        sizes = _table_bytes(conn) if engine.dialect.name == "sqlite" else {}
+        for hot, archived in TABLES:
+            for table in (hot, archived):
+                result[table.name] = {
+                    "rows": conn.execute(select(func.count()).select_from(table)).scalar(),
+                    "bytes": sum(size for name, size in sizes.items()
+                                 if name == table.name or name in {index.name for index in table.indexes}) or None,
+                }
+    return result
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("run", "stats"):
+        print(__doc__)
+        sys.exit(1)
+    if sys.argv[1] == "run":
+        print(archive_finished(force_vacuum="--vacuum" in sys.argv))
+    else:
+        print(table_stats())
@@ -1,30 +1,32 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
+from typing import Callable, Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-import os
-from dotenv import load_dotenv
 
 from database import get_db
 from models import User
+from settings import get_settings
 
-load_dotenv()
-
-SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
+SECRET_KEY = get_settings().secret_key
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # 24 hours
+ACCESS_TOKEN_EXPIRE_MINUTES = get_settings().access_token_expire_minutes
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+@lru_cache
+def get_pwd_context():
+    # passlib and the bcrypt backend are only needed by login and seeding
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -36,27 +38,49 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    credentials_exception = HTTPException(
+def decode_token(token: str) -> Optional[dict]:
+    """Return the claims of a valid access token, or None"""
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+def decode_token_subject(token: str) -> Optional[str]:
+    """Return the email in a valid access token, or None"""
+    payload = decode_token(token)
+    return payload.get("sub") if payload else None
+
+def get_user_from_token(token: str, db: Session) -> Optional[User]:
+    claims = decode_token(token)
+    if not claims or claims.get("sub") is None:
+        return None
+    user = db.query(User).filter(User.email == claims["sub"]).first()
+    # The session is already scoped to the token's organization (tenants.py);
+    # checking again keeps a token from acting outside it if scoping is off.
+    if user is None or user.organization_id != claims.get("org"):
+        return None
+    return user
+
+def credentials_error() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    user = get_user_from_token(token, db)
     if user is None:
-        raise credentials_exception
+        raise credentials_error()
     return user
 
-def require_role(required_role: str):
-    def role_checker(current_user: User = Depends(get_current_user)):
+def require_role(required_role: str, user_dependency: Callable[..., User] = get_current_user):
+    """Dependency returning the current user if they have ``required_role``.
+
+    Read-only endpoints pass ``replication.get_read_user`` so the user is
+    looked up on the same session as the rest of the request.
+    """
+    def role_checker(current_user: User = Depends(user_dependency)):
         if current_user.role != required_role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -64,3 +88,12 @@ def require_role(required_role: str):
             )
         return current_user
     return role_checker
+
+def require_platform_admin(current_user: User = Depends(require_role("admin"))):
+    """Admins outside any organization, for data and operations spanning all tenants"""
+    if current_user.organization_id is not None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only platform admins can access this resource"
+        )
+    return current_user
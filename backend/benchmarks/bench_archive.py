@@ -0,0 +1,131 @@
+"""
+Hot-table size and query latency before and after archiving.
+
+Seeds a throwaway SQLite database with ``--applications`` applications, each
+with an interview and a transcript, of which ``--old`` (a fraction) finished
+longer ago than ``ARCHIVE_AFTER_DAYS``. Times queries the routers run on
+every request against the hot tables, archives, vacuums, and times them
+again.
+
+    python benchmarks/bench_archive.py --applications 50000 --old 0.9
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+JOBS = 50
+CANDIDATES = 5000
+QUESTIONS = 6
+
+
+def seed(applications, old_fraction):
+    workdir = tempfile.mkdtemp(prefix="ats-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    from database import engine, init_db
+    from models import Application, Interview, Job
+
+    init_db()
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(Job.__table__.insert(), [
+            {"id": i, "title": f"Job {i}", "description": "Benchmark", "status": "active"} for i in range(1, JOBS + 1)
+        ])
+        apps, interviews = [], []
+        for i in range(1, applications + 1):
+            # Ids grow with time: the oldest applications come first.
+            old = i <= applications * old_fraction
+            finished = now - timedelta(days=rng.uniform(200, 900) if old else rng.uniform(0, 30))
+            apps.append({
+                "id": i, "candidate_id": rng.randint(1, CANDIDATES), "job_id": rng.randint(1, JOBS),
+                "status": rng.choice(["COMPLETED", "REJECTED", "ACCEPTED"]) if old else "INTERVIEWING",
+                "applied_at": finished - timedelta(hours=1), "score": round(rng.uniform(0, 100), 1),
+            })
+            interviews.append({
+                "id": i, "application_id": i, "status": "completed" if old else "in_progress",
+                "questions": [{"id": q, "text": f"Question {q} " + "x" * 80, "type": "technical"}
+                              for q in range(QUESTIONS)],
+                "answers": [{"question_id": q, "answer": "answer " * 40} for q in range(QUESTIONS)],
+                "score": apps[-1]["score"], "ai_analysis": {"technical_score": 70, "recommendation": "Hire"},
+                "started_at": finished - timedelta(hours=1), "completed_at": finished if old else None,
+            })
+        conn.execute(Application.__table__.insert(), apps)
+        conn.execute(Interview.__table__.insert(), interviews)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def measure(applications, repeat):
+    from sqlalchemy import func
+    from database import SessionLocal
+    from models import Application, Interview
+
+    rng = random.Random(1)
+    db = SessionLocal()
+    try:
+        queries = {
+            # candidate /my-applications
+            "applications of a candidate": lambda: db.query(Application).filter(
+                Application.candidate_id == rng.randint(1, CANDIDATES)).all(),
+            # recruiter /jobs/{id}/applications, per (recent, never archived) application
+            "interview of an application": lambda: db.query(Interview).filter(
+                Interview.application_id == rng.randint(applications - 1000, applications)).first(),
+            # admin /dashboard
+            "completed interview count": lambda: db.query(Interview).filter(
+                Interview.status == "completed").count(),
+            "average score": lambda: db.query(func.avg(Interview.score)).filter(
+                Interview.score.isnot(None)).scalar(),
+        }
+        return {name: timed(query, repeat) for name, query in queries.items()}
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--applications", type=int, default=50_000)
+    parser.add_argument("--old", type=float, default=0.9, help="fraction finished long enough ago to archive")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    seed(args.applications, args.old)
+    import archive
+
+    before_stats = archive.table_stats()
+    before = measure(args.applications, args.repeat)
+    started = time.perf_counter()
+    result = archive.archive_finished(force_vacuum=True)
+    elapsed = time.perf_counter() - started
+    after_stats = archive.table_stats()
+    after = measure(args.applications, args.repeat)
+
+    print(f"archived {result['applications']} applications / {result['interviews']} interviews "
+          f"in {elapsed:.1f} s (including VACUUM)")
+    print(f"{'table':<24} {'rows before':>12} {'MB before':>10} {'rows after':>11} {'MB after':>9}")
+    for table, stats in before_stats.items():
+        mb = lambda value: f"{value / 1e6:.1f}" if value else "-"
+        print(f"{table:<24} {stats['rows']:>12} {mb(stats['bytes']):>10} "
+              f"{after_stats[table]['rows']:>11} {mb(after_stats[table]['bytes']):>9}")
+    print(f"{'query (median ms)':<30} {'before':>8} {'after':>8}")
+    for name in before:
+        print(f"{name:<30} {before[name]:>8.2f} {after[name]:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Bulk status transitions and interview rescoring.
+
+Seeds a throwaway SQLite database with ``--applications`` completed
+applications, each with a completed interview, then measures:
+
+- rejecting ``--reject`` applications one request at a time (load, change,
+  record the event, commit) against ``bulk.transition_applications``
+  (set-based updates in chunks),
+- a rescoring run over every interview with ``--workers`` scoring threads,
+  the scorer replaced by one that takes ``--latency`` seconds (a remote model
+  call),
+- cancelling a run part-way and resuming it: every interview must end up
+  rescored exactly once.
+
+    python benchmarks/bench_bulk.py --applications 20000 --reject 5000 --workers 1 4 16
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+JOBS = 20
+QUESTIONS = 6
+
+
+def seed(applications):
+    workdir = tempfile.mkdtemp(prefix="ats-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["ANALYTICS_DIR"] = os.path.join(workdir, "analytics")
+    from database import engine, init_db
+    from models import Application, Interview, Job
+
+    init_db()
+    rng = random.Random(0)
+    with engine.begin() as conn:
+        conn.execute(Job.__table__.insert(), [
+            {"id": i, "title": f"Job {i}", "description": "Benchmark", "status": "active"} for i in range(1, JOBS + 1)
+        ])
+        apps, interviews = [], []
+        for i in range(1, applications + 1):
+            score = round(rng.uniform(0, 100), 1)
+            apps.append({"id": i, "candidate_id": i, "job_id": rng.randint(1, JOBS), "status": "COMPLETED",
+                         "score": score})
+            interviews.append({
+                "id": i, "application_id": i, "status": "completed", "score": score,
+                "questions": [{"id": q, "text": f"Question {q}", "type": "technical"} for q in range(QUESTIONS)],
+                "answers": [{"question_id": q, "answer": "answer " * 40} for q in range(QUESTIONS)],
+            })
+        conn.execute(Application.__table__.insert(), apps)
+        conn.execute(Interview.__table__.insert(), interviews)
+
+
+def reject_one_by_one(ids):
+    from database import SessionLocal
+    from events import record_status_change
+    from models import Application, ApplicationStatus
+
+    for application_id in ids:
+        db = SessionLocal()
+        try:
+            application = db.query(Application).filter(Application.id == application_id).first()
+            record_status_change(db, application, application.status, ApplicationStatus.REJECTED)
+            application.status = ApplicationStatus.REJECTED
+            db.commit()
+        finally:
+            db.close()
+
+
+def reject_in_bulk(ids):
+    from bulk import transition_applications
+    from database import SessionLocal
+    from models import ApplicationStatus
+
+    db = SessionLocal()
+    try:
+        result = transition_applications(db, ids, ApplicationStatus.REJECTED)
+        assert result["updated"] == len(ids), result
+    finally:
+        db.close()
+
+
+def request_run():
+    from database import SessionLocal
+    import rescoring
+
+    db = SessionLocal()
+    try:
+        return rescoring.request_run(db, requested_by=1).id
+    finally:
+        db.close()
+
+
+def get_run(run_id):
+    from database import SessionLocal
+    from models import RescoreRun
+
+    db = SessionLocal()
+    try:
+        return db.query(RescoreRun).filter(RescoreRun.id == run_id).one()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--applications", type=int, default=20_000)
+    parser.add_argument("--reject", type=int, default=5_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--batch", type=int, default=200)
+    args = parser.parse_args()
+
+    seed(args.applications)
+    import scoring
+    import rescoring
+    from database import SessionLocal
+    from models import Interview, OutboxEvent
+    from settings import get_settings
+
+    ids = list(range(1, args.applications + 1))
+    random.Random(1).shuffle(ids)
+    print(f"{args.applications} applications; rejecting {args.reject}")
+    for name, fn, chunk in (("one by one", reject_one_by_one, ids[:args.reject]),
+                            ("bulk", reject_in_bulk, ids[args.reject:2 * args.reject])):
+        started = time.perf_counter()
+        fn(chunk)
+        elapsed = time.perf_counter() - started
+        print(f"  {name:<11} {elapsed:>8.2f}s {len(chunk) / elapsed:>10.0f} applications/s")
+
+    rounds = [0]
+
+    def score_interview(questions, answers):
+        time.sleep(args.latency)
+        return 50.0 + rounds[0], {"rubric": rounds[0]}
+
+    scoring.score_interview = score_interview
+    settings = get_settings()
+    settings.rescore_batch = args.batch
+    print(f"rescoring {args.applications} interviews, {args.latency * 1000:.0f} ms per interview, "
+          f"batches of {args.batch}")
+    for workers in args.workers:
+        rounds[0] += 1
+        settings.rescore_workers = workers
+        run_id = request_run()
+        started = time.perf_counter()
+        rescoring.process_runs()
+        elapsed = time.perf_counter() - started
+        run = get_run(run_id)
+        assert run.status == "completed" and run.processed == run.total == args.applications, rescoring.serialize(run)
+        print(f"  {workers:>3} workers {elapsed:>8.2f}s {run.processed / elapsed:>10.0f} interviews/s")
+
+    # Cancel part-way, then resume
+    rounds[0] += 1
+    settings.rescore_workers = max(args.workers)
+    run_id = request_run()
+    worker = threading.Thread(target=rescoring.process_runs)
+    worker.start()
+    while get_run(run_id).processed < args.applications // 3:
+        time.sleep(0.01)
+    db = SessionLocal()
+    try:
+        rescoring.cancel_run(db, run_id)
+    finally:
+        db.close()
+    worker.join()
+    cancelled = get_run(run_id)
+    db = SessionLocal()
+    try:
+        rescoring.resume_run(db, run_id)
+    finally:
+        db.close()
+    rescoring.process_runs()
+    run = get_run(run_id)
+    db = SessionLocal()
+    try:
+        rescored = db.query(Interview).filter(Interview.score == 50.0 + rounds[0]).count()
+        events = sum(1 for (payload,) in db.query(OutboxEvent.payload).filter(
+            OutboxEvent.event_type == "interview.rescored"
+        ) if payload["score"] == 50.0 + rounds[0])
+    finally:
+        db.close()
+    print(f"cancelled at {cancelled.processed}/{cancelled.total} (status {cancelled.status}); "
+          f"resumed: {run.status}, processed {run.processed}, rescored {rescored}, events {events}")
+    assert run.status == "completed" and run.processed == rescored == events == args.applications
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Abandoned slow requests against the connection pool, with and without deadlines.
+
+Seeds a throwaway SQLite database with ``--applications`` applications, so
+that ``GET /api/admin/applications`` takes seconds, then runs the gunicorn
+entrypoint (one worker, a pool of ``--pool-size`` connections) twice: with
+``REQUEST_DEADLINES_ENABLED`` off and on. In each run ``--abandoners``
+clients request the admin listing and give up after ``--give-up`` seconds,
+over and over, while one client calls ``GET /api/auth/me`` (one quick query);
+its latencies and failures are reported, with the server's
+timed-out/cancelled counters.
+
+    python benchmarks/bench_deadlines.py --applications 20000 --abandoners 2 --pool-size 4 --duration 15
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bench_workers import wait_until_up  # noqa: E402
+
+SEED_BATCH = 10_000
+
+
+def seed(path, applications):
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    from auth import create_access_token
+    from database import engine, init_db
+    from models import Application, Job, User
+
+    init_db()
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": 1, "email": "bench-admin@ats.com", "hashed_password": "x", "full_name": "Bench Admin",
+             "role": "ADMIN"},
+        ])
+        conn.execute(Job.__table__.insert(), [{"id": 1, "title": "Job", "description": "Benchmark", "recruiter_id": 1}])
+        for start in range(2, applications + 2, SEED_BATCH):
+            ids = range(start, min(start + SEED_BATCH, applications + 2))
+            conn.execute(User.__table__.insert(), [
+                {"id": i, "email": f"applicant{i}@ats.com", "hashed_password": "x", "full_name": f"Applicant {i}",
+                 "role": "CANDIDATE"} for i in ids
+            ])
+            conn.execute(Application.__table__.insert(), [
+                {"candidate_id": i, "job_id": 1, "status": "PENDING"} for i in ids
+            ])
+    return create_access_token({"sub": "bench-admin@ats.com", "role": "admin"})
+
+
+def run(port, token, duration, abandoners, give_up):
+    stop_at = time.monotonic() + duration
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies, failures, abandoned = [], [0], [0]
+
+    def abandoner():
+        while time.monotonic() < stop_at:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=give_up)
+            try:
+                conn.request("GET", "/api/admin/applications", headers=headers)
+                conn.getresponse().read()
+            except (socket.timeout, TimeoutError):
+                abandoned[0] += 1
+            finally:
+                conn.close()
+
+    def prober():
+        while time.monotonic() < stop_at:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            started = time.perf_counter()
+            try:
+                conn.request("GET", "/api/auth/me", headers=headers)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except OSError:
+                ok = False
+            finally:
+                conn.close()
+            if ok:
+                latencies.append((time.perf_counter() - started) * 1000)
+            else:
+                failures[0] += 1
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=abandoner) for _ in range(abandoners)] + [threading.Thread(target=prober)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, failures[0], abandoned[0]
+
+
+def server_counters(port, token):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    conn.request("GET", "/api/admin/metrics", headers={"Authorization": f"Bearer {token}"})
+    response = conn.getresponse()
+    body = response.read()
+    if response.status != 200:
+        return {}
+    snapshot = json.loads(body)
+    return {name: sum(entry["value"] for entry in snapshot.get(name, []))
+            for name in ("requests_timed_out_total", "requests_cancelled_total")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--applications", type=int, default=20_000)
+    parser.add_argument("--abandoners", type=int, default=2)
+    parser.add_argument("--give-up", type=float, default=1.0)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="ats-bench-")
+    path = os.path.join(workdir, "bench.db")
+    token = seed(path, args.applications)
+
+    print(f"{args.abandoners} clients abandoning the admin listing after {args.give_up}s; "
+          f"pool of {args.pool_size}")
+    print(f"{'deadlines':>9} {'probes':>7} {'failed':>7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} "
+          f"{'abandoned':>10} {'cancelled':>10}")
+    for enabled in (False, True):
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", ACCESS_LOG="", LOG_LEVEL="error",
+                   CACHE_BACKEND="sqlite", CACHE_URL=os.path.join(workdir, f"cache-{enabled}.db"),
+                   RATE_LIMITING_ENABLED="false", ANALYTICS_EXPORT_INTERVAL="0", WARMUP_ON_STARTUP="false",
+                   REQUEST_DEADLINES_ENABLED=str(enabled).lower(), DATABASE_POOL_SIZE=str(args.pool_size),
+                   DATABASE_MAX_OVERFLOW="0", DATABASE_POOL_TIMEOUT="10")
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "main:app",
+             "--workers", "1", "--bind", f"127.0.0.1:{args.port}"],
+            cwd=BACKEND_DIR, env=env,
+        )
+        try:
+            wait_until_up(args.port)
+            latencies, failed, abandoned = run(args.port, token, args.duration, args.abandoners, args.give_up)
+            counters = server_counters(args.port, token)
+            p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else float("nan")
+            print(f"{'on' if enabled else 'off':>9} {len(latencies):>7} {failed:>7} "
+                  f"{statistics.median(latencies) if latencies else float('nan'):>8.1f} {p95:>8.1f} "
+                  f"{max(latencies, default=float('nan')):>8.1f} {abandoned:>10} "
+                  f"{counters.get('requests_cancelled_total', '-'):>10}")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
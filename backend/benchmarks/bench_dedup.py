@@ -0,0 +1,154 @@
+"""
+Duplicate-candidate detection on a synthetic corpus.
+
+Seeds a throwaway SQLite database with ``--candidates`` accounts, each with a
+parsed resume, of which ``--duplicates`` (a fraction) are second accounts of
+an existing candidate: the same resume with some words edited and the name
+re-cased, accented or reordered. Reports the batch scan time against the
+all-pairs comparison it replaces, per-upload lookup latency, and precision
+and recall against the planted duplicates.
+
+    python benchmarks/bench_dedup.py --candidates 20000 --duplicates 0.05
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+FIRST = ["John", "Jane", "Maria", "José", "Wei", "Aisha", "Liam", "Olga", "Ravi", "Chloé", "Ahmed", "Emma"]
+LAST = ["Smith", "García", "Nguyen", "Müller", "Kowalski", "Okafor", "Rossi", "Tanaka", "Dubois", "Patel"]
+
+
+def vocabulary(rng, size=5000):
+    return ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 10))) for _ in range(size)]
+
+
+def resume(rng, words):
+    pick = lambda n: " ".join(words[min(int(rng.paretovariate(0.8)), len(words) - 1)] for _ in range(n))
+    return {
+        "summary": pick(rng.randint(30, 60)),
+        "experience": pick(rng.randint(120, 250)),
+        "skills": pick(rng.randint(10, 25)),
+    }
+
+
+def variant(rng, sections, words, edit_rate):
+    edited = {}
+    for name, text in sections.items():
+        tokens = text.split()
+        for _ in range(int(len(tokens) * edit_rate)):
+            tokens[rng.randrange(len(tokens))] = rng.choice(words)
+        edited[name] = " ".join(tokens)
+    return edited
+
+
+def rename(rng, name):
+    first, last = name.split(" ")
+    return rng.choice([
+        f"{first.upper()} {last}", f"{last}, {first}", f"{first.lower()} {last.lower()}",
+        name.replace("é", "e").replace("ü", "u").replace("í", "i"),
+    ])
+
+
+def seed(candidates, duplicate_fraction, edit_rate):
+    workdir = tempfile.mkdtemp(prefix="ats-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    from database import engine, init_db
+    from models import Application, User
+
+    init_db()
+    rng = random.Random(0)
+    words = vocabulary(rng)
+    users, applications, originals, planted, origin = [], [], [], set(), {}
+    for user_id in range(1, candidates + 1):
+        if originals and rng.random() < duplicate_fraction:
+            original_id, name, sections = rng.choice(originals)
+            name, sections = rename(rng, name), variant(rng, sections, words, edit_rate)
+            planted.add((original_id, user_id))
+            origin[user_id] = original_id
+        else:
+            name, sections = f"{rng.choice(FIRST)} {rng.choice(LAST)}", resume(rng, words)
+            originals.append((user_id, name, sections))
+            origin[user_id] = user_id
+        users.append({"id": user_id, "email": f"user{user_id}@example.com", "hashed_password": "x",
+                      "full_name": name, "role": "CANDIDATE"})
+        applications.append({"candidate_id": user_id, "job_id": 1, "status": "PENDING",
+                              "resume_hash": f"{user_id:064x}", "parsed_profile": {"sections": sections}})
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), users)
+        conn.execute(Application.__table__.insert(), applications)
+    return planted, origin, words, rng
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=20_000)
+    parser.add_argument("--duplicates", type=float, default=0.05, help="fraction of accounts that are duplicates")
+    parser.add_argument("--edit-rate", type=float, default=0.05, help="share of words changed in a duplicate")
+    parser.add_argument("--uploads", type=int, default=200)
+    args = parser.parse_args()
+
+    planted, origin, words, rng = seed(args.candidates, args.duplicates, args.edit_rate)
+    import dedup
+    from database import SessionLocal
+    from models import DuplicateCandidate, User
+
+    started = time.perf_counter()
+    result = dedup.scan_all()
+    scan_s = time.perf_counter() - started
+
+    db = SessionLocal()
+    try:
+        flagged = {(row.user_id, row.duplicate_user_id) for row in db.query(DuplicateCandidate)}
+    finally:
+        db.close()
+    found = len(flagged & planted)
+    # Two copies of the same original are duplicates of each other too.
+    correct = sum(origin[first] == origin[second] for first, second in flagged)
+
+    # All-pairs comparison of the same signatures, extrapolated from a sample.
+    signatures = [dedup.compute_signature(0, "Sample Name", None, {"sections": resume(rng, words)}) for _ in range(200)]
+    started = time.perf_counter()
+    compared = 0
+    for first in signatures:
+        for second in signatures:
+            dedup.compare(first, second)
+            compared += 1
+    per_pair = (time.perf_counter() - started) / compared
+    all_pairs_s = per_pair * args.candidates * (args.candidates - 1) / 2
+
+    # Incremental: new accounts uploading a copy of an existing resume.
+    db = SessionLocal()
+    try:
+        next_id = args.candidates + 1
+        db.add_all(User(id=next_id + i, email=f"new{i}@example.com", hashed_password="x",
+                        full_name=f"{rng.choice(FIRST)} {rng.choice(LAST)}", role="CANDIDATE")
+                   for i in range(args.uploads))
+        db.commit()
+    finally:
+        db.close()
+    latencies = []
+    for i in range(args.uploads):
+        profile = {"sections": variant(rng, resume(rng, words), words, args.edit_rate)}
+        started = time.perf_counter()
+        dedup.index_candidate(next_id + i, profile, f"new-{i}")
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    print(f"candidates: {result['candidates']}, planted duplicates: {len(planted)}")
+    print(f"batch scan: {scan_s:.1f} s, {result['pairs_checked']} candidate pairs checked "
+          f"(all pairs: {args.candidates * (args.candidates - 1) // 2}, est. {all_pairs_s:.0f} s to compare)")
+    print(f"flagged: {len(flagged)}; recall {found / max(len(planted), 1):.3f}, "
+          f"precision {correct / max(len(flagged), 1):.3f}")
+    print(f"upload check: median {statistics.median(latencies):.1f} ms, "
+          f"p95 {sorted(latencies)[int(len(latencies) * 0.95)]:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Streaming applicant export: time, throughput and memory.
+
+Seeds a throwaway SQLite database with one job and ``--applications``
+applicants, each with a completed (compressed) interview, then streams the
+CSV and XLSX exports and reports time to first chunk, total time, output
+size and peak Python memory (tracemalloc, in a second pass). For contrast it
+also measures loading every row into a list first, as a non-streaming
+endpoint would. Peak memory of the streamed exports should not grow with
+``--applications``.
+
+    python benchmarks/bench_export.py --applications 500000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SEED_BATCH = 10_000
+
+
+def seed(applications):
+    workdir = tempfile.mkdtemp(prefix="ats-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    from database import engine, init_db
+    from models import Application, Interview, Job, User
+
+    init_db()
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{"id": 1, "email": "recruiter@example.com", "hashed_password": "x",
+                                                "full_name": "Recruiter", "role": "RECRUITER"}])
+        conn.execute(Job.__table__.insert(), [{"id": 1, "title": "Engineer", "description": "Benchmark",
+                                               "recruiter_id": 1, "status": "active"}])
+        for start in range(0, applications, SEED_BATCH):
+            ids = range(start + 1, min(start + SEED_BATCH, applications) + 1)
+            conn.execute(User.__table__.insert(), [
+                {"id": i + 1, "email": f"candidate{i}@example.com", "hashed_password": "x",
+                 "full_name": f"Candidate {i}", "role": "CANDIDATE"} for i in ids
+            ])
+            conn.execute(Application.__table__.insert(), [
+                {"id": i, "candidate_id": i + 1, "job_id": 1, "status": "COMPLETED",
+                 "applied_at": now - timedelta(days=rng.uniform(1, 60)), "score": round(rng.uniform(0, 100), 1)}
+                for i in ids
+            ])
+            conn.execute(Interview.__table__.insert(), [
+                {"id": i, "application_id": i, "status": "completed", "score": round(rng.uniform(0, 100), 1),
+                 "started_at": now - timedelta(hours=2), "completed_at": now - timedelta(hours=1),
+                 "ai_analysis": {
+                     "overall_assessment": "Strong candidate with good technical knowledge",
+                     "strengths": ["Clear communication", "Relevant experience"],
+                     "areas_for_improvement": ["Could provide more specific examples"],
+                     "recommendation": rng.choice(["Proceed to next round", "Hire", "Do not proceed"]),
+                     "technical_score": rng.randint(40, 100),
+                     "communication_score": rng.randint(40, 100),
+                     "problem_solving_score": rng.randint(40, 100),
+                 }}
+                for i in ids
+            ])
+
+
+def stream(file_format, traced):
+    from database import SessionLocal
+    from exports import export_applicants
+
+    if traced:
+        tracemalloc.start()
+    started = time.perf_counter()
+    first = None
+    size = 0
+    for chunk in export_applicants(SessionLocal(), 1, file_format):
+        if first is None:
+            first = time.perf_counter() - started
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    peak = None
+    if traced:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return first, elapsed, size, peak
+
+
+def materialized_peak():
+    from database import SessionLocal
+    from exports import applicant_rows
+
+    db = SessionLocal()
+    try:
+        tracemalloc.start()
+        rows = list(applicant_rows(db, 1))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return len(rows), peak
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--applications", type=int, default=500_000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    seed(args.applications)
+    print(f"seeded {args.applications} applicants in {time.perf_counter() - started:.0f} s")
+
+    print(f"{'export':<8} {'first chunk ms':>15} {'total s':>9} {'rows/s':>9} {'MB out':>8} {'peak MB':>9}")
+    for file_format in ("csv", "xlsx"):
+        first, elapsed, size, _ = stream(file_format, traced=False)
+        peak = stream(file_format, traced=True)[3]
+        print(f"{file_format:<8} {first * 1000:>15.1f} {elapsed:>9.1f} {args.applications / elapsed:>9.0f} "
+              f"{size / 1e6:>8.1f} {peak / 1e6:>9.1f}")
+    rows, peak = materialized_peak()
+    print(f"all {rows} rows in a list first: peak {peak / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Adaptive interview engine: next-question latency and per-session memory.
+
+Starts ``--sessions`` interviews spread over ``--jobs`` jobs in one process,
+then answers them round-robin, one question per session per round, as a
+worker serving that many concurrent interviews would. Prints the latency of
+``interview_engine.advance`` (rate the answer, update the ability estimate,
+pick the next question, build the checkpoint) and the size of the
+in-memory session state.
+
+    python benchmarks/bench_interview_engine.py --sessions 5000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+DESCRIPTIONS = [
+    "Senior Python developer: FastAPI, PostgreSQL, Docker and AWS.",
+    "Frontend engineer with React, TypeScript and GraphQL experience.",
+    "Data engineer: Spark, Kafka, Airflow, SQL.",
+    "Machine learning engineer: PyTorch, TensorFlow, Kubernetes.",
+]
+
+
+def seed(jobs):
+    workdir = tempfile.mkdtemp(prefix="ats-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    from database import SessionLocal, init_db
+    from models import Job
+
+    init_db()
+    db = SessionLocal()
+    try:
+        db.add_all([Job(title=f"Job {i}", description=DESCRIPTIONS[i % len(DESCRIPTIONS)]) for i in range(jobs)])
+        db.commit()
+        return [job.id for job in db.query(Job).all()]
+    finally:
+        db.close()
+
+
+def state_size(state):
+    return sys.getsizeof(state) + sum(sys.getsizeof(getattr(state, slot)) for slot in state.__slots__) \
+        + sum(sys.getsizeof(rating) for rating in state.ratings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--jobs", type=int, default=50)
+    args = parser.parse_args()
+
+    job_ids = seed(args.jobs)
+    import interview_engine
+    interview_engine.warm_up()
+    for job_id in job_ids:
+        interview_engine.get_bank(job_id)
+
+    rng = random.Random(0)
+    answers = ["yes", "I used it in a project. " * 4, "For example, I built a service that cut latency by 40%. " * 8]
+
+    sessions = {}
+    for interview_id in range(1, args.sessions + 1):
+        question, checkpoint = interview_engine.start(rng.choice(job_ids))
+        sessions[interview_id] = ([question], checkpoint)
+
+    latencies = []
+    while sessions:
+        for interview_id in list(sessions):
+            questions, checkpoint = sessions[interview_id]
+            started = time.perf_counter()
+            question, checkpoint = interview_engine.advance(interview_id, questions, checkpoint, rng.choice(answers))
+            latencies.append((time.perf_counter() - started) * 1e6)
+            if question is None:
+                del sessions[interview_id]
+            else:
+                sessions[interview_id] = (questions + [question], checkpoint)
+        if len(sessions) == args.sessions:
+            held = sum(state_size(state) for state in interview_engine._sessions.values())
+    latencies.sort()
+    print(f"sessions: {args.sessions}, jobs: {args.jobs}, advance calls: {len(latencies)}")
+    print(f"advance: p50 {statistics.median(latencies):.1f} us, "
+          f"p99 {latencies[int(len(latencies) * 0.99)]:.1f} us, max {latencies[-1]:.1f} us")
+    print(f"in-memory state per session: {held / args.sessions:.0f} bytes")
+
+
+if __name__ == "__main__":
+    main()
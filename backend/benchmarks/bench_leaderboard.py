@@ -0,0 +1,88 @@
+"""
+Per-job leaderboard with many scored applicants.
+
+Seeds one job with ``--applicants`` scored applications in a throwaway SQLite
+database, then compares ranking queries on the in-memory board with what
+sorting every application (the previous approach) costs, and times loading
+the board from the ``(job_id, score)`` index and applying score updates.
+
+    python benchmarks/bench_leaderboard.py --applicants 100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def seed(applicants):
+    workdir = tempfile.mkdtemp(prefix="ats-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    from database import SessionLocal, engine, init_db
+    from models import Application, Job
+
+    init_db()
+    db = SessionLocal()
+    try:
+        job = Job(title="Bench job", description="Benchmark")
+        db.add(job)
+        db.commit()
+        job_id = job.id
+    finally:
+        db.close()
+    rng = random.Random(0)
+    with engine.begin() as conn:
+        conn.execute(Application.__table__.insert(), [
+            {"job_id": job_id, "candidate_id": i, "status": "COMPLETED", "score": round(rng.uniform(0, 100), 1)}
+            for i in range(applicants)
+        ])
+    return job_id
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--applicants", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    job_id = seed(args.applicants)
+    from leaderboard import Leaderboards, load_scores
+
+    boards = Leaderboards(max_boards=4)
+    started = time.perf_counter()
+    board = boards.get(job_id)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(1)
+    ids = [rng.randint(1, args.applicants) for _ in range(args.repeat)]
+    picks = iter(ids * 10)
+
+    rows = load_scores(job_id)
+    print(f"applicants: {len(board)}; board load from index: {load_ms:.0f} ms")
+    print(f"{'query':<28} {'board (us)':>12} {'sort all (us)':>14}")
+    print(f"{'top 10':<28} {timed(lambda: board.top(10), args.repeat):>12.1f} "
+          f"{timed(lambda: sorted(rows, key=lambda r: (-r[1], r[0]))[:10], 5):>14.0f}")
+    print(f"{'ranks 5000-5050':<28} {timed(lambda: board.range(5000, 5050), args.repeat):>12.1f}")
+    print(f"{'rank of one candidate':<28} {timed(lambda: board.rank(next(picks)), args.repeat):>12.1f}")
+    print(f"{'percentile of one candidate':<28} {timed(lambda: board.percentile(next(picks)), args.repeat):>12.1f}")
+    print(f"{'score update':<28} "
+          f"{timed(lambda: boards.update(job_id, next(picks), round(rng.uniform(0, 100), 1)), args.repeat):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
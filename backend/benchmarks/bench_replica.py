@@ -0,0 +1,157 @@
+"""
+Write latency under heavy admin reads, with and without replica routing.
+
+Seeds a throwaway SQLite primary, snapshots it to a second file that stands
+in for the replica, then runs the gunicorn entrypoint twice: once with only
+the primary and once with ``DATABASE_REPLICA_URL`` set. In each run a pool of
+admin clients hammers ``GET /api/admin/interviews`` while one candidate client
+applies to jobs; the apply latencies are reported.
+
+The snapshot is never refreshed, so the lag check is relaxed for the run.
+
+    python benchmarks/bench_replica.py --duration 10 --readers 8
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bench_workers import wait_until_up  # noqa: E402
+
+
+def seed(path, jobs, interviews):
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    from database import SessionLocal, init_db
+    from models import Application, Interview, Job, User, UserRole
+    from auth import create_access_token
+    from replication import write_heartbeat
+
+    init_db()
+    db = SessionLocal()
+    try:
+        admin = User(email="bench-admin@ats.com", hashed_password="x", full_name="Bench Admin", role=UserRole.ADMIN)
+        recruiter = User(email="bench-recruiter@ats.com", hashed_password="x", full_name="Bench Recruiter", role=UserRole.RECRUITER)
+        candidate = User(email="bench-candidate@ats.com", hashed_password="x", full_name="Bench Candidate", role=UserRole.CANDIDATE)
+        db.add_all([admin, recruiter, candidate])
+        db.flush()
+        job_rows = [Job(title=f"Job {i}", description="Benchmark job", recruiter_id=recruiter.id) for i in range(jobs)]
+        db.add_all(job_rows)
+        db.flush()
+        questions = [{"id": i, "question": "Describe a project " * 5} for i in range(1, 6)]
+        for i in range(interviews):
+            applicant = User(email=f"applicant{i}@ats.com", hashed_password="x", full_name=f"Applicant {i}", role=UserRole.CANDIDATE)
+            db.add(applicant)
+            db.flush()
+            application = Application(job_id=job_rows[i % jobs].id, candidate_id=applicant.id)
+            db.add(application)
+            db.flush()
+            db.add(Interview(application_id=application.id, questions=questions, answers=[], status="in_progress"))
+        db.commit()
+    finally:
+        db.close()
+    write_heartbeat()
+    return (
+        create_access_token({"sub": "bench-admin@ats.com", "role": "admin"}),
+        create_access_token({"sub": "bench-candidate@ats.com", "role": "candidate"}),
+    )
+
+
+def snapshot(source, target):
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def run(port, admin_token, candidate_token, jobs, duration, readers):
+    stop_at = time.monotonic() + duration
+    reads = [0] * readers
+    latencies = []
+
+    def reader(i):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        while time.monotonic() < stop_at:
+            conn.request("GET", "/api/admin/interviews", headers=headers)
+            conn.getresponse().read()
+            reads[i] += 1
+
+    def writer():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        headers = {"Authorization": f"Bearer {candidate_token}", "Content-Type": "application/json"}
+        job_id = 1
+        while time.monotonic() < stop_at and job_id <= jobs:
+            started = time.perf_counter()
+            conn.request("POST", "/api/candidate/apply", body=json.dumps({"job_id": job_id}), headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                latencies.append((time.perf_counter() - started) * 1000)
+            job_id += 1
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)] + [threading.Thread(target=writer)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, sum(reads) / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--interviews", type=int, default=300)
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="ats-bench-")
+    template = os.path.join(workdir, "template.db")
+    admin_token, candidate_token = seed(template, args.jobs, args.interviews)
+
+    print(f"{'routing':>8} {'writes':>7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'reads/s':>8}")
+    for routing in (False, True):
+        primary = os.path.join(workdir, f"primary-{routing}.db")
+        shutil.copy(template, primary)
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{primary}", ACCESS_LOG="", LOG_LEVEL="warning",
+                   CACHE_BACKEND="sqlite", CACHE_URL=os.path.join(workdir, f"cache-{routing}.db"),
+                   RATE_LIMITING_ENABLED="false", ANALYTICS_EXPORT_INTERVAL="0", WARMUP_ON_STARTUP="false")
+        if routing:
+            replica = os.path.join(workdir, "replica.db")
+            snapshot(template, replica)
+            env.update(DATABASE_REPLICA_URL=f"sqlite:///{replica}", REPLICA_MAX_LAG="86400")
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "main:app",
+             "--workers", str(args.workers), "--bind", f"127.0.0.1:{args.port}"],
+            cwd=BACKEND_DIR, env=env,
+        )
+        try:
+            wait_until_up(args.port)
+            latencies, read_rate = run(args.port, admin_token, candidate_token, args.jobs, args.duration, args.readers)
+            p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else float("nan")
+            print(f"{'on' if routing else 'off':>8} {len(latencies):>7} {statistics.median(latencies):>8.1f} "
+                  f"{p95:>8.1f} {max(latencies):>8.1f} {read_rate:>8.1f}")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Tenant isolation: a small organization's read latency under a large one's load.
+
+Seeds throwaway SQLite databases with a small organization (one job,
+``--small-applications`` applicants) and a large one (``--big-applications``),
+then measures the small organization's recruiter query (top applicants of its
+job, plus the count) ``--reads`` times, in three set-ups:
+
+- alone: nothing else running (baseline),
+- shared: the large organization on the same shard, with ``--load-threads``
+  threads inserting applications and scanning its job meanwhile,
+- sharded: the same load, with the large organization on a shard of its own.
+
+Every shard has a pool of ``--pool-size`` connections. Each set-up runs in a
+fresh process, since engines are created from the settings at import.
+
+    python benchmarks/bench_tenants.py --big-applications 200000
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SEED_BATCH = 10_000
+WRITE_BATCH = 200
+READ_INTERVAL = 0.005
+
+
+def seed(shard_of_big, small_applications, big_applications):
+    from database import init_db
+    from models import Application, Job, User
+    from sharding import DEFAULT_SHARD, shards
+    import tenants
+
+    init_db()
+    small = tenants.create_organization("small", "Small Co")
+    big = tenants.create_organization("big", "Big Corp", shard_of_big)
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    next_id = {DEFAULT_SHARD: 1, shard_of_big: 1}
+    jobs = {}
+    for organization, count in ((small, small_applications), (big, big_applications)):
+        first = next_id[organization.shard]
+        next_id[organization.shard] += count + 1
+        with shards.engine(organization.shard).begin() as conn:
+            conn.execute(User.__table__.insert(), [{"id": first, "email": f"recruiter@{organization.slug}.com",
+                                                    "hashed_password": "x", "full_name": "Recruiter",
+                                                    "role": "RECRUITER", "organization_id": organization.id}])
+            job_id = conn.execute(Job.__table__.insert().values(
+                title="Engineer", description="Benchmark", recruiter_id=first, status="active",
+                organization_id=organization.id
+            )).inserted_primary_key[0]
+            for start in range(0, count, SEED_BATCH):
+                ids = range(first + 1 + start, first + 1 + min(start + SEED_BATCH, count))
+                conn.execute(User.__table__.insert(), [
+                    {"id": i, "email": f"candidate{i}@{organization.slug}.com", "hashed_password": "x",
+                     "full_name": f"Candidate {i}", "role": "CANDIDATE", "organization_id": organization.id}
+                    for i in ids
+                ])
+                conn.execute(Application.__table__.insert(), [
+                    {"candidate_id": i, "job_id": job_id, "status": "COMPLETED",
+                     "applied_at": now - timedelta(days=rng.uniform(1, 60)),
+                     "score": round(rng.uniform(0, 100), 1), "organization_id": organization.id}
+                    for i in ids
+                ])
+        jobs[organization.slug] = (organization, job_id, first)
+    return jobs
+
+
+def small_read(job_id):
+    from sqlalchemy import func
+    from database import SessionLocal
+    from models import Application
+
+    db = SessionLocal()
+    try:
+        top = db.query(Application.id, Application.score).filter(
+            Application.job_id == job_id, Application.score.isnot(None)
+        ).order_by(Application.score.desc()).limit(20).all()
+        total = db.query(func.count(Application.id)).filter(Application.job_id == job_id).scalar()
+        return len(top), total
+    finally:
+        db.close()
+
+
+def big_load(tenant, job_id, recruiter_id, stop, counts):
+    from sqlalchemy import func
+    from database import SessionLocal
+    from models import Application
+    from sharding import using_tenant
+
+    rng = random.Random(threading.get_ident())
+    with using_tenant(tenant):
+        while not stop.is_set():
+            db = SessionLocal()
+            try:
+                db.add_all(Application(candidate_id=recruiter_id, job_id=job_id, status="COMPLETED",
+                                       score=round(rng.uniform(0, 100), 1)) for _ in range(WRITE_BATCH))
+                db.commit()
+                db.query(func.avg(Application.score), func.count(Application.id)).filter(
+                    Application.job_id == job_id
+                ).one()
+                counts.append(WRITE_BATCH)
+            finally:
+                db.close()
+
+
+def run(scenario, args):
+    """One set-up, in this process; prints its results as JSON"""
+    workdir = tempfile.mkdtemp(prefix="ats-bench-")
+    shard_of_big = "big" if scenario in ("alone", "sharded") else "default"
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'default.db')}"
+    os.environ["SHARDS"] = json.dumps({"big": f"sqlite:///{os.path.join(workdir, 'big.db')}"})
+    os.environ["DATABASE_POOL_SIZE"] = str(args.pool_size)
+    os.environ["DATABASE_MAX_OVERFLOW"] = "0"
+    jobs = seed(shard_of_big, args.small_applications, args.big_applications)
+
+    from sharding import Tenant, using_tenant
+
+    small, small_job, _ = jobs["small"]
+    big, big_job, big_recruiter = jobs["big"]
+    stop, counts, threads = threading.Event(), [], []
+    if scenario != "alone":
+        big_tenant = Tenant(big.id, big.shard)
+        threads = [threading.Thread(target=big_load, args=(big_tenant, big_job, big_recruiter, stop, counts))
+                   for _ in range(args.load_threads)]
+        for thread in threads:
+            thread.start()
+        time.sleep(1)
+
+    latencies = []
+    started = time.perf_counter()
+    with using_tenant(Tenant(small.id, small.shard)):
+        for _ in range(args.reads):
+            read_started = time.perf_counter()
+            top, total = small_read(small_job)
+            latencies.append((time.perf_counter() - read_started) * 1000)
+            assert total == args.small_applications, total  # never sees the other tenant's rows
+            time.sleep(READ_INTERVAL)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    print(json.dumps({
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95)],
+        "p99": latencies[int(len(latencies) * 0.99)],
+        "big_writes_per_s": sum(counts) / elapsed,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--small-applications", type=int, default=2_000)
+    parser.add_argument("--big-applications", type=int, default=200_000)
+    parser.add_argument("--load-threads", type=int, default=8)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--reads", type=int, default=500)
+    parser.add_argument("--scenario", choices=["alone", "shared", "sharded"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        return run(args.scenario, args)
+
+    print(f"small tenant: {args.small_applications} applicants; big tenant: {args.big_applications} applicants, "
+          f"{args.load_threads} load threads; pool of {args.pool_size} per shard")
+    print(f"{'set-up':<9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'big tenant writes/s':>20}")
+    for scenario in ("alone", "shared", "sharded"):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--scenario", scenario] + sys.argv[1:],
+            check=True, capture_output=True, text=True, cwd=BACKEND_DIR
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{scenario:<9} {result['p50']:>8.2f} {result['p95']:>8.2f} {result['p99']:>8.2f} "
+              f"{result['big_writes_per_s']:>20.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Transcript storage: plain JSON vs. zstd with a trained dictionary.
+
+Seeds a throwaway SQLite database with ``--interviews`` transcripts stored the
+old way (plain JSON text), runs the ``compress_transcripts`` migration, and
+compares stored bytes (also against zstd without a dictionary) and the time
+to load interviews for a listing (transcript deferred) and with their full
+transcript.
+
+    python benchmarks/bench_transcripts.py --interviews 20000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SKILLS = ["Python", "React", "PostgreSQL", "Docker", "Kubernetes", "AWS", "TypeScript", "Go"]
+WORDS = (
+    "i we the a and to of in for on with that this it was our team service api database query latency "
+    "deploy test tests users data code review production incident cache index migration python react "
+    "built led designed improved reduced increased because then after before when which would could "
+    "performance scaling monitoring alerts metrics customer feature release bug fix refactor design "
+    "trade-off consistency availability throughput memory cpu requests per second about around percent"
+).split()
+
+
+def transcript(rng, bank):
+    questions = [bank.items[rng.randrange(len(bank.items))].as_question() for _ in range(6)]
+    answers = []
+    for question in questions:
+        words = [WORDS[min(int(rng.paretovariate(1.1)) - 1, len(WORDS) - 1)] for _ in range(rng.randint(30, 150))]
+        answers.append({
+            "question_id": question["id"],
+            "answer": " ".join(words).capitalize() + ".",
+            "answered_at": datetime(2026, 1, 1).isoformat(),
+        })
+    analysis = {
+        "overall_assessment": "Strong candidate with good technical knowledge",
+        "strengths": rng.sample(["Clear communication", "Relevant experience", "Problem-solving skills",
+                                 "System design", "Ownership"], 3),
+        "areas_for_improvement": ["Could provide more specific examples", "Technical depth in certain areas"],
+        "recommendation": rng.choice(["Proceed to next round", "Hire", "Do not proceed"]),
+        "technical_score": rng.randint(40, 100),
+        "communication_score": rng.randint(40, 100),
+        "problem_solving_score": rng.randint(40, 100),
+    }
+    return questions, answers, analysis
+
+
+def seed(interviews):
+    workdir = tempfile.mkdtemp(prefix="ats-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    from sqlalchemy import text
+    from database import engine, init_db
+    from interview_engine import build_bank
+
+    init_db()
+    rng = random.Random(0)
+    bank = build_bank(SKILLS)
+    now = datetime.utcnow()
+    rows = []
+    for i in range(1, interviews + 1):
+        questions, answers, analysis = transcript(rng, bank)
+        rows.append({
+            "id": i, "application_id": i, "questions": json.dumps(questions), "answers": json.dumps(answers),
+            "ai_analysis": json.dumps(analysis), "score": rng.uniform(0, 100), "status": "completed",
+            "started_at": now - timedelta(hours=1), "completed_at": now,
+        })
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO interviews (id, application_id, questions, answers, ai_analysis, score, status, "
+            "started_at, completed_at) VALUES (:id, :application_id, :questions, :answers, :ai_analysis, "
+            ":score, :status, :started_at, :completed_at)"
+        ), rows)
+        # Pretend the database predates compression.
+        conn.execute(text("DELETE FROM schema_migrations WHERE name = 'compress_transcripts'"))
+        conn.execute(text("DELETE FROM compression_dictionaries"))
+
+
+def stored_bytes(conn):
+    from sqlalchemy import text
+    return conn.execute(text(
+        "SELECT SUM(LENGTH(CAST(questions AS BLOB)) + LENGTH(CAST(answers AS BLOB)) "
+        "+ LENGTH(CAST(ai_analysis AS BLOB))) FROM interviews"
+    )).scalar()
+
+
+def load_times(repeat):
+    from sqlalchemy.orm import undefer_group
+    from database import SessionLocal
+    from models import Interview
+
+    def run(options):
+        best = float("inf")
+        for _ in range(repeat):
+            db = SessionLocal()
+            try:
+                started = time.perf_counter()
+                db.query(Interview).options(*options).all()
+                best = min(best, time.perf_counter() - started)
+            finally:
+                db.close()
+        return best * 1000
+
+    return {"listing": run([]), "full transcript": run([undefer_group("transcript")])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interviews", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    seed(args.interviews)
+    import zstandard
+    from sqlalchemy import text
+    from sqlalchemy.orm import undefer_group
+    from database import SessionLocal, engine
+    from migrations import run_data_migrations
+    from models import Interview
+    import transcripts
+
+    with engine.connect() as conn:
+        plain = stored_bytes(conn)
+        samples = [
+            value.encode() for row in conn.execute(text("SELECT questions, answers, ai_analysis FROM interviews"))
+            for value in row
+        ]
+    compressor = zstandard.ZstdCompressor(level=transcripts.LEVEL)
+    no_dictionary = sum(len(compressor.compress(sample)) for sample in samples)
+
+    # Before: the same rows, with the transcript loaded even for listings.
+    def legacy_listing():
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            db.query(Interview).options(undefer_group("transcript")).all()
+            return (time.perf_counter() - started) * 1000
+        finally:
+            db.close()
+    before = min(legacy_listing() for _ in range(args.repeat))
+
+    started = time.perf_counter()
+    run_data_migrations(engine)
+    migration_s = time.perf_counter() - started
+    with engine.connect() as conn:
+        compressed = stored_bytes(conn)
+    after = load_times(args.repeat)
+
+    print(f"interviews: {args.interviews}; migration (train + rewrite): {migration_s:.1f} s")
+    print(f"{'storage':<28} {'MB':>8} {'ratio':>7}")
+    for name, size in [("plain JSON", plain), ("zstd, no dictionary", no_dictionary),
+                       ("zstd + trained dictionary", compressed)]:
+        print(f"{name:<28} {size / 1e6:>8.2f} {plain / size:>6.1f}x")
+    print(f"{'load all interviews':<40} {'ms':>8}")
+    print(f"{'listing, before (JSON parsed)':<40} {before:>8.0f}")
+    print(f"{'listing, after (transcript deferred)':<40} {after['listing']:>8.0f}")
+    print(f"{'full transcript, after (decompressed)':<40} {after['full transcript']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
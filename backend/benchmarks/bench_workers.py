@@ -0,0 +1,118 @@
+"""
+Throughput vs. gunicorn worker count.
+
+Starts the production entrypoint against a throwaway SQLite database for each
+worker count, hammers an authenticated, DB-backed endpoint from a pool of
+keep-alive client threads and prints requests/second.
+
+    python benchmarks/bench_workers.py --workers 1 2 4 --duration 10
+"""
+
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def seed(database_url):
+    os.environ["DATABASE_URL"] = database_url
+    from database import SessionLocal, init_db
+    from models import User, Job, UserRole
+    from auth import create_access_token
+
+    init_db()
+    db = SessionLocal()
+    try:
+        recruiter = User(email="bench-recruiter@ats.com", hashed_password="x", full_name="Bench Recruiter", role=UserRole.RECRUITER)
+        candidate = User(email="bench-candidate@ats.com", hashed_password="x", full_name="Bench Candidate", role=UserRole.CANDIDATE)
+        db.add_all([recruiter, candidate])
+        db.commit()
+        for i in range(50):
+            db.add(Job(title=f"Job {i}", description="Benchmark job " * 20, recruiter_id=recruiter.id))
+        db.commit()
+    finally:
+        db.close()
+    return create_access_token({"sub": "bench-candidate@ats.com"})
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/api/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def load(port, token, duration, clients):
+    counts = [0] * clients
+    errors = [0] * clients
+    stop_at = time.monotonic() + duration
+
+    def client(i):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        headers = {"Authorization": f"Bearer {token}"}
+        while time.monotonic() < stop_at:
+            try:
+                conn.request("GET", "/api/candidate/jobs", headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status == 200:
+                    counts[i] += 1
+                else:
+                    errors[i] += 1
+            except OSError:
+                errors[i] += 1
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(counts) / duration, sum(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="ats-bench-")
+    database_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    token = seed(database_url)
+    env = dict(os.environ, DATABASE_URL=database_url, ACCESS_LOG="", LOG_LEVEL="warning",
+               CACHE_BACKEND="sqlite", CACHE_URL=os.path.join(workdir, "cache.db"))
+
+    print(f"{'workers':>8} {'req/s':>10} {'errors':>8}")
+    for count in args.workers:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "main:app",
+             "--workers", str(count), "--bind", f"127.0.0.1:{args.port}"],
+            cwd=BACKEND_DIR, env=env,
+        )
+        try:
+            wait_until_up(args.port)
+            rps, errors = load(args.port, token, args.duration, args.clients)
+            print(f"{count:>8} {rps:>10.1f} {errors:>8}")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
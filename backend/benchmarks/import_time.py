@@ -0,0 +1,81 @@
+"""
+Import-time budget check for the API.
+
+Imports ``main`` in a fresh interpreter (best of several runs), fails with
+exit code 1 when it takes longer than the budget and lists the slowest
+imports so the offender is easy to find. Modules meant to be imported lazily
+must not show up in ``sys.modules`` after ``import main`` either.
+
+    python benchmarks/import_time.py --budget-ms 1500
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy modules that must stay out of the import path of `main`.
+DEFERRED_MODULES = ["passlib", "scoring", "resumes", "resume_parser", "pypdf", "analytics", "pyarrow", "duckdb", "interview_engine", "dedup"]
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+import main
+elapsed = (time.perf_counter() - started) * 1000
+print(elapsed)
+print(",".join(name for name in {deferred!r} if name in sys.modules))
+"""
+
+
+def measure(deferred):
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(deferred=deferred)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    ).stdout.splitlines()
+    return float(output[0]), [name for name in output[1].split(",") if name]
+
+
+def slowest_imports(limit):
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Direct imports of `main` only, so nested modules aren't double counted.
+        if name.startswith("   ") and not name.startswith("    "):
+            rows.append((int(cumulative) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "1500")))
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    results = [measure(DEFERRED_MODULES) for _ in range(args.runs)]
+    best = min(ms for ms, _ in results)
+    eager = sorted({name for _, names in results for name in names})
+
+    print(f"import main: {best:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    for ms, name in slowest_imports(8):
+        print(f"  {ms:8.1f} ms  {name}")
+
+    failed = False
+    if best > args.budget_ms:
+        print("FAIL: import time over budget")
+        failed = True
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(eager)}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Bulk status transitions for applications.
+
+``transition_applications`` moves many applications to a new status with
+set-based ``UPDATE ... WHERE id IN (...)`` statements, ``BULK_CHUNK`` ids at
+a time, instead of loading and saving each row. Each chunk is one
+transaction: the update and an ``application.status_changed`` outbox event
+per changed row. Only applications in one of ``TRANSITIONS[status]`` move;
+the others (already there, withdrawn into the archive, or not the caller's)
+are reported back as skipped.
+
+The statements run through the ORM, so the caller's tenant scoping
+(tenants.py) applies to them like to any query.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from events import record_status_change
+from models import Application, ApplicationStatus, Job
+
+BULK_CHUNK = 500
+
+# Target status -> statuses an application may move to it from
+TRANSITIONS: Dict[ApplicationStatus, List[ApplicationStatus]] = {
+    ApplicationStatus.ACCEPTED: [ApplicationStatus.COMPLETED],
+    ApplicationStatus.REJECTED: [
+        ApplicationStatus.PENDING, ApplicationStatus.INTERVIEWING,
+        ApplicationStatus.COMPLETED, ApplicationStatus.ACCEPTED,
+    ],
+}
+
+
+def _chunks(ids: List[int], size: int) -> Iterable[List[int]]:
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def transition_applications(
+    db: Session,
+    application_ids: List[int],
+    status: ApplicationStatus,
+    recruiter_id: Optional[int] = None,
+    chunk_size: int = BULK_CHUNK,
+) -> Dict[str, object]:
+    """Move the applications to ``status``; ``recruiter_id`` limits them to that recruiter's jobs.
+
+    Returns the number updated and the ids that were skipped.
+    """
+    if status not in TRANSITIONS:
+        raise ValueError(f"Applications cannot be moved to {status.value} in bulk")
+    ids = sorted(set(application_ids))
+    updated: List[int] = []
+    for chunk in _chunks(ids, chunk_size):
+        # One statement per source status, so each changed row's old status is known
+        for old_status in TRANSITIONS[status]:
+            statement = update(Application).where(
+                Application.id.in_(chunk),
+                Application.status == old_status,
+            )
+            if recruiter_id is not None:
+                statement = statement.where(
+                    Application.job_id.in_(select(Job.id).where(Job.recruiter_id == recruiter_id))
+                )
+            rows = db.execute(
+                statement.values(status=status).returning(
+                    Application.id, Application.job_id, Application.candidate_id
+                ),
+                execution_options={"synchronize_session": False},
+            ).all()
+            for row in rows:
+                record_status_change(db, row, old_status, status)
+                updated.append(row.id)
+        db.commit()
+    changed = set(updated)
+    return {"updated": len(changed), "skipped": [i for i in ids if i not in changed]}
@@ -0,0 +1,280 @@
+"""
+Shared cache and lock backends.
+
+Every gunicorn worker is a separate process, so anything that must be seen by
+all workers (locks, counters, interview session state) goes through one of
+these backends instead of module-level dicts. Both backends expose the small
+Redis-style surface the app needs: get/set/delete/incr/expire plus a lock,
+and an atomic read-modify-write (``update``, a stand-in for a Lua script).
+
+- ``memory``: per-process dict; fine for the single-process dev server.
+- ``sqlite``: a local SQLite file shared by all workers on a host, standing in
+  for Redis until one is deployed.
+
+Select with the ``cache_backend`` and ``cache_url`` settings. Keys written
+while working on a shard other than the default one (see sharding.py) are
+prefixed with the shard's name, so shards never see each other's entries.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from settings import get_settings
+from sharding import DEFAULT_SHARD, current_shard
+
+
+class LockTimeout(Exception):
+    pass
+
+
+class CacheBackend:
+    blocking = True
+
+    def get(self, key: str) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ex: Optional[float] = None, nx: bool = False) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str, value: Any = None) -> bool:
+        """Delete ``key``; when ``value`` is given, only if it still holds it."""
+        raise NotImplementedError
+
+    def incr(self, key: str, amount: int = 1, ex: Optional[float] = None) -> int:
+        raise NotImplementedError
+
+    def expire(self, key: str, ex: float) -> bool:
+        raise NotImplementedError
+
+    def update(self, key: str, fn: Callable[[Any], Tuple[Any, Any]], ex: Optional[float] = None) -> Any:
+        """Atomically replace the value of ``key`` with ``fn(value)[0]`` and return ``fn(value)[1]``."""
+        raise NotImplementedError
+
+    @contextmanager
+    def lock(self, name: str, timeout: float = 30, blocking_timeout: Optional[float] = None):
+        """Cross-worker mutex; ``timeout`` bounds how long a crashed holder blocks others."""
+        key = f"lock:{name}"
+        token = uuid.uuid4().hex
+        deadline = None if blocking_timeout is None else time.monotonic() + blocking_timeout
+        while not self.set(key, token, ex=timeout, nx=True):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise LockTimeout(name)
+            time.sleep(0.01)
+        try:
+            yield
+        finally:
+            self.delete(key, token)
+
+
+class MemoryBackend(CacheBackend):
+    # Operations never block, so async callers may use it on the event loop.
+    blocking = False
+
+    def __init__(self):
+        self._data = {}
+        self._mutex = threading.Lock()
+
+    def _live(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= time.time():
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, key):
+        with self._mutex:
+            item = self._live(key)
+            return item[0] if item else None
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._mutex:
+            if nx and self._live(key):
+                return False
+            self._data[key] = (value, time.time() + ex if ex else None)
+            return True
+
+    def delete(self, key, value=None):
+        with self._mutex:
+            item = self._live(key)
+            if item is None or (value is not None and item[0] != value):
+                return False
+            del self._data[key]
+            return True
+
+    def incr(self, key, amount=1, ex=None):
+        with self._mutex:
+            item = self._live(key)
+            if item is None:
+                item = (0, time.time() + ex if ex else None)
+            value = int(item[0]) + amount
+            self._data[key] = (value, item[1])
+            return value
+
+    def expire(self, key, ex):
+        with self._mutex:
+            item = self._live(key)
+            if item is None:
+                return False
+            self._data[key] = (item[0], time.time() + ex)
+            return True
+
+    def update(self, key, fn, ex=None):
+        with self._mutex:
+            item = self._live(key)
+            value, result = fn(item[0] if item else None)
+            self._data[key] = (value, time.time() + ex if ex else None)
+            return result
+
+
+class SQLiteBackend(CacheBackend):
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+
+    @contextmanager
+    def _conn(self):
+        # One connection per thread (and per process, since workers fork
+        # before first use); BEGIN IMMEDIATE serialises writers across workers.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _row(conn, key):
+        row = conn.execute("SELECT value, expires_at FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= time.time():
+            conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+            return None
+        return json.loads(row[0]), row[1]
+
+    def get(self, key):
+        with self._conn() as conn:
+            row = self._row(conn, key)
+            return row[0] if row else None
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._conn() as conn:
+            if nx and self._row(conn, key):
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + ex if ex else None),
+            )
+            return True
+
+    def delete(self, key, value=None):
+        with self._conn() as conn:
+            row = self._row(conn, key)
+            if row is None or (value is not None and row[0] != value):
+                return False
+            conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+            return True
+
+    def incr(self, key, amount=1, ex=None):
+        with self._conn() as conn:
+            row = self._row(conn, key)
+            value = (int(row[0]) if row else 0) + amount
+            expires_at = row[1] if row else (time.time() + ex if ex else None)
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+            return value
+
+    def expire(self, key, ex):
+        with self._conn() as conn:
+            if self._row(conn, key) is None:
+                return False
+            conn.execute("UPDATE kv SET expires_at = ? WHERE key = ?", (time.time() + ex, key))
+            return True
+
+    def update(self, key, fn, ex=None):
+        with self._conn() as conn:
+            row = self._row(conn, key)
+            value, result = fn(row[0] if row else None)
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + ex if ex else None),
+            )
+            return result
+
+
+class ShardCache(CacheBackend):
+    """One shard's view of a backend: the same keys, prefixed with the shard name"""
+
+    def __init__(self, backend: CacheBackend, shard: str):
+        self._backend = backend
+        self._prefix = f"shard:{shard}:"
+        self.blocking = backend.blocking
+
+    def get(self, key):
+        return self._backend.get(self._prefix + key)
+
+    def set(self, key, value, ex=None, nx=False):
+        return self._backend.set(self._prefix + key, value, ex=ex, nx=nx)
+
+    def delete(self, key, value=None):
+        return self._backend.delete(self._prefix + key, value)
+
+    def incr(self, key, amount=1, ex=None):
+        return self._backend.incr(self._prefix + key, amount, ex=ex)
+
+    def expire(self, key, ex):
+        return self._backend.expire(self._prefix + key, ex)
+
+    def update(self, key, fn, ex=None):
+        return self._backend.update(self._prefix + key, fn, ex=ex)
+
+
+_cache: Optional[CacheBackend] = None
+_cache_lock = threading.Lock()
+_shard_caches: Dict[str, ShardCache] = {}
+
+
+def create_cache(backend: str, url: Optional[str] = None) -> CacheBackend:
+    if backend == "memory":
+        return MemoryBackend()
+    if backend == "sqlite":
+        return SQLiteBackend(url or "./ats_cache.db")
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+def get_cache() -> CacheBackend:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                settings = get_settings()
+                _cache = create_cache(settings.cache_backend, settings.cache_url)
+    shard = current_shard.get()
+    if shard == DEFAULT_SHARD:
+        return _cache
+    cache = _shard_caches.get(shard)
+    if cache is None:
+        cache = _shard_caches.setdefault(shard, ShardCache(_cache, shard))
+    return cache
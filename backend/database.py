@@ -1,23 +1,52 @@
-from sqlalchemy import create_engine
+from fastapi import Request
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
+from sqlalchemy.orm import Session, sessionmaker
+from settings import get_settings
+from sharding import DEFAULT_SHARD, create_db_engine, current_shard, current_tenant, shards, using_shard
 
-load_dotenv()
+DATABASE_URL = get_settings().database_url
+REPLICA_URL = get_settings().database_replica_url
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./ats_database.db")
+# The default shard; tenants on other shards are reached through `shards`
+engine = shards.engine(DEFAULT_SHARD)
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+# Optional read replica of the default shard for read-only endpoints (see replication.py)
+replica_engine = create_db_engine(REPLICA_URL) if REPLICA_URL else None
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+class ShardSession(Session):
+    """Session on the current shard, scoped to the current tenant (see tenants.py)"""
+
+    def __init__(self, bind=None, **kwargs):
+        shard = current_shard.get()
+        super().__init__(bind=bind if bind is not None else shards.engine(shard), **kwargs)
+        self.info["shard"] = shard
+        self.info["tenant"] = current_tenant.get()
+
+
+SessionLocal = sessionmaker(class_=ShardSession, autocommit=False, autoflush=False)
+ReplicaSessionLocal = sessionmaker(class_=ShardSession, autocommit=False, autoflush=False, bind=replica_engine or engine)
 
 Base = declarative_base()
 
-def get_db():
+def init_db():
+    """Create database tables on every shard.
+
+    Called once per deployment (by the gunicorn master or the dev server),
+    never at import time, so forked workers don't race on DDL.
+    """
+    import models  # noqa: F401 - register mappers on Base.metadata
+    from migrations import upgrade
+    for name in shards.names():
+        with using_shard(name):
+            shard_engine = shards.engine(name)
+            Base.metadata.create_all(bind=shard_engine)
+            upgrade(shard_engine, Base.metadata)
+
+def get_db(request: Request):
     db = SessionLocal()
+    # Lets replication.py make the caller's next reads stick to the primary
+    db.info["authorization"] = request.headers.get("authorization")
     try:
         yield db
     finally:
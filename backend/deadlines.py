@@ -0,0 +1,269 @@
+"""
+Request deadlines and cancellation.
+
+Every API request is matched against ``RULES`` (first match wins) and runs
+with a ``Deadline``: its route's timeout, overridable per rule with the
+``request_timeouts`` setting. A request is stopped when
+
+- the deadline passes: the client gets 504 right away, or
+- the client disconnects (the browser gave up), unless the rule says the
+  work should finish anyway (bulk writes, maintenance jobs).
+
+Stopping a request interrupts its database queries, so the threadpool worker
+and the pooled connection it holds are freed instead of running the query to
+the end: on SQLite a progress handler aborts statements of a stopped request,
+on other databases each connection gets a ``statement_timeout`` of the time
+left when it is checked out and a stopped request's running queries are
+cancelled; any further query of a stopped request raises ``RequestStopped``
+before it reaches the database. The endpoint thus fails and unwinds normally
+(sessions close); whatever it still sends is discarded.
+
+Stopped requests are counted in ``metrics`` as ``requests_timed_out_total``
+and ``requests_cancelled_total``.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, NamedTuple, Optional, Pattern, Set
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import metrics
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+EXEMPT_PATHS = {"/api/health"}
+
+# SQLite virtual machine instructions between deadline checks
+PROGRESS_STEPS = 10_000
+
+STOPPED_RESPONSES = {
+    "timeout": (504, "Request timed out"),
+    "disconnect": (499, "Client closed request"),
+}
+
+
+class Rule(NamedTuple):
+    name: str
+    method: Optional[str]
+    pattern: Pattern
+    timeout: Optional[float]  # seconds; None = no deadline
+    cancel_on_disconnect: bool = True
+
+
+RULES = [
+    Rule("login", "POST", re.compile(r"^/api/auth/login$"), 10),
+    Rule("upload_resume", "POST", re.compile(r"^/api/candidate/upload-resume/"), 60),
+    Rule("admin_listings", "GET", re.compile(r"^/api/admin/(interviews|applications|candidates|recruiters)$"), 15),
+    # Writes and maintenance jobs finish even if the client goes away
+    Rule("bulk_status", "POST", re.compile(r"^/api/(admin|recruiter)/applications/status$"), None, False),
+    Rule("admin_jobs", "POST", re.compile(r"^/api/admin/(archive|reports/export|duplicates/scan)$"), None, False),
+    # Streamed downloads and feeds end with the client
+    Rule("export", "GET", re.compile(r"^/api/recruiter/jobs/\d+/applications/export$"), None),
+    Rule("event_stream", "GET", re.compile(r"^/api/events/stream$"), None),
+    Rule("events", "GET", re.compile(r"^/api/events$"), 75),  # long-polls up to 60 seconds
+    Rule("default", None, re.compile(r"^/api/"), 30),
+]
+
+
+class Deadline:
+    """When the current request must be done by, and whether it was stopped"""
+
+    def __init__(self, timeout: Optional[float]):
+        self.expires_at = time.monotonic() + timeout if timeout is not None else None
+        self.reason: Optional[str] = None  # "timeout" or "disconnect" once stopped
+        self._connections: Set[Any] = set()
+        self._lock = threading.Lock()
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.reason is not None or (self.expires_at is not None and time.monotonic() >= self.expires_at)
+
+    def stop(self, reason: str):
+        """Mark the request stopped and cancel its running queries; safe to call from any thread"""
+        self.reason = reason
+        with self._lock:
+            connections = list(self._connections)
+        for dbapi_connection in connections:
+            try:
+                dbapi_connection.cancel()
+            except Exception:
+                logger.exception("Cancelling a query failed")
+
+    def add_connection(self, dbapi_connection):
+        with self._lock:
+            self._connections.add(dbapi_connection)
+
+    def remove_connection(self, dbapi_connection):
+        with self._lock:
+            self._connections.discard(dbapi_connection)
+
+
+current_deadline: ContextVar[Optional[Deadline]] = ContextVar("current_deadline", default=None)
+
+
+# -- Database ---------------------------------------------------------------------
+
+def _sqlite_progress() -> int:
+    # Runs in the thread executing the statement, in its request's context
+    deadline = current_deadline.get()
+    return 1 if deadline is not None and deadline.expired() else 0
+
+
+class RequestStopped(Exception):
+    """Raised instead of running a query for a request that was already stopped"""
+
+
+def install(engine: Engine):
+    """Make the engine's queries honour the current request's deadline"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _check(conn, cursor, statement, parameters, context, executemany):
+        # Many quick queries (N+1 listings) never trip the per-statement limits
+        deadline = current_deadline.get()
+        if deadline is not None and deadline.expired():
+            raise RequestStopped(deadline.reason or "timeout")
+
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _set_progress_handler(dbapi_connection, connection_record):
+            dbapi_connection.set_progress_handler(_sqlite_progress, PROGRESS_STEPS)
+        return
+
+    @event.listens_for(engine, "checkout")
+    def _watch(dbapi_connection, connection_record, connection_proxy):
+        deadline = current_deadline.get()
+        if deadline is None:
+            return
+        remaining = deadline.remaining()
+        if remaining is not None:
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"SET statement_timeout = {max(1, int(remaining * 1000))}")
+            cursor.close()
+            dbapi_connection.commit()
+        deadline.add_connection(dbapi_connection)
+        connection_record.info["deadline"] = (deadline, remaining is not None)
+
+    @event.listens_for(engine, "checkin")
+    def _unwatch(dbapi_connection, connection_record):
+        deadline, timed = connection_record.info.pop("deadline", (None, False))
+        if deadline is None or dbapi_connection is None:
+            return
+        deadline.remove_connection(dbapi_connection)
+        if timed:
+            cursor = dbapi_connection.cursor()
+            cursor.execute("SET statement_timeout = 0")
+            cursor.close()
+            dbapi_connection.commit()
+
+
+# -- Middleware -------------------------------------------------------------------
+
+def _configured_rules():
+    overrides = get_settings().request_timeouts
+    return [rule._replace(timeout=overrides.get(rule.name, rule.timeout)) for rule in RULES]
+
+
+class DeadlineMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.rules = _configured_rules()
+
+    def _match(self, method: str, path: str) -> Optional[Rule]:
+        if path in EXEMPT_PATHS:
+            return None
+        for rule in self.rules:
+            if (rule.method is None or rule.method == method) and rule.pattern.match(path):
+                return rule
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not get_settings().request_deadlines_enabled:
+            return await self.app(scope, receive, send)
+        rule = self._match(scope["method"], scope["path"])
+        if rule is None or (rule.timeout is None and not rule.cancel_on_disconnect):
+            return await self.app(scope, receive, send)
+
+        deadline = Deadline(rule.timeout)
+        token = current_deadline.set(deadline)
+        try:
+            await self._run(rule, deadline, scope, receive, send)
+        finally:
+            current_deadline.reset(token)
+
+    async def _run(self, rule: Rule, deadline: Deadline, scope, receive, send):
+        response_started = False
+        disconnected = asyncio.Event()
+        messages: asyncio.Queue = asyncio.Queue()
+
+        async def read_messages():
+            # Reads ahead of the app so a disconnect is seen while it works
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    disconnected.set()
+                    return
+
+        async def app_receive():
+            if disconnected.is_set() and messages.empty():
+                return {"type": "http.disconnect"}
+            return await messages.get()
+
+        async def app_send(message):
+            nonlocal response_started
+            if deadline.reason is not None:
+                return  # stopped; a 504 (or 499) was sent instead
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        if rule.cancel_on_disconnect:
+            app_task = asyncio.create_task(self.app(scope, app_receive, app_send))
+            watchers = [asyncio.create_task(read_messages()), asyncio.create_task(disconnected.wait())]
+        else:
+            app_task = asyncio.create_task(self.app(scope, receive, app_send))
+            watchers = []
+        try:
+            await asyncio.wait([app_task] + watchers[1:], timeout=deadline.remaining(),
+                               return_when=asyncio.FIRST_COMPLETED)
+            # An app that failed after the deadline passed ran into it before the timer fired
+            if app_task.done() and (app_task.exception() is None or not deadline.expired()):
+                return app_task.result()
+            reason = "disconnect" if disconnected.is_set() else "timeout"
+            already_responding = response_started
+            deadline.stop(reason)
+            if reason == "timeout":
+                metrics.inc("requests_timed_out_total", rule=rule.name)
+                logger.warning("%s %s timed out after %ss", scope["method"], scope["path"], rule.timeout)
+            else:
+                metrics.inc("requests_cancelled_total", rule=rule.name)
+            if not already_responding:
+                # Nobody reads a 499 ("client closed request"), but middleware expects a response
+                await _send_error(send, *STOPPED_RESPONSES[reason])
+            # Not cancelled: a task cancelled while its endpoint runs in a thread
+            # skips the dependencies' cleanup, leaving their sessions open.
+            # The endpoint fails at its next query instead, as expected here.
+            await asyncio.gather(app_task, return_exceptions=True)
+        finally:
+            for watcher in watchers:
+                watcher.cancel()
+
+
+async def _send_error(send, status: int, detail: str):
+    body = json.dumps({"detail": detail}).encode()
+    await send({"type": "http.response.start", "status": status, "headers": [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+    ]})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,355 @@
+"""
+Duplicate-candidate detection.
+
+Every candidate gets two MinHash signatures: one over word 3-shingles of
+their latest parsed resume, one over character trigrams of their normalized
+name (accents, case, punctuation and word order removed). Signatures are cut
+into LSH bands; each band, plus a hash of each email address and phone number
+found, becomes a key in ``dedup_buckets``. Accounts sharing a key are
+candidate pairs, so a lookup touches a few buckets instead of every account.
+Candidate pairs are then checked on their estimated similarities and flagged
+in ``duplicate_candidates`` when
+
+- the resumes are near-identical (``RESUME_THRESHOLD``), or
+- they share an email address or phone number, or
+- the names match (``NAME_THRESHOLD``) and the resumes are related
+  (``RELATED_RESUME_THRESHOLD``).
+
+Only accounts of the same organization are paired: the same person applying
+to two client companies is not a duplicate.
+
+``index_candidate`` runs after each resume upload; ``scan_all`` rebuilds the
+index from every candidate's latest resume and checks all bucket pairs.
+
+    python dedup.py scan
+"""
+
+import hashlib
+import logging
+import re
+import sys
+import unicodedata
+from datetime import datetime
+from itertools import chain, combinations
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from cache import get_cache
+from database import SessionLocal
+from models import (
+    Application, ArchivedApplication, CandidateSignature, DedupBucket, DuplicateCandidate, User, UserRole
+)
+
+logger = logging.getLogger(__name__)
+
+# 32 bands of 4 rows: pairs with resume similarity 0.5 share a band with
+# probability 0.87, at 0.8 almost surely, at 0.2 only 5% of the time.
+RESUME_PERMUTATIONS = 128
+RESUME_BANDS = 32
+NAME_PERMUTATIONS = 32
+NAME_BANDS = 8
+SHINGLE_WORDS = 3
+
+RESUME_THRESHOLD = 0.8
+RELATED_RESUME_THRESHOLD = 0.5
+NAME_THRESHOLD = 0.8
+
+# Buckets this large (a very common name) would produce too many pairs to
+# be useful evidence; batch scans skip them.
+MAX_BUCKET_SIZE = 50
+
+WORD_RE = re.compile(r"\w+")
+_PRIME = (1 << 61) - 1
+
+
+def _permutations(count: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.RandomState(seed)
+    # a * x + b stays below 2**64 for 32-bit x, so uint64 arithmetic is exact.
+    a = rng.randint(1, 1 << 31, count, dtype=np.uint64)
+    b = rng.randint(0, 1 << 31, count, dtype=np.uint64)
+    return a, b
+
+
+_RESUME = _permutations(RESUME_PERMUTATIONS, 1)
+_NAME = _permutations(NAME_PERMUTATIONS, 2)
+
+
+def _hash32(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=4).digest(), "little")
+
+
+def minhash(tokens: Iterable[str], permutations: Tuple[np.ndarray, np.ndarray]) -> Optional[np.ndarray]:
+    """MinHash signature (uint32 array) of a token set, or None if it is empty"""
+    hashes = np.fromiter({_hash32(token) for token in tokens}, dtype=np.uint64)
+    if not hashes.size:
+        return None
+    a, b = permutations
+    values = (np.outer(hashes, a) + b) % _PRIME
+    return (values & 0xFFFFFFFF).min(axis=0).astype(np.uint32)
+
+
+def similarity(first: Optional[np.ndarray], second: Optional[np.ndarray]) -> float:
+    """Estimated Jaccard similarity of the sets behind two signatures"""
+    if first is None or second is None:
+        return 0.0
+    return float(np.mean(first == second))
+
+
+def normalize_name(name: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    letters = "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+    return " ".join(sorted(WORD_RE.findall(letters)))
+
+
+def name_tokens(name: str) -> Set[str]:
+    padded = f" {normalize_name(name)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)} if padded.strip() else set()
+
+
+def resume_tokens(profile: Optional[Dict[str, Any]]) -> Set[str]:
+    sections = (profile or {}).get("sections") or {}
+    words = WORD_RE.findall("\n".join(sections.values()).lower())
+    if len(words) < SHINGLE_WORDS:
+        return set(words)
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def contact_keys(email: Optional[str], profile: Optional[Dict[str, Any]]) -> List[str]:
+    """Hashed, normalized emails and phone numbers of a candidate"""
+    values = set()
+    for address in (email, (profile or {}).get("email")):
+        if address:
+            values.add(address.strip().lower())
+    digits = re.sub(r"\D", "", (profile or {}).get("phone") or "")
+    if len(digits) >= 7:
+        values.add(digits[-10:])
+    return sorted("c:" + hashlib.sha1(value.encode()).hexdigest()[:16] for value in values)
+
+
+def _band_keys(prefix: str, signature: Optional[np.ndarray], bands: int) -> List[str]:
+    if signature is None:
+        return []
+    return [
+        f"{prefix}{band}:{hashlib.blake2b(rows.tobytes(), digest_size=8).hexdigest()}"
+        for band, rows in enumerate(np.split(signature, bands))
+    ]
+
+
+class Signature:
+    """A candidate's signatures, decoded"""
+    __slots__ = ("user_id", "resume", "name", "contacts")
+
+    def __init__(self, user_id: int, resume: Optional[np.ndarray], name: Optional[np.ndarray], contacts: List[str]):
+        self.user_id = user_id
+        self.resume = resume
+        self.name = name
+        self.contacts = contacts
+
+    @classmethod
+    def from_row(cls, row: CandidateSignature) -> "Signature":
+        decode = lambda data: None if data is None else np.frombuffer(data, dtype=np.uint32)
+        return cls(row.user_id, decode(row.resume_signature), decode(row.name_signature), row.contacts or [])
+
+    def keys(self) -> List[str]:
+        return _band_keys("r", self.resume, RESUME_BANDS) + _band_keys("n", self.name, NAME_BANDS) + self.contacts
+
+
+def compute_signature(user_id: int, full_name: str, email: Optional[str],
+                      profile: Optional[Dict[str, Any]]) -> Signature:
+    return Signature(
+        user_id,
+        minhash(resume_tokens(profile), _RESUME),
+        minhash(name_tokens(full_name), _NAME),
+        contact_keys(email, profile),
+    )
+
+
+def compare(first: Signature, second: Signature) -> Optional[Tuple[float, float, List[str]]]:
+    """``(resume similarity, name similarity, reasons)`` if the pair looks like one person"""
+    resume = similarity(first.resume, second.resume)
+    name = similarity(first.name, second.name)
+    reasons = []
+    if resume >= RESUME_THRESHOLD:
+        reasons.append("similar_resume")
+    if set(first.contacts) & set(second.contacts):
+        reasons.append("same_contact")
+    if name >= NAME_THRESHOLD and (reasons or resume >= RELATED_RESUME_THRESHOLD):
+        reasons.append("similar_name")
+    if not reasons:
+        return None
+    return round(resume, 3), round(name, 3), reasons
+
+
+def _signature_row(signature: Signature, resume_hash: Optional[str]) -> Dict[str, Any]:
+    encode = lambda array: None if array is None else array.tobytes()
+    return {
+        "user_id": signature.user_id,
+        "resume_hash": resume_hash,
+        "resume_signature": encode(signature.resume),
+        "name_signature": encode(signature.name),
+        "contacts": signature.contacts,
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def _store_signature(db, signature: Signature, resume_hash: Optional[str]):
+    db.merge(CandidateSignature(**_signature_row(signature, resume_hash)))
+    db.query(DedupBucket).filter(DedupBucket.user_id == signature.user_id).delete(synchronize_session=False)
+    db.add_all(DedupBucket(key=key, user_id=signature.user_id) for key in set(signature.keys()))
+
+
+def _flag(db, first: int, second: int, result: Tuple[float, float, List[str]]) -> bool:
+    """Record a flagged pair; False if it was already flagged"""
+    user_id, duplicate_user_id = sorted((first, second))
+    existing = db.query(DuplicateCandidate).filter(
+        DuplicateCandidate.user_id == user_id,
+        DuplicateCandidate.duplicate_user_id == duplicate_user_id
+    ).first()
+    resume, name, reasons = result
+    if existing is not None:
+        existing.resume_similarity, existing.name_similarity, existing.reasons = resume, name, reasons
+        return False
+    db.add(DuplicateCandidate(
+        user_id=user_id, duplicate_user_id=duplicate_user_id,
+        resume_similarity=resume, name_similarity=name, reasons=reasons
+    ))
+    return True
+
+
+def index_candidate(user_id: int, profile: Optional[Dict[str, Any]], resume_hash: Optional[str] = None) -> int:
+    """Index a candidate's latest resume and flag the accounts it duplicates; return new flags"""
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        stored = db.get(CandidateSignature, user_id)
+        if user is None or (stored is not None and resume_hash is not None and stored.resume_hash == resume_hash):
+            return 0
+        signature = compute_signature(user_id, user.full_name, user.email, profile)
+        # Publish our buckets before looking, so of two concurrent duplicate
+        # uploads at least the second one sees the first.
+        _store_signature(db, signature, resume_hash)
+        db.commit()
+
+        keys = signature.keys()
+        others = [row for (row,) in db.query(DedupBucket.user_id).filter(
+            DedupBucket.key.in_(keys), DedupBucket.user_id != user_id
+        ).distinct()]
+        flagged = 0
+        # Accounts in other organizations are separate applications, not duplicates
+        same_organization = db.query(CandidateSignature).join(User, User.id == CandidateSignature.user_id).filter(
+            CandidateSignature.user_id.in_(others),
+            User.organization_id.is_not_distinct_from(user.organization_id)
+        )
+        for row in same_organization if others else []:
+            result = compare(signature, Signature.from_row(row))
+            if result is not None:
+                flagged += _flag(db, user_id, row.user_id, result)
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent upload of the other account flagged the pair first.
+            db.rollback()
+        if flagged:
+            logger.info("Candidate %s flagged as a possible duplicate of %d accounts", user_id, flagged)
+        return flagged
+    finally:
+        db.close()
+
+
+def _latest_resumes(db) -> Dict[int, Tuple[datetime, Optional[str], Optional[Dict[str, Any]]]]:
+    """candidate id -> (applied_at, resume hash, profile) of their latest parsed resume"""
+    latest: Dict[int, Tuple[datetime, Optional[str], Optional[Dict[str, Any]]]] = {}
+    for model in (ArchivedApplication, Application):
+        rows = db.query(model.candidate_id, model.applied_at, model.resume_hash, model.parsed_profile).filter(
+            model.parsed_profile.isnot(None)
+        ).yield_per(1000)
+        for candidate_id, applied_at, resume_hash, profile in rows:
+            current = latest.get(candidate_id)
+            if current is None or (applied_at or datetime.min) >= current[0]:
+                latest[candidate_id] = (applied_at or datetime.min, resume_hash, profile)
+    return latest
+
+
+def scan_all() -> Dict[str, int]:
+    """Rebuild signatures and buckets for every candidate and flag all duplicate pairs"""
+    with get_cache().lock("dedup-scan", timeout=3600, blocking_timeout=0):
+        db = SessionLocal()
+        try:
+            latest = _latest_resumes(db)
+            signatures: Dict[int, Signature] = {}
+            resume_signatures: Dict[str, Optional[np.ndarray]] = {}
+            users = db.query(User.id, User.full_name, User.email, User.organization_id).filter(
+                User.role == UserRole.CANDIDATE
+            ).all()
+            organizations = {user_id: organization_id for user_id, _, _, organization_id in users}
+            for user_id, full_name, email, _ in users:
+                _, resume_hash, profile = latest.get(user_id, (None, None, None))
+                # The same file is often sent to several jobs: hash it once.
+                if resume_hash is not None and resume_hash in resume_signatures:
+                    resume_signature = resume_signatures[resume_hash]
+                else:
+                    resume_signature = minhash(resume_tokens(profile), _RESUME)
+                    if resume_hash is not None:
+                        resume_signatures[resume_hash] = resume_signature
+                signatures[user_id] = Signature(
+                    user_id, resume_signature, minhash(name_tokens(full_name), _NAME), contact_keys(email, profile)
+                )
+
+            db.query(DedupBucket).delete(synchronize_session=False)
+            db.query(CandidateSignature).delete(synchronize_session=False)
+            if signatures:
+                db.execute(insert(CandidateSignature), [
+                    _signature_row(signature, latest.get(user_id, (None, None))[1])
+                    for user_id, signature in signatures.items()
+                ])
+                db.execute(insert(DedupBucket), [
+                    {"key": key, "user_id": user_id}
+                    for user_id, signature in signatures.items() for key in set(signature.keys())
+                ])
+
+            # Every bucket with several members yields candidate pairs.
+            pairs: Set[Tuple[int, int]] = set()
+            skipped = 0
+            members: List[int] = []
+            last_key = None
+            buckets = db.query(DedupBucket.key, DedupBucket.user_id).order_by(DedupBucket.key).yield_per(5000)
+            for key, user_id in chain(buckets, [(None, None)]):
+                if key != last_key:
+                    if len(members) > MAX_BUCKET_SIZE:
+                        skipped += 1
+                    elif len(members) > 1:
+                        pairs.update(combinations(sorted(members), 2))
+                    members, last_key = [], key
+                members.append(user_id)
+
+            existing = {(row.user_id, row.duplicate_user_id): row for row in db.query(DuplicateCandidate)}
+            flagged = 0
+            for pair in pairs:
+                if organizations[pair[0]] != organizations[pair[1]]:
+                    continue
+                result = compare(signatures[pair[0]], signatures[pair[1]])
+                if result is None:
+                    continue
+                resume, name, reasons = result
+                row = existing.get(pair)
+                if row is None:
+                    flagged += 1
+                    row = DuplicateCandidate(user_id=pair[0], duplicate_user_id=pair[1])
+                    db.add(row)
+                row.resume_similarity, row.name_similarity, row.reasons = resume, name, reasons
+            db.commit()
+        finally:
+            db.close()
+    if skipped:
+        logger.info("Skipped %d oversized dedup buckets", skipped)
+    return {"candidates": len(signatures), "pairs_checked": len(pairs), "new_flags": flagged}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "scan":
+        print(__doc__)
+        sys.exit(1)
+    print(scan_all())
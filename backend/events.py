@@ -0,0 +1,268 @@
+"""
+Transactional outbox and in-process event dispatch.
+
+State changes call ``record_event`` before committing, so the event row and
+the change it describes are written atomically. ``EventDispatcher`` tails the
+outbox table (waking immediately after local commits, polling to see other
+workers' commits) and fans new events out to in-process subscribers and to
+long-poll / SSE clients of ``/api/events``. Every shard (sharding.py) has its
+own outbox, tailed by its own ``EventDispatcher``; subscribers run in the
+shard's context, so the sessions they open are on the right database.
+
+Events are ordered by their autoincrement id. SQLite serialises writers, so
+ids become visible in order; on Postgres a consumer should allow for a
+late-committing lower id if it needs strict completeness.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from cache import LockTimeout, get_cache
+from database import SessionLocal
+from models import Application, OutboxEvent
+from settings import get_settings
+from sharding import DEFAULT_SHARD, current_shard, shards
+
+logger = logging.getLogger(__name__)
+
+FETCH_BATCH = 500
+
+
+def record_event(db: Session, event_type: str, aggregate_type: str, aggregate_id: int, **payload):
+    db.add(OutboxEvent(
+        event_type=event_type,
+        aggregate_type=aggregate_type,
+        aggregate_id=aggregate_id,
+        payload=payload
+    ))
+    db.info["outbox_dirty"] = True
+
+
+def record_status_change(db: Session, application: Application, old_status, new_status):
+    record_event(
+        db, "application.status_changed", "application", application.id,
+        job_id=application.job_id,
+        candidate_id=application.candidate_id,
+        old_status=getattr(old_status, "value", old_status),
+        new_status=getattr(new_status, "value", new_status)
+    )
+
+
+def serialize(outbox_event: OutboxEvent) -> Dict[str, Any]:
+    return {
+        "id": outbox_event.id,
+        "type": outbox_event.event_type,
+        "aggregate_type": outbox_event.aggregate_type,
+        "aggregate_id": outbox_event.aggregate_id,
+        "payload": outbox_event.payload,
+        "created_at": outbox_event.created_at.isoformat() if outbox_event.created_at else None
+    }
+
+
+def fetch_events(after: int, limit: int = FETCH_BATCH, event_types: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        query = db.query(OutboxEvent).filter(OutboxEvent.id > after)
+        if event_types:
+            query = query.filter(OutboxEvent.event_type.in_(event_types))
+        return [serialize(e) for e in query.order_by(OutboxEvent.id).limit(limit).all()]
+    finally:
+        db.close()
+
+
+def fetch_page(after: int, limit: int, event_types: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """Events after ``after`` and the cursor to continue from.
+
+    With ``event_types``, the cursor moves past every event scanned, matching
+    or not, so a filtered reader does not rescan (or wake up for) the others.
+    """
+    db = SessionLocal()
+    try:
+        # Read first: every event up to `latest` is visible to the query below
+        latest = db.query(func.max(OutboxEvent.id)).scalar() or 0
+        query = db.query(OutboxEvent).filter(OutboxEvent.id > after)
+        if event_types:
+            query = query.filter(OutboxEvent.event_type.in_(event_types))
+        events = [serialize(e) for e in query.order_by(OutboxEvent.id).limit(limit).all()]
+    finally:
+        db.close()
+    if len(events) == limit:
+        return events, events[-1]["id"]
+    return events, max([after, latest] + [e["id"] for e in events[-1:]])
+
+
+def latest_event_id() -> int:
+    db = SessionLocal()
+    try:
+        return db.query(func.max(OutboxEvent.id)).scalar() or 0
+    finally:
+        db.close()
+
+
+def prune_events(older_than: timedelta) -> int:
+    db = SessionLocal()
+    try:
+        deleted = db.query(OutboxEvent).filter(
+            OutboxEvent.created_at < datetime.utcnow() - older_than
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+    finally:
+        db.close()
+
+
+Subscribers = Dict[str, List[Callable[[Dict[str, Any]], Any]]]
+
+
+class EventDispatcher:
+    def __init__(self, poll_interval: float, shard: str = DEFAULT_SHARD, subscribers: Optional[Subscribers] = None):
+        self.poll_interval = poll_interval
+        self.shard = shard
+        self.last_id = 0
+        self._subscribers: Subscribers = {} if subscribers is None else subscribers
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._new_events: Optional[asyncio.Condition] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_prune: Optional[datetime] = None
+
+    def subscribe(self, event_type: str, callback: Callable[[Dict[str, Any]], Any]):
+        """Call ``callback(event)`` for each new event of ``event_type`` ("*" for all)"""
+        self._subscribers.setdefault(event_type, []).append(callback)
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._new_events = asyncio.Condition()
+        # Subscribers see changes from now on; history is served by /api/events.
+        token = current_shard.set(self.shard)
+        try:
+            self.last_id = await asyncio.to_thread(latest_event_id)
+            # The task copies the context, so everything it runs is on this shard
+            self._task = asyncio.create_task(self._run())
+        finally:
+            current_shard.reset(token)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self):
+        """Wake the dispatcher; safe to call from any thread"""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def wait_for_events(self, after: int, timeout: float) -> bool:
+        """Wait until an event newer than ``after`` exists; False on timeout"""
+        if self._new_events is None:
+            await asyncio.sleep(timeout)
+            return False
+        async with self._new_events:
+            try:
+                await asyncio.wait_for(self._new_events.wait_for(lambda: self.last_id > after), timeout)
+                return True
+            except asyncio.TimeoutError:
+                return False
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self._poll()
+                await self._maybe_prune()
+            except Exception:
+                logger.exception("Event dispatch failed")
+
+    async def _poll(self):
+        while True:
+            batch = await asyncio.to_thread(fetch_events, self.last_id)
+            if not batch:
+                return
+            for item in batch:
+                await self._dispatch(item)
+            self.last_id = batch[-1]["id"]
+            async with self._new_events:
+                self._new_events.notify_all()
+            if len(batch) < FETCH_BATCH:
+                return
+
+    async def _dispatch(self, item: Dict[str, Any]):
+        for callback in self._subscribers.get(item["type"], []) + self._subscribers.get("*", []):
+            try:
+                result = callback(item)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception:
+                logger.exception("Event subscriber %r failed on event %s", callback, item["id"])
+
+    async def _maybe_prune(self):
+        now = datetime.utcnow()
+        if self._last_prune is not None and now - self._last_prune < timedelta(hours=1):
+            return
+        self._last_prune = now
+        retention = timedelta(days=get_settings().event_retention_days)
+        try:
+            # One worker prunes; the others skip.
+            with get_cache().lock("outbox-prune", timeout=300, blocking_timeout=0):
+                deleted = await asyncio.to_thread(prune_events, retention)
+                if deleted:
+                    logger.info("Pruned %d outbox events", deleted)
+        except LockTimeout:
+            pass
+
+
+class ShardedEventDispatcher:
+    """An ``EventDispatcher`` per shard, sharing one set of subscribers"""
+
+    def __init__(self, poll_interval: float, shard_names: List[str]):
+        self._subscribers: Subscribers = {}
+        self.dispatchers = {
+            name: EventDispatcher(poll_interval, name, self._subscribers) for name in shard_names
+        }
+
+    def subscribe(self, event_type: str, callback: Callable[[Dict[str, Any]], Any]):
+        """Call ``callback(event)`` for each new event of ``event_type`` ("*" for all) on any shard"""
+        self._subscribers.setdefault(event_type, []).append(callback)
+
+    async def start(self):
+        for dispatcher in self.dispatchers.values():
+            await dispatcher.start()
+
+    async def stop(self):
+        for dispatcher in self.dispatchers.values():
+            await dispatcher.stop()
+
+    def notify(self, shard: str = DEFAULT_SHARD):
+        self.dispatchers[shard].notify()
+
+    async def wait_for_events(self, after: int, timeout: float) -> bool:
+        """Wait for an event newer than ``after`` on the current shard"""
+        return await self.dispatchers[current_shard.get()].wait_for_events(after, timeout)
+
+
+dispatcher = ShardedEventDispatcher(get_settings().event_poll_interval, shards.names())
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_dispatcher(session):
+    if session.info.pop("outbox_dirty", False):
+        dispatcher.notify(session.info.get("shard", DEFAULT_SHARD))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_outbox_flag(session):
+    session.info.pop("outbox_dirty", None)
@@ -0,0 +1,276 @@
+"""
+Spreadsheet exports of a job's applicants, streamed.
+
+Rows are read with ``yield_per`` (a server-side cursor on Postgres) and
+encoded as they arrive, so memory stays flat however many applicants a job
+has, and the download starts before the last row is read.
+
+- CSV: UTF-8 with a BOM so Excel detects the encoding; text that Excel would
+  run as a formula is prefixed with ``'``.
+- XLSX: SpreadsheetML written straight into a zip stream. Cells hold inline
+  strings (no shared-strings table to build up front) and the zip records
+  sizes after each entry, so nothing needs a seekable file or a third-party
+  library.
+"""
+
+import csv
+import io
+import re
+import zipfile
+from datetime import datetime
+from typing import Any, Iterable, Iterator, List, NamedTuple
+from xml.sax.saxutils import escape
+
+from sqlalchemy.orm import Session
+
+from models import Application, ArchivedApplication, ArchivedInterview, Interview, User
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+FETCH_BATCH = 1000
+# Bytes of output buffered before a chunk is sent.
+CHUNK_SIZE = 64 * 1024
+
+# Same dimensions as analytics.DIMENSIONS (not imported: analytics loads pyarrow).
+DIMENSIONS = ["technical_score", "communication_score", "problem_solving_score"]
+
+
+class ExportColumn(NamedTuple):
+    header: str
+    width: float  # XLSX column width, in characters
+
+
+COLUMNS = [
+    ExportColumn("Application ID", 14),
+    ExportColumn("Candidate", 24),
+    ExportColumn("Email", 30),
+    ExportColumn("Status", 13),
+    ExportColumn("Applied At", 17),
+    ExportColumn("Interview Status", 16),
+    ExportColumn("Interview Score", 15),
+    ExportColumn("Interview Completed At", 22),
+] + [ExportColumn(dimension.replace("_", " ").title(), 16) for dimension in DIMENSIONS] + [
+    ExportColumn("Recommendation", 24),
+    ExportColumn("Strengths", 40),
+    ExportColumn("Areas For Improvement", 40),
+    ExportColumn("Overall Assessment", 40),
+    ExportColumn("Archived", 10),
+]
+
+
+def _query(db: Session, job_id: int, application_model, interview_model):
+    return db.query(
+        application_model.id,
+        User.full_name,
+        User.email,
+        application_model.status,
+        application_model.applied_at,
+        interview_model.status,
+        interview_model.score,
+        interview_model.completed_at,
+        interview_model.ai_analysis,
+    ).join(
+        User, User.id == application_model.candidate_id
+    ).outerjoin(
+        interview_model, interview_model.application_id == application_model.id
+    ).filter(
+        application_model.job_id == job_id
+    ).order_by(application_model.id).yield_per(FETCH_BATCH)
+
+
+def applicant_rows(db: Session, job_id: int, include_archived: bool = False) -> Iterator[List[Any]]:
+    """One list of ``COLUMNS`` values per application to the job (archived ones first), by id"""
+    queries = [(_query(db, job_id, Application, Interview), False)]
+    if include_archived:
+        queries.insert(0, (_query(db, job_id, ArchivedApplication, ArchivedInterview), True))
+    for query, archived in queries:
+        for (application_id, name, email, status, applied_at,
+             interview_status, score, completed_at, analysis) in query:
+            analysis = analysis or {}
+            yield [
+                application_id, name, email, getattr(status, "value", status), applied_at,
+                interview_status, score, completed_at,
+                *[analysis.get(dimension) for dimension in DIMENSIONS],
+                analysis.get("recommendation"),
+                "; ".join(analysis.get("strengths") or []) or None,
+                "; ".join(analysis.get("areas_for_improvement") or []) or None,
+                analysis.get("overall_assessment"),
+                archived,
+            ]
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, str) and value[:1] in ("=", "+", "-", "@", "\t", "\r"):
+        return "'" + value
+    return value
+
+
+def stream_csv(rows: Iterable[List[Any]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow([column.header for column in COLUMNS])
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+# -- XLSX --------------------------------------------------------------------
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Applicants" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+# Cell styles: 0 = default, 1 = date and time, 2 = bold (header).
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+_EPOCH = datetime(1899, 12, 30)
+# Characters XML 1.0 does not allow, even escaped.
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+_LETTERS = [_column_letter(i) for i in range(len(COLUMNS))]
+
+
+def _cell(ref: str, value: Any, style: int = 0) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    if isinstance(value, datetime):
+        return f'<c r="{ref}" s="1"><v>{(value - _EPOCH).total_seconds() / 86400:.8f}</v></c>'
+    text = escape(_INVALID_XML.sub("", str(value)))
+    style_attribute = f' s="{style}"' if style else ""
+    return f'<c r="{ref}" t="inlineStr"{style_attribute}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row(number: int, values: List[Any], style: int = 0) -> str:
+    cells = "".join(_cell(f"{letter}{number}", value, style) for letter, value in zip(_LETTERS, values))
+    return f'<row r="{number}">{cells}</row>'
+
+
+class _Sink(io.RawIOBase):
+    """Write-only, unseekable file that hands out what was written since the last ``take``"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
+def stream_xlsx(rows: Iterable[List[Any]]) -> Iterator[bytes]:
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in [("[Content_Types].xml", _CONTENT_TYPES), ("_rels/.rels", _ROOT_RELS),
+                              ("xl/workbook.xml", _WORKBOOK), ("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS),
+                              ("xl/styles.xml", _STYLES)]:
+            archive.writestr(name, content)
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            columns = "".join(
+                f'<col min="{i}" max="{i}" width="{column.width}" customWidth="1"/>'
+                for i, column in enumerate(COLUMNS, start=1)
+            )
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" '
+                'activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>'
+                f'<cols>{columns}</cols><sheetData>'
+                + _row(1, [column.header for column in COLUMNS], style=2)
+            ).encode())
+            for number, row in enumerate(rows, start=2):
+                sheet.write(_row(number, row).encode())
+                if sink.size >= CHUNK_SIZE:
+                    yield sink.take()
+            sheet.write(b"</sheetData></worksheet>")
+    yield sink.take()
+
+
+def export_applicants(db: Session, job_id: int, file_format: str, include_archived: bool = False) -> Iterator[bytes]:
+    """Encoded chunks of the job's applicant spreadsheet; closes ``db`` when done"""
+    try:
+        rows = applicant_rows(db, job_id, include_archived)
+        yield from (stream_xlsx(rows) if file_format == "xlsx" else stream_csv(rows))
+    finally:
+        db.close()
@@ -0,0 +1,43 @@
+"""
+Gunicorn settings for production.
+
+    gunicorn -c gunicorn_conf.py main:app
+
+Every value can be overridden through the environment.
+"""
+
+import multiprocessing
+import os
+
+# Scheduler leases, locks, rate limits and live interview sessions live in the
+# cache, so every worker must see the same one. Set before workers import
+# settings.
+os.environ.setdefault("CACHE_BACKEND", "sqlite")
+
+bind = os.getenv("BIND", f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+# Uvicorn workers that stop waiting for in-flight requests after DRAIN_TIMEOUT
+worker_class = "lifecycle.Worker"
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+# Time a worker gets to finish after SIGTERM: draining in-flight requests
+# (DRAIN_TIMEOUT, keep it lower) and then its shutdown hooks.
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+# Recycle workers periodically; jitter keeps them from restarting together.
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+accesslog = os.getenv("ACCESS_LOG", "-") or None
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    # Runs once in the master before any worker is forked.
+    from database import init_db
+    from settings import get_settings
+    from sharding import shards
+
+    if server.cfg.workers > 1 and get_settings().cache_backend == "memory":
+        raise RuntimeError("CACHE_BACKEND=memory is per process; use sqlite with more than one worker")
+    init_db()
+    # Don't hand the master's pooled connections down to forked workers.
+    shards.dispose()
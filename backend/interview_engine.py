@@ -0,0 +1,276 @@
+"""
+Adaptive interview engine (DESIGN_DOCUMENT.md §8.1).
+
+Each interview follows a topic plan (``PLAN``). For every slot the engine asks
+the not-yet-asked item of that topic whose difficulty (1 = easiest,
+5 = hardest) is closest to the candidate's ability estimate. The estimate
+starts at moderate difficulty (§3.3) and moves after every answer by how much
+better or worse the answer was rated than expected at that difficulty.
+
+Item banks are compiled once per job (generic items plus items for the skills
+the job asks for) into per-(topic, level) buckets with a precomputed
+nearest-level search order, so choosing a question is a few list lookups.
+Session state is a small ``__slots__`` object kept in memory per worker and
+checkpointed to ``Interview.engine_state`` whenever the interview row is
+written anyway (every REST answer; every answer-writer flush for live
+sessions). A worker that does not hold the latest state restores it from the
+checkpoint.
+"""
+
+import math
+import random
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from database import SessionLocal
+from models import Job
+from sharding import current_shard
+from startup import lazy_import
+
+scoring = lazy_import("scoring")
+resume_parser = lazy_import("resume_parser")
+
+CHECKPOINT_VERSION = 1
+
+LEVELS = range(1, 6)
+START_ABILITY = 3.0
+# How far one answer can move the ability estimate (an Elo K-factor).
+ABILITY_STEP = 1.2
+
+PLAN = ("technical", "behavioral", "technical", "scenario", "technical", "general")
+FALLBACK_TOPICS = ("technical", "behavioral", "general")
+
+MAX_JOB_SKILLS = 6
+MAX_BANKS = 1024
+MAX_SESSIONS = 50_000
+
+GENERIC_ITEMS = {
+    "technical": {
+        1: ["Tell me about the programming languages and tools you use most.",
+            "How do you approach learning a new technology?"],
+        2: ["How do you test your code before shipping it?",
+            "Tell me about a bug you tracked down recently and how you found it."],
+        3: ["Walk me through the architecture of a system you built.",
+            "How do you decide when code needs refactoring, and how do you do it safely?"],
+        4: ["How would you diagnose a service whose latency doubled after a deploy?",
+            "Describe a trade-off between consistency and availability you have had to make."],
+        5: ["How would you design an API that handles 10,000 requests per second while keeping data consistent?",
+            "Tell me about the hardest performance or scaling problem you have solved end to end."],
+    },
+    "behavioral": {
+        1: ["Describe your experience working in a team environment."],
+        2: ["Tell me about a time you received critical feedback. What did you do with it?"],
+        3: ["Describe a challenging project you worked on and how you overcame obstacles."],
+        4: ["Tell me about a conflict within your team that you helped resolve."],
+        5: ["Describe a time you had to push back on a decision from leadership. How did it play out?"],
+    },
+    "scenario": {
+        2: ["A teammate's pull request works but is hard to read. How do you handle the review?"],
+        3: ["A production incident happens an hour before a release. Walk me through your next steps."],
+        4: ["You inherit a legacy service with no tests that must change next week. How do you proceed?"],
+        5: ["How would you migrate a monolithic application to services without downtime?"],
+    },
+    "general": {
+        1: ["What interests you about this position?"],
+        2: ["How do you stay updated with new technologies?"],
+        3: ["Where do you want to grow technically over the next two years?"],
+    },
+}
+
+SKILL_TEMPLATES = {
+    1: "What have you built with {skill}?",
+    2: "What are common mistakes people make with {skill}, and how do you avoid them?",
+    3: "Describe a non-trivial problem you solved using {skill}.",
+    4: "How do you debug and profile performance problems in {skill}?",
+    5: "Which limitations or internals of {skill} shaped a design decision you made?",
+}
+
+
+class Item(NamedTuple):
+    id: int
+    topic: str
+    difficulty: int
+    text: str
+    skill: Optional[str]
+
+    def as_question(self) -> Dict[str, Any]:
+        question = {"id": self.id, "text": self.text, "type": self.topic, "difficulty": self.difficulty}
+        if self.skill:
+            question["skill"] = self.skill
+        return question
+
+
+class ItemBank:
+    def __init__(self, items: List[Item]):
+        self.items = items
+        topics = {item.topic for item in items}
+        # topic -> level -> item indexes (level 0 unused)
+        self.buckets: Dict[str, List[List[int]]] = {topic: [[] for _ in range(6)] for topic in topics}
+        for index, item in enumerate(items):
+            self.buckets[item.topic][item.difficulty].append(index)
+        # topic -> target level -> non-empty levels, nearest first (easier wins ties)
+        self.search_order: Dict[str, List[Tuple[int, ...]]] = {}
+        for topic, levels in self.buckets.items():
+            present = [level for level in LEVELS if levels[level]]
+            self.search_order[topic] = [()] + [
+                tuple(sorted(present, key=lambda level: (abs(level - target), level))) for target in LEVELS
+            ]
+
+    def select(self, topic: str, target: int, asked: int, offset: int) -> Optional[int]:
+        """Index of the unasked item of ``topic`` nearest to level ``target``, or None"""
+        for level in self.search_order.get(topic, ((),) * 6)[target]:
+            bucket = self.buckets[topic][level]
+            size = len(bucket)
+            for k in range(size):
+                index = bucket[(offset + k) % size]
+                if not asked >> index & 1:
+                    return index
+        return None
+
+
+def build_bank(skills: List[str]) -> ItemBank:
+    items: List[Item] = []
+    for topic, levels in GENERIC_ITEMS.items():
+        for level, texts in levels.items():
+            for text in texts:
+                items.append(Item(len(items) + 1, topic, level, text, None))
+    for skill in skills[:MAX_JOB_SKILLS]:
+        for level, template in SKILL_TEMPLATES.items():
+            items.append(Item(len(items) + 1, "technical", level, template.format(skill=skill), skill))
+    return ItemBank(items)
+
+
+class EngineState:
+    """Per-interview state: ~100 bytes plus one float per answer"""
+    __slots__ = ("job_id", "seed", "ability", "asked", "count", "ratings")
+
+    def __init__(self, job_id: int, seed: int, ability: float = START_ABILITY, asked: int = 0,
+                 count: int = 0, ratings: Optional[List[float]] = None):
+        self.job_id = job_id
+        self.seed = seed
+        self.ability = ability
+        self.asked = asked  # bitmask of asked item indexes
+        self.count = count  # questions asked so far
+        self.ratings = ratings if ratings is not None else []
+
+    def checkpoint(self) -> Dict[str, Any]:
+        asked = self.asked
+        return {
+            "version": CHECKPOINT_VERSION,
+            "job_id": self.job_id,
+            "seed": self.seed,
+            "ability": round(self.ability, 4),
+            "asked": [index for index in range(asked.bit_length()) if asked >> index & 1],
+            "count": self.count,
+            "ratings": self.ratings,
+            "total": len(PLAN),
+        }
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint: Dict[str, Any]) -> "EngineState":
+        asked = 0
+        for index in checkpoint["asked"]:
+            asked |= 1 << index
+        return cls(checkpoint["job_id"], checkpoint["seed"], checkpoint["ability"], asked,
+                   checkpoint["count"], list(checkpoint["ratings"]))
+
+    def update(self, difficulty: int, rating: float):
+        expected = 1 / (1 + math.exp(difficulty - self.ability))
+        self.ability = min(5.0, max(1.0, self.ability + ABILITY_STEP * (rating - expected)))
+        self.ratings.append(round(rating, 3))
+
+
+# Keyed by (shard, id): job and interview ids repeat across shards.
+_banks: "OrderedDict[Tuple[str, int], ItemBank]" = OrderedDict()
+_sessions: "OrderedDict[Tuple[str, int], EngineState]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def warm_up():
+    build_bank([])
+
+
+def get_bank(job_id: int) -> ItemBank:
+    key = (current_shard.get(), job_id)
+    with _lock:
+        bank = _banks.get(key)
+        if bank is not None:
+            _banks.move_to_end(key)
+            return bank
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        text = " ".join(filter(None, [job.title, job.description, job.requirements])) if job else ""
+    finally:
+        db.close()
+    bank = build_bank(resume_parser.find_skills(text))
+    with _lock:
+        _banks[key] = bank
+        while len(_banks) > MAX_BANKS:
+            _banks.popitem(last=False)
+    return bank
+
+
+def is_adaptive(checkpoint: Optional[Dict[str, Any]]) -> bool:
+    """False for interviews created with a fixed question list"""
+    return bool(checkpoint) and checkpoint.get("version") == CHECKPOINT_VERSION
+
+
+def _pick(bank: ItemBank, state: EngineState) -> Optional[Dict[str, Any]]:
+    target = min(5, max(1, round(state.ability)))
+    offset = state.seed + state.count * 7919
+    topics = (PLAN[state.count],) + FALLBACK_TOPICS
+    for topic in topics:
+        index = bank.select(topic, target, state.asked, offset)
+        if index is not None:
+            state.asked |= 1 << index
+            state.count += 1
+            return bank.items[index].as_question()
+    return None
+
+
+def _remember(interview_id: int, state: EngineState):
+    key = (current_shard.get(), interview_id)
+    with _lock:
+        _sessions[key] = state
+        _sessions.move_to_end(key)
+        while len(_sessions) > MAX_SESSIONS:
+            _sessions.popitem(last=False)
+
+
+def _state_for(interview_id: int, checkpoint: Dict[str, Any], asked_count: int) -> EngineState:
+    with _lock:
+        state = _sessions.get((current_shard.get(), interview_id))
+    # The in-memory copy is stale if another worker (or a rolled back
+    # transaction) moved the interview on; the checkpoint is authoritative.
+    if state is None or state.count != asked_count or state.count != checkpoint["count"] \
+            or len(state.ratings) != len(checkpoint["ratings"]):
+        state = EngineState.from_checkpoint(checkpoint)
+        _remember(interview_id, state)
+    return state
+
+
+def start(job_id: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Return the first question and the initial checkpoint for a new interview"""
+    state = EngineState(job_id, random.getrandbits(32))
+    question = _pick(get_bank(job_id), state)
+    return question, state.checkpoint()
+
+
+def advance(interview_id: int, questions: List[Dict[str, Any]], checkpoint: Dict[str, Any],
+            answer: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """Rate the answer to the last question and choose the next one.
+
+    Returns ``(next question or None when the plan is finished, checkpoint)``.
+    Calling it again for an answer that was already rated does not rate it
+    twice.
+    """
+    state = _state_for(interview_id, checkpoint, len(questions))
+    if len(state.ratings) < state.count:
+        last = questions[-1]
+        state.update(last.get("difficulty", round(START_ABILITY)), scoring.rate_answer(last, answer))
+    question = None
+    if state.count < len(PLAN):
+        question = _pick(get_bank(state.job_id), state)
+    return question, state.checkpoint()
@@ -0,0 +1,234 @@
+"""
+Server-side state for live (WebSocket) interviews.
+
+A session is authenticated and loaded from the database once, then kept in
+the shared cache (``cache.get_cache``) for the rest of the interview, so each
+answer costs no authentication or ownership queries. Answers are persisted
+write-behind: ``AnswerWriter`` buffers them (and checkpoints of adaptively
+chosen questions) and writes everything pending in one transaction every ``answer_flush_interval`` seconds, when
+``answer_flush_batch`` answers are waiting, or when an interview completes or
+its socket closes.
+
+The cached session keeps every answer, including ones not yet written, so a
+reconnect to another worker re-queues whatever the previous worker had not
+flushed. Buffered writes remember the shard (sharding.py) they were made on.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Load, undefer_group
+
+from cache import get_cache
+from database import SessionLocal
+from models import Application, Interview
+from settings import get_settings
+from sharding import current_shard, using_shard
+
+logger = logging.getLogger(__name__)
+
+
+def _session_key(interview_id: int) -> str:
+    return f"interview:{interview_id}:session"
+
+
+def _persisted_key(interview_id: int) -> str:
+    return f"interview:{interview_id}:persisted"
+
+
+def _from_db(db, interview_id: int, candidate_id: int) -> Optional[Dict[str, Any]]:
+    row = db.query(Interview, Application).options(Load(Interview).undefer_group("transcript")).join(
+        Application, Application.id == Interview.application_id
+    ).filter(
+        Interview.id == interview_id,
+        Application.candidate_id == candidate_id
+    ).first()
+    if row is None:
+        return None
+    interview, application = row
+    return {
+        "interview_id": interview.id,
+        "application_id": application.id,
+        "candidate_id": candidate_id,
+        "questions": interview.questions or [],
+        "answers": interview.answers or [],
+        "engine_state": interview.engine_state,
+        "status": interview.status,
+        "pending_follow_up": None,
+    }
+
+
+def get_cached_session(interview_id: int) -> Optional[Dict[str, Any]]:
+    return get_cache().get(_session_key(interview_id))
+
+
+def load_session(db, interview_id: int, candidate_id: int) -> Optional[Dict[str, Any]]:
+    """Return the session for a candidate's interview, or None if it isn't theirs"""
+    session = get_cached_session(interview_id)
+    if session is not None:
+        if session["candidate_id"] != candidate_id:
+            return None
+        persisted = get_cache().get(_persisted_key(interview_id))
+        if persisted is not None and persisted < len(session["answers"]):
+            # A previous worker went away before flushing; write its tail now.
+            for position in range(persisted, len(session["answers"])):
+                answer_writer.add(interview_id, position, session["answers"][position])
+        if session.get("engine_state"):
+            # Likewise for adaptively chosen questions (rewriting them is harmless).
+            answer_writer.checkpoint(interview_id, session["questions"], session["engine_state"])
+        return session
+    session = _from_db(db, interview_id, candidate_id)
+    if session is not None:
+        save_session(session)
+        get_cache().set(_persisted_key(interview_id), len(session["answers"]), ex=get_settings().interview_session_ttl)
+    return session
+
+
+def save_session(session: Dict[str, Any]):
+    get_cache().set(_session_key(session["interview_id"]), session, ex=get_settings().interview_session_ttl)
+
+
+def invalidate(interview_id: int):
+    get_cache().delete(_session_key(interview_id))
+    get_cache().delete(_persisted_key(interview_id))
+
+
+class AnswerWriter:
+    """Write-behind buffer for interview answers.
+
+    Entries are upserts by position in the interview's answer list, so
+    writing the same answer twice (e.g. after a reconnect) is harmless and
+    a follow-up can amend an answer that was already flushed.
+    """
+
+    def __init__(self, flush_interval: float, batch_size: int):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        # Keyed by (shard, interview id)
+        self._pending: Dict[Tuple[str, int], Dict[int, Dict[str, Any]]] = {}
+        self._pending_count = 0
+        self._checkpoints: Dict[Tuple[str, int], Tuple[List[Dict[str, Any]], Dict[str, Any]]] = {}
+        self._mutex = threading.Lock()
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Flushing interview answers failed")
+
+    def add(self, interview_id: int, position: int, answer: Dict[str, Any]):
+        with self._mutex:
+            answers = self._pending.setdefault((current_shard.get(), interview_id), {})
+            if position not in answers:
+                self._pending_count += 1
+            answers[position] = answer
+            full = self._pending_count >= self.batch_size
+        if full and self._task is not None:
+            try:
+                asyncio.get_running_loop().create_task(self.flush())
+            except RuntimeError:
+                pass  # Not on the event loop; the periodic flush picks it up.
+
+    def checkpoint(self, interview_id: int, questions: List[Dict[str, Any]], engine_state: Dict[str, Any]):
+        """Write the interview's question list and engine state with the next flush"""
+        with self._mutex:
+            self._checkpoints[(current_shard.get(), interview_id)] = (questions, engine_state)
+
+    def _take(self, interview_id: Optional[int]):
+        with self._mutex:
+            if interview_id is None:
+                batch, self._pending, self._pending_count = self._pending, {}, 0
+                checkpoints, self._checkpoints = self._checkpoints, {}
+            else:
+                key = (current_shard.get(), interview_id)
+                answers = self._pending.pop(key, None)
+                batch = {key: answers} if answers else {}
+                self._pending_count -= len(answers or ())
+                checkpoint = self._checkpoints.pop(key, None)
+                checkpoints = {key: checkpoint} if checkpoint else {}
+        return batch, checkpoints
+
+    async def flush(self, interview_id: Optional[int] = None):
+        """Write pending answers (for one interview, or all of them)"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            batch, checkpoints = self._take(interview_id)
+            if not batch and not checkpoints:
+                return
+            try:
+                await asyncio.to_thread(self._write, batch, checkpoints)
+            except Exception:
+                # Put the batch back so the next flush retries it.
+                with self._mutex:
+                    for key, answers in batch.items():
+                        pending = self._pending.setdefault(key, {})
+                        for position, answer in answers.items():
+                            if position not in pending:
+                                pending[position] = answer
+                                self._pending_count += 1
+                    for key, checkpoint in checkpoints.items():
+                        self._checkpoints.setdefault(key, checkpoint)
+                raise
+
+    def _write(self, batch: Dict[Tuple[str, int], Dict[int, Dict[str, Any]]], checkpoints: Dict[Tuple[str, int], Tuple[List[Dict[str, Any]], Dict[str, Any]]]):
+        for shard in {shard for shard, _ in batch} | {shard for shard, _ in checkpoints}:
+            with using_shard(shard):
+                self._write_shard(
+                    {iid: answers for (s, iid), answers in batch.items() if s == shard},
+                    {iid: checkpoint for (s, iid), checkpoint in checkpoints.items() if s == shard}
+                )
+
+    def _write_shard(self, batch: Dict[int, Dict[int, Dict[str, Any]]], checkpoints: Dict[int, Tuple[List[Dict[str, Any]], Dict[str, Any]]]):
+        db = SessionLocal()
+        try:
+            persisted: List[Tuple[int, int]] = []
+            for interview in db.query(Interview).options(undefer_group("transcript")).filter(
+                Interview.id.in_(list(set(batch) | set(checkpoints)))
+            ).all():
+                if interview.id in checkpoints:
+                    questions, engine_state = checkpoints[interview.id]
+                    if len(questions) >= len(interview.questions or []):
+                        interview.questions = list(questions)
+                        interview.engine_state = engine_state
+                if interview.id not in batch:
+                    continue
+                answers = list(interview.answers or [])
+                for position, answer in sorted(batch[interview.id].items()):
+                    if position < len(answers):
+                        answers[position] = answer
+                    elif position == len(answers):
+                        answers.append(answer)
+                    else:
+                        logger.warning("Dropping out-of-order answer %s for interview %s", position, interview.id)
+                interview.answers = answers
+                persisted.append((interview.id, len(answers)))
+            db.commit()
+        finally:
+            db.close()
+        ttl = get_settings().interview_session_ttl
+        for iid, count in persisted:
+            get_cache().set(_persisted_key(iid), count, ex=ttl)
+
+
+answer_writer = AnswerWriter(get_settings().answer_flush_interval, get_settings().answer_flush_batch)
@@ -0,0 +1,70 @@
+"""
+Interview state transitions shared by the REST and WebSocket interview flows.
+
+Functions here mutate ORM objects but never commit, so callers can persist
+every side effect of a transition in one transaction.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from events import record_event, record_status_change
+from models import Application, ApplicationStatus, Interview
+from startup import lazy_import
+
+scoring = lazy_import("scoring")
+interview_engine = lazy_import("interview_engine")
+
+
+def total_questions(questions: List[Dict[str, Any]], engine_state: Optional[Dict[str, Any]]) -> int:
+    """Planned length of the interview (adaptive interviews grow one question at a time)"""
+    if engine_state and "total" in engine_state:
+        return max(engine_state["total"], len(questions))
+    return len(questions)
+
+
+def _answer_text(answer: Dict[str, Any]) -> str:
+    follow_up = answer.get("follow_up") or {}
+    return " ".join(filter(None, [answer.get("answer"), follow_up.get("answer")]))
+
+
+def next_question(
+    interview_id: int,
+    questions: List[Dict[str, Any]],
+    engine_state: Optional[Dict[str, Any]],
+    answers: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Return ``(questions, engine_state, next question)`` after the latest answer.
+
+    Adaptive interviews get their next question chosen (and appended to a
+    copy of ``questions``) once the current one is answered. No next question
+    means the interview is over.
+    """
+    if len(answers) < len(questions):
+        return questions, engine_state, questions[len(answers)]
+    if not interview_engine.is_adaptive(engine_state):
+        return questions, engine_state, None
+    question, engine_state = interview_engine.advance(interview_id, questions, engine_state, _answer_text(answers[-1]))
+    if question is not None:
+        questions = list(questions) + [question]
+    return questions, engine_state, question
+
+
+def finalize_interview(db: Session, interview: Interview, application: Application, answers: List[Dict[str, Any]]):
+    """Mark an interview completed and score it"""
+    interview.answers = answers
+    interview.status = "completed"
+    interview.completed_at = datetime.utcnow()
+    record_status_change(db, application, application.status, ApplicationStatus.COMPLETED)
+    application.status = ApplicationStatus.COMPLETED
+    interview.score, interview.ai_analysis = scoring.score_interview(interview.questions, answers)
+    application.score = interview.score
+    record_event(
+        db, "interview.completed", "interview", interview.id,
+        application_id=application.id,
+        job_id=application.job_id,
+        candidate_id=application.candidate_id,
+        score=interview.score
+    )
@@ -0,0 +1,144 @@
+"""
+Per-job candidate rankings.
+
+Each worker keeps a ranked list of scored applications for the jobs recently
+asked about, loaded once with an index scan of ``(job_id, score)`` and then
+kept current from ``interview.completed`` events (the outbox dispatcher
+delivers those from every worker, normally within ``event_poll_interval``).
+Rank is by score, highest first; ties go to the earlier application. Top-K
+and rank ranges cost O(log n + k), a candidate's rank and percentile
+O(log n). Boards are kept per shard (job ids repeat across shard databases).
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+
+from database import SessionLocal
+from models import Application
+from sharding import current_shard
+
+MAX_BOARDS = 256
+
+
+class JobLeaderboard:
+    def __init__(self, scores: List[Tuple[int, float]]):
+        # Entries are (-score, application_id) so the natural order is the ranking.
+        self._entries = SortedList((-score, application_id) for application_id, score in scores)
+        self._scores: Dict[int, float] = dict(scores)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def update(self, application_id: int, score: Optional[float]):
+        """Insert, move or (with ``score=None``) remove an application"""
+        old = self._scores.pop(application_id, None)
+        if old is not None:
+            self._entries.remove((-old, application_id))
+        if score is not None:
+            self._scores[application_id] = score
+            self._entries.add((-score, application_id))
+
+    def range(self, start: int, stop: int) -> List[Tuple[int, int, float]]:
+        """``(rank, application_id, score)`` for ranks ``start + 1`` .. ``stop``"""
+        return [
+            (start + offset + 1, application_id, -negative_score)
+            for offset, (negative_score, application_id) in enumerate(self._entries[start:stop])
+        ]
+
+    def top(self, k: int) -> List[Tuple[int, int, float]]:
+        return self.range(0, k)
+
+    def rank(self, application_id: int) -> Optional[int]:
+        """1-based rank, or None if the application has no score"""
+        score = self._scores.get(application_id)
+        if score is None:
+            return None
+        return self._entries.index((-score, application_id)) + 1
+
+    def percentile(self, application_id: int) -> Optional[float]:
+        """Share of ranked candidates (in %) with a strictly lower score"""
+        score = self._scores.get(application_id)
+        if score is None:
+            return None
+        lower = len(self._entries) - self._entries.bisect_right((-score, float("inf")))
+        return 100.0 * lower / len(self._entries)
+
+    def score(self, application_id: int) -> Optional[float]:
+        return self._scores.get(application_id)
+
+
+def load_scores(job_id: int) -> List[Tuple[int, float]]:
+    db = SessionLocal()
+    try:
+        return db.query(Application.id, Application.score).filter(
+            Application.job_id == job_id,
+            Application.score.isnot(None)
+        ).all()
+    finally:
+        db.close()
+
+
+class Leaderboards:
+    """LRU of per-job boards for this worker"""
+
+    def __init__(self, max_boards: int):
+        self.max_boards = max_boards
+        # Keyed by (shard, job id)
+        self._boards: "OrderedDict[Tuple[str, int], JobLeaderboard]" = OrderedDict()
+        # Updates that arrive while a board is loading are replayed onto it.
+        self._loading: Dict[Tuple[str, int], List[Tuple[int, Optional[float]]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, job_id: int) -> JobLeaderboard:
+        """Return the job's board, loading it on first use (blocking; call from a thread)"""
+        key = (current_shard.get(), job_id)
+        with self._lock:
+            board = self._boards.get(key)
+            if board is not None:
+                self._boards.move_to_end(key)
+                return board
+            self._loading.setdefault(key, [])
+        try:
+            board = JobLeaderboard([tuple(row) for row in load_scores(job_id)])
+        except Exception:
+            with self._lock:
+                self._loading.pop(key, None)
+            raise
+        with self._lock:
+            existing = self._boards.get(key)
+            if existing is not None:
+                # Another thread loaded it meanwhile and replayed the updates.
+                return existing
+            for application_id, score in self._loading.pop(key, []):
+                board.update(application_id, score)
+            self._boards[key] = board
+            while len(self._boards) > self.max_boards:
+                self._boards.popitem(last=False)
+        return board
+
+    def update(self, job_id: int, application_id: int, score: Optional[float]):
+        key = (current_shard.get(), job_id)
+        with self._lock:
+            if key in self._loading:
+                self._loading[key].append((application_id, score))
+            board = self._boards.get(key)
+            if board is not None:
+                board.update(application_id, score)
+
+
+leaderboards = Leaderboards(MAX_BOARDS)
+
+
+def on_interview_completed(event):
+    payload = event["payload"]
+    if payload.get("job_id") is not None and payload.get("application_id") is not None:
+        leaderboards.update(payload["job_id"], payload["application_id"], payload.get("score"))
+
+
+def on_application_archived(event):
+    payload = event["payload"]
+    if payload.get("job_id") is not None:
+        leaderboards.update(payload["job_id"], event["aggregate_id"], None)
@@ -0,0 +1,20 @@
+"""
+Graceful shutdown of gunicorn workers.
+
+When a worker is told to stop (deploy, scale-down, gunicorn max_requests)
+Uvicorn stops accepting connections, closes idle keep-alive connections and
+live interview WebSockets (code 1012, so the client reconnects to another
+worker), and waits for in-flight requests and socket handlers to finish, so a
+candidate's answer is never cut off mid-commit. ``Worker`` bounds that wait
+by ``drain_timeout`` (work still running is cancelled), leaving the rest of
+gunicorn's ``graceful_timeout`` for the lifespan shutdown, which flushes
+buffered answers.
+"""
+
+from uvicorn.workers import UvicornWorker
+
+from settings import get_settings
+
+
+class Worker(UvicornWorker):
+    CONFIG_KWARGS = {**UvicornWorker.CONFIG_KWARGS, "timeout_graceful_shutdown": get_settings().drain_timeout}
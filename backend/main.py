@@ -1,17 +1,81 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import engine, Base
-from routers import auth, admin, recruiter, candidate
+from archive import archive_finished
+from database import init_db, replica_engine
+from deadlines import DeadlineMiddleware
+from events import dispatcher
+from interview_sessions import answer_writer
+from leaderboard import on_application_archived, on_interview_completed
+from notifications import EVENT_TYPES as NOTIFICATION_EVENTS, notifier
+from rate_limit import AdmissionControlMiddleware
+from replication import write_heartbeat
+from rescoring import process_runs
+from scheduler import scheduler
+from settings import get_settings
+from sharding import shards
+from startup import lazy_import, run_shutdowns, run_warmups
+from tenants import TenantMiddleware
+from transcripts import DICTIONARY_CHECK_INTERVAL, ensure_dictionary
+from routers import auth, admin, recruiter, candidate, interview_ws, events
+
+settings = get_settings()
+analytics = lazy_import("analytics")
+
+dispatcher.subscribe("interview.completed", on_interview_completed)
+dispatcher.subscribe("interview.rescored", on_interview_completed)
+dispatcher.subscribe("application.archived", on_application_archived)
+for event_type in NOTIFICATION_EVENTS:
+    dispatcher.subscribe(event_type, notifier.enqueue)
+if settings.analytics_export_interval:
+    scheduler.add("analytics-export", settings.analytics_export_interval, lambda: analytics.export_interview_scores())
+if settings.archive_interval:
+    scheduler.add("archive", settings.archive_interval, archive_finished)
+scheduler.add("transcript-dictionary", DICTIONARY_CHECK_INTERVAL, ensure_dictionary)
+if settings.rescore_poll_interval:
+    scheduler.add("rescoring", settings.rescore_poll_interval, process_runs)
+if settings.database_replica_url:
+    scheduler.add("replica-heartbeat", settings.replica_heartbeat_interval, write_heartbeat, per_shard=False)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.init_db_on_startup:
+        init_db()
+    os.makedirs(settings.upload_dir, exist_ok=True)
+    if settings.warmup_on_startup:
+        await asyncio.to_thread(run_warmups)
+    answer_writer.start()
+    await notifier.start()
+    await dispatcher.start()
+    scheduler.start()
+    yield
+    await scheduler.stop()
+    await answer_writer.stop()
+    await dispatcher.stop()
+    await notifier.stop()
+    await asyncio.to_thread(run_shutdowns)
+    shards.dispose()
+    if replica_engine is not None:
+        replica_engine.dispose()
+
+app = FastAPI(title="ATS AI Interviewer API", version="1.0.0", lifespan=lifespan)
+
+# Tenant (organization and shard) of each request, from its access token
+app.add_middleware(TenantMiddleware)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Deadlines, and cancellation when the client disconnects (inside admission control)
+app.add_middleware(DeadlineMiddleware)
 
-app = FastAPI(title="ATS AI Interviewer API", version="1.0.0")
+# Rate limiting / load shedding (inside CORS so rejections carry CORS headers)
+app.add_middleware(AdmissionControlMiddleware)
 
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://localhost:5173"],
+    allow_origins=settings.cors_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -22,6 +86,8 @@ app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 app.include_router(recruiter.router, prefix="/api/recruiter", tags=["Recruiter"])
 app.include_router(candidate.router, prefix="/api/candidate", tags=["Candidate"])
+app.include_router(interview_ws.router, prefix="/api/candidate", tags=["Candidate"])
+app.include_router(events.router, prefix="/api/events", tags=["Events"])
 
 @app.get("/")
 def root():
@@ -36,5 +102,8 @@ def health_check():
     return {"status": "healthy"}
 
 if __name__ == "__main__":
+    # Development server; use `gunicorn -c gunicorn_conf.py main:app` in production.
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    init_db()
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True,
+                timeout_graceful_shutdown=settings.drain_timeout)
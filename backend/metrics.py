@@ -0,0 +1,32 @@
+"""
+In-process counters.
+
+Each worker keeps its own counters (as Prometheus client libraries do);
+aggregate across workers when scraping.
+"""
+
+import threading
+from collections import Counter
+from typing import Dict, Tuple
+
+_counters: Counter = Counter()
+_lock = threading.Lock()
+
+
+def _key(name: str, labels: Dict[str, str]) -> Tuple:
+    return (name,) + tuple(sorted(labels.items()))
+
+
+def inc(name: str, amount: int = 1, **labels):
+    with _lock:
+        _counters[_key(name, labels)] += amount
+
+
+def snapshot():
+    """Counters grouped by name: ``{name: [{"labels": {...}, "value": n}, ...]}``"""
+    with _lock:
+        items = list(_counters.items())
+    result = {}
+    for (name, *labels), value in sorted(items):
+        result.setdefault(name, []).append({"labels": dict(labels), "value": value})
+    return result
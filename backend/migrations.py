@@ -0,0 +1,86 @@
+"""
+Minimal schema migrations.
+
+``create_all`` creates missing tables but never touches existing ones, so
+databases created before a column was added to a model would break. Until
+the project adopts Alembic, ``upgrade`` adds any missing (nullable) columns
+and indexes declared on the models, fills new columns that copy existing
+data (``BACKFILLS``), and runs one-time data migrations (``DATA_MIGRATIONS``),
+recording each in ``schema_migrations``.
+"""
+
+import logging
+from datetime import datetime
+
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateIndex
+
+logger = logging.getLogger(__name__)
+
+# (table, column) -> statement run once, right after the column is added
+BACKFILLS = {
+    ("applications", "score"): (
+        "UPDATE applications SET score = "
+        "(SELECT interviews.score FROM interviews WHERE interviews.application_id = applications.id)"
+    ),
+}
+
+
+
+def _compress_transcripts():
+    import transcripts
+    logger.info("Compressed %d interview transcripts", transcripts.compress_existing())
+
+
+# (name, function) run once per database, in order
+DATA_MIGRATIONS = [
+    ("compress_transcripts", _compress_transcripts),
+]
+
+
+def add_missing_columns(engine, metadata):
+    """Add missing columns and indexes; return the added ``(table, column)`` pairs"""
+    added_columns = []
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}')
+                logger.info("Added column %s.%s", table.name, column.name)
+                added_columns.append((table.name, column.name))
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    conn.execute(CreateIndex(index))
+                    logger.info("Added index %s", index.name)
+    return added_columns
+
+
+def upgrade(engine, metadata):
+    added = add_missing_columns(engine, metadata)
+    with engine.begin() as conn:
+        for key in added:
+            if key in BACKFILLS:
+                conn.exec_driver_sql(BACKFILLS[key])
+                logger.info("Backfilled %s.%s", *key)
+    run_data_migrations(engine)
+
+
+def run_data_migrations(engine):
+    from models import SchemaMigration
+    with engine.begin() as conn:
+        applied = {row[0] for row in conn.execute(SchemaMigration.__table__.select())}
+    for name, migrate in DATA_MIGRATIONS:
+        if name in applied:
+            continue
+        migrate()
+        with engine.begin() as conn:
+            conn.execute(SchemaMigration.__table__.insert(), {"name": name, "applied_at": datetime.utcnow()})
+        logger.info("Applied data migration %s", name)
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, JSON, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, JSON, Enum, Index, LargeBinary, UniqueConstraint
+from sqlalchemy.orm import relationship, deferred
 from database import Base
+from transcripts import CompressedJSON
 from datetime import datetime
 import enum
 
@@ -16,6 +17,17 @@ class ApplicationStatus(str, enum.Enum):
     ACCEPTED = "accepted"
     REJECTED = "rejected"
 
+class Organization(Base):
+    """A client company (tenant). Kept in the default database only: it says
+    which shard (sharding.py) the organization's users, jobs and applications live on"""
+    __tablename__ = "organizations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    slug = Column(String, unique=True, index=True, nullable=False)
+    name = Column(String, nullable=False)
+    shard = Column(String, nullable=False, default="default")
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class User(Base):
     __tablename__ = "users"
     
@@ -24,6 +36,9 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     full_name = Column(String, nullable=False)
     role = Column(Enum(UserRole), nullable=False)
+    # Organizations live in the default database, so no foreign key; NULL for
+    # users created before organizations (and for platform admins)
+    organization_id = Column(Integer, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -38,6 +53,7 @@ class Job(Base):
     description = Column(Text, nullable=False)
     requirements = Column(Text)
     recruiter_id = Column(Integer, ForeignKey("users.id"))
+    organization_id = Column(Integer, index=True)
     status = Column(String, default="active")
     created_at = Column(DateTime, default=datetime.utcnow)
     
@@ -52,26 +68,191 @@ class Application(Base):
     candidate_id = Column(Integer, ForeignKey("users.id"))
     job_id = Column(Integer, ForeignKey("jobs.id"))
     resume_path = Column(String)
+    resume_hash = Column(String(64), index=True)  # sha256 of the uploaded file
+    parsed_profile = Column(JSON)  # Output of resume_parser, see ParsedResume
     status = Column(Enum(ApplicationStatus), default=ApplicationStatus.PENDING)
     applied_at = Column(DateTime, default=datetime.utcnow)
+    score = Column(Float)  # Copy of the interview score, for per-job ranking
+    organization_id = Column(Integer)  # The job's organization
     
     # Relationships
     candidate = relationship("User", back_populates="applications", foreign_keys=[candidate_id])
     job = relationship("Job", back_populates="applications")
     interview = relationship("Interview", back_populates="application", uselist=False)
+    
+    __table_args__ = (
+        Index("ix_applications_job_id_score", "job_id", "score"),
+        # A job's applications in id order, for streamed exports
+        Index("ix_applications_job_id_id", "job_id", "id"),
+    )
 
 class Interview(Base):
     __tablename__ = "interviews"
     
     id = Column(Integer, primary_key=True, index=True)
-    application_id = Column(Integer, ForeignKey("applications.id"))
-    questions = Column(JSON)  # List of questions
-    answers = Column(JSON)  # List of answers
+    application_id = Column(Integer, ForeignKey("applications.id"), index=True)
+    # Transcript and analysis: compressed, and loaded only when accessed (or
+    # with options(undefer_group("transcript")) when a query needs them)
+    questions = deferred(Column(CompressedJSON), group="transcript")  # List of questions
+    answers = deferred(Column(CompressedJSON), group="transcript")  # List of answers
     score = Column(Float)
-    ai_analysis = Column(JSON)  # AI evaluation results
+    ai_analysis = deferred(Column(CompressedJSON), group="transcript")  # AI evaluation results
+    engine_state = Column(JSON)  # Adaptive engine checkpoint (interview_engine.py)
     status = Column(String, default="pending")
     started_at = Column(DateTime)
     completed_at = Column(DateTime)
+    organization_id = Column(Integer)  # The job's organization
     
     # Relationships
     application = relationship("Application", back_populates="interview")
+
+class ArchivedApplication(Base):
+    """Application moved out of the hot table by archive.py (same columns and ids)"""
+    __tablename__ = "archived_applications"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    candidate_id = Column(Integer, index=True)
+    job_id = Column(Integer, index=True)
+    resume_path = Column(String)
+    resume_hash = Column(String(64))
+    parsed_profile = Column(JSON)
+    status = Column(Enum(ApplicationStatus))
+    applied_at = Column(DateTime)
+    score = Column(Float)
+    organization_id = Column(Integer)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+class ArchivedInterview(Base):
+    """Interview moved out of the hot table by archive.py (same columns and ids)"""
+    __tablename__ = "archived_interviews"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    application_id = Column(Integer, index=True)
+    questions = deferred(Column(CompressedJSON), group="transcript")
+    answers = deferred(Column(CompressedJSON), group="transcript")
+    score = Column(Float)
+    ai_analysis = deferred(Column(CompressedJSON), group="transcript")
+    engine_state = Column(JSON)
+    status = Column(String)
+    started_at = Column(DateTime)
+    completed_at = Column(DateTime)
+    organization_id = Column(Integer)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+class ParsedResume(Base):
+    """Parse cache keyed by resume content hash, shared by all applications"""
+    __tablename__ = "parsed_resumes"
+    
+    content_hash = Column(String(64), primary_key=True)
+    parser_version = Column(Integer, nullable=False)
+    profile = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class OutboxEvent(Base):
+    """State change recorded in the same transaction as the change itself"""
+    __tablename__ = "outbox_events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String, nullable=False)  # e.g. "application.status_changed"
+    aggregate_type = Column(String, nullable=False)  # "application" or "interview"
+    aggregate_id = Column(Integer, nullable=False)
+    payload = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class ReplicationHeartbeat(Base):
+    """Single row rewritten on the primary; its age on a replica is the replica's lag"""
+    __tablename__ = "replication_heartbeats"
+    
+    id = Column(Integer, primary_key=True)
+    beat_at = Column(DateTime, nullable=False)
+
+class CompressionDictionary(Base):
+    """zstd dictionary for CompressedJSON columns; the id is the dictionary id stored in each frame"""
+    __tablename__ = "compression_dictionaries"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    data = Column(LargeBinary, nullable=False)
+    samples = Column(Integer)  # Number of values it was trained on
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class SchemaMigration(Base):
+    """One-time data migrations already applied (see migrations.DATA_MIGRATIONS)"""
+    __tablename__ = "schema_migrations"
+    
+    name = Column(String, primary_key=True)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
+class CandidateSignature(Base):
+    """MinHash signatures of a candidate's latest resume and name (see dedup.py)"""
+    __tablename__ = "candidate_signatures"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    resume_hash = Column(String(64))  # Resume the signature was computed from
+    resume_signature = Column(LargeBinary)  # uint32 array, None without a parsed resume
+    name_signature = Column(LargeBinary)
+    contacts = Column(JSON)  # Hashed, normalized emails and phone numbers
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class DedupBucket(Base):
+    """LSH band (or contact) key -> candidates sharing it"""
+    __tablename__ = "dedup_buckets"
+    
+    key = Column(String, primary_key=True)
+    user_id = Column(Integer, primary_key=True, index=True)
+
+class DuplicateCandidate(Base):
+    """Pair of candidate accounts flagged as probably the same person"""
+    __tablename__ = "duplicate_candidates"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    duplicate_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)  # > user_id
+    resume_similarity = Column(Float)
+    name_similarity = Column(Float)
+    reasons = Column(JSON)  # e.g. ["similar_resume", "same_contact"]
+    detected_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "duplicate_user_id", name="uq_duplicate_candidates_pair"),
+    )
+
+class Notification(Base):
+    """Something to tell a user over one channel; sent in periodic digests (see notifications.py)"""
+    __tablename__ = "notifications"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    recipient_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    channel = Column(String, nullable=False)  # e.g. "file", "smtp"
+    event_id = Column(Integer, nullable=False)  # Outbox event it was created from
+    kind = Column(String, nullable=False)  # Event type, e.g. "interview.completed"
+    payload = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    claimed_at = Column(DateTime)  # Queued for sending by a worker
+    sent_at = Column(DateTime, index=True)
+    attempts = Column(Integer, default=0)
+    
+    __table_args__ = (
+        UniqueConstraint("event_id", "recipient_id", "channel", name="uq_notifications_event_recipient_channel"),
+    )
+
+class RescoreRun(Base):
+    """Re-scoring of completed interviews, e.g. after a rubric change (see rescoring.py)"""
+    __tablename__ = "rescore_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, index=True)  # None = every job of the organization
+    organization_id = Column(Integer)
+    status = Column(String, default="pending", index=True)  # pending, running, completed, failed, cancelled
+    total = Column(Integer, default=0)  # Interviews to rescore, counted when the run was requested
+    processed = Column(Integer, default=0)
+    changed = Column(Integer, default=0)  # Interviews whose score changed
+    failed = Column(Integer, default=0)  # Interviews the scorer failed on (left unchanged)
+    last_interview_id = Column(Integer, default=0)  # Resume point: interviews are done in id order
+    max_interview_id = Column(Integer, default=0)  # Newest interview when the run was requested
+    claimed_by = Column(String)  # Worker processing the run
+    requested_by = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)  # Last batch committed by the worker
+    finished_at = Column(DateTime)
+    error = Column(String)
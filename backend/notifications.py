@@ -0,0 +1,444 @@
+"""
+Recruiter notifications, sent as batched digests.
+
+Nothing here runs on the request path. ``interview.started`` (resume upload)
+and ``interview.completed`` (last answer) are already in the outbox; the event
+dispatcher hands them to ``Notifier.enqueue``, which only puts them on a
+bounded queue. An ingest task stores one ``notifications`` row per recipient
+and channel (every worker sees every event; the unique constraint keeps one
+row). If the queue is full the event is not lost: ingest re-reads what it
+missed from the outbox once it has caught up.
+
+Every ``notification_digest_interval`` seconds one worker (a lease in the
+shared cache) claims each recipient's unsent rows and hands each channel one
+digest per recipient. Channels send from their own task, with a timeout, and
+only as many digests are claimed as a channel's queue has room for, so a slow
+or failing channel sends larger, later digests instead of piling up work or
+holding up the others. Failed sends are retried in the next digest, up to
+``MAX_ATTEMPTS`` times; claims of a worker that died are retried after
+``CLAIM_TIMEOUT``. A claim only takes rows nobody else holds, so a round that
+outlasts its lease cannot send a digest twice.
+
+Channels are ``Channel`` subclasses registered in ``CHANNELS`` and enabled by
+the ``notification_channels`` setting. Notifications are stored on the shard
+(sharding.py) of the event they come from; each digest round visits every
+shard.
+"""
+
+import asyncio
+import logging
+import os
+import smtplib
+import uuid
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+import metrics
+from cache import get_cache
+from database import SessionLocal
+from events import FETCH_BATCH, fetch_events
+from models import Job, Notification, User
+from settings import get_settings
+from sharding import DEFAULT_SHARD, current_shard, get_engine, shards, using_shard
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ["interview.started", "interview.completed"]
+INGEST_BATCH = 200
+CLAIM_BATCH = 5000
+CLAIM_TIMEOUT = timedelta(minutes=10)
+MAX_ATTEMPTS = 5
+
+
+class Digest(NamedTuple):
+    recipient_id: int
+    email: str
+    name: str
+    items: List[Dict[str, Any]]  # id, kind, payload, created_at
+    shard: str = DEFAULT_SHARD
+
+    @property
+    def notification_ids(self) -> List[int]:
+        return [item["id"] for item in self.items]
+
+
+def describe(kind: str, payload: Dict[str, Any]) -> str:
+    candidate = payload.get("candidate_name") or "A candidate"
+    job = payload.get("job_title") or f"job {payload.get('job_id')}"
+    if kind == "interview.completed":
+        score = payload.get("score")
+        suffix = f" (score {score:.1f})" if score is not None else ""
+        return f"{candidate} completed the interview for {job}{suffix}"
+    if kind == "interview.started":
+        return f"{candidate} uploaded a resume and started the interview for {job}"
+    return f"{kind}: {payload}"
+
+
+def build_message(digest: Digest) -> EmailMessage:
+    count = len(digest.items)
+    message = EmailMessage()
+    message["From"] = get_settings().notification_sender
+    message["To"] = f"{digest.name} <{digest.email}>"
+    message["Subject"] = f"{count} interview update{'s' if count != 1 else ''}"
+    lines = [f"Hi {digest.name},", ""]
+    lines += [f"- {item['created_at']:%Y-%m-%d %H:%M} UTC: {describe(item['kind'], item['payload'] or {})}"
+              for item in digest.items]
+    message.set_content("\n".join(lines) + "\n")
+    return message
+
+
+class Channel:
+    name = ""
+
+    async def send(self, digest: Digest):
+        raise NotImplementedError
+
+
+class FileChannel(Channel):
+    """Writes each digest as an .eml file; a local stand-in for email"""
+    name = "file"
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or get_settings().notification_dir
+
+    def _write(self, digest: Digest) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(
+            self.directory, f"{datetime.utcnow():%Y%m%dT%H%M%S}-{digest.recipient_id}-{uuid.uuid4().hex[:8]}.eml"
+        )
+        with open(path, "wb") as f:
+            f.write(bytes(build_message(digest)))
+        return path
+
+    async def send(self, digest: Digest):
+        await asyncio.to_thread(self._write, digest)
+
+
+class SMTPChannel(Channel):
+    """Sends each digest by email (e.g. to a local `python -m aiosmtpd -n` in development)"""
+    name = "smtp"
+
+    def _send(self, digest: Digest):
+        settings = get_settings()
+        with smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=settings.notification_send_timeout) as smtp:
+            smtp.send_message(build_message(digest))
+
+    async def send(self, digest: Digest):
+        await asyncio.to_thread(self._send, digest)
+
+
+CHANNELS = {
+    "file": FileChannel,
+    "smtp": SMTPChannel,
+}
+
+
+def _insert_ignoring_duplicates():
+    dialect_insert = postgresql_insert if get_engine().dialect.name == "postgresql" else sqlite_insert
+    return dialect_insert(Notification).on_conflict_do_nothing()
+
+
+def store_notifications(events: List[Dict[str, Any]], channels: List[str]) -> int:
+    """Create the notifications for a batch of outbox events; return the number of events with a recipient"""
+    events = [event for event in events if event["type"] in EVENT_TYPES and event["payload"]]
+    if not events:
+        return 0
+    db = SessionLocal()
+    try:
+        job_ids = {event["payload"].get("job_id") for event in events}
+        candidate_ids = {event["payload"].get("candidate_id") for event in events}
+        jobs = {row.id: row for row in db.query(Job.id, Job.title, Job.recruiter_id).filter(Job.id.in_(job_ids))}
+        names = dict(db.query(User.id, User.full_name).filter(User.id.in_(candidate_ids)))
+        rows = []
+        for event in events:
+            payload = event["payload"]
+            job = jobs.get(payload.get("job_id"))
+            if job is None or job.recruiter_id is None:
+                continue
+            details = {
+                "application_id": payload.get("application_id"),
+                "interview_id": event["aggregate_id"],
+                "job_id": job.id,
+                "job_title": job.title,
+                "candidate_name": names.get(payload.get("candidate_id")),
+                "score": payload.get("score"),
+            }
+            rows += [{
+                "recipient_id": job.recruiter_id, "channel": channel, "event_id": event["id"],
+                "kind": event["type"], "payload": details, "created_at": datetime.utcnow(), "attempts": 0,
+            } for channel in channels]
+        if rows:
+            db.execute(_insert_ignoring_duplicates(), rows)
+            db.commit()
+        return len(rows) // max(len(channels), 1)
+    finally:
+        db.close()
+
+
+def _claimable(now: datetime):
+    return and_(
+        Notification.sent_at.is_(None),
+        Notification.attempts < MAX_ATTEMPTS,
+        or_(Notification.claimed_at.is_(None), Notification.claimed_at < now - CLAIM_TIMEOUT)
+    )
+
+
+def claim_digests(channel: str, max_recipients: int) -> List[Digest]:
+    """Claim the unsent notifications of up to ``max_recipients`` recipients, grouped into digests"""
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        rows = db.query(Notification).filter(
+            Notification.channel == channel, _claimable(now)
+        ).order_by(Notification.recipient_id, Notification.id).limit(CLAIM_BATCH).all()
+        grouped: Dict[int, List[Notification]] = {}
+        for row in rows:
+            if row.recipient_id not in grouped and len(grouped) >= max_recipients:
+                break
+            grouped.setdefault(row.recipient_id, []).append(row)
+        if not grouped:
+            return []
+        users = {user.id: user for user in db.query(User).filter(User.id.in_(grouped))}
+        wanted, orphaned = [], []
+        for recipient_id, notifications in grouped.items():
+            (wanted if recipient_id in users else orphaned).extend(row.id for row in notifications)
+        if orphaned:
+            db.query(Notification).filter(Notification.id.in_(orphaned)).delete(synchronize_session=False)
+        # Only the rows still claimable: another worker may have claimed some since the query
+        claimed = set(db.execute(
+            update(Notification).where(
+                Notification.id.in_(wanted), _claimable(now)
+            ).values(claimed_at=now).returning(Notification.id),
+            execution_options={"synchronize_session": False},
+        ).scalars())
+        digests = []
+        for recipient_id, notifications in grouped.items():
+            items = [
+                {"id": row.id, "kind": row.kind, "payload": row.payload, "created_at": row.created_at}
+                for row in notifications if row.id in claimed
+            ]
+            if items:
+                user = users[recipient_id]
+                digests.append(Digest(recipient_id, user.email, user.full_name, items, current_shard.get()))
+        db.commit()
+        return digests
+    finally:
+        db.close()
+
+
+def finish_digest(digest: Digest, sent: bool):
+    """Mark a digest sent, or release it for the next one with an attempt counted"""
+    with using_shard(digest.shard):
+        db = SessionLocal()
+        try:
+            query = db.query(Notification).filter(Notification.id.in_(digest.notification_ids))
+            if sent:
+                query.update({Notification.sent_at: datetime.utcnow()}, synchronize_session=False)
+            else:
+                query.update({
+                    Notification.claimed_at: None,
+                    Notification.attempts: Notification.attempts + 1,
+                }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+def prune_notifications(older_than: timedelta) -> int:
+    """Delete sent notifications, and those given up on, older than ``older_than``"""
+    cutoff = datetime.utcnow() - older_than
+    db = SessionLocal()
+    try:
+        deleted = db.query(Notification).filter(or_(
+            Notification.sent_at < cutoff,
+            and_(Notification.sent_at.is_(None), Notification.attempts >= MAX_ATTEMPTS,
+                 Notification.created_at < cutoff)
+        )).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+    finally:
+        db.close()
+
+
+def _on_shard(shard: str, fn, *args):
+    """``fn(*args)`` on ``shard``; for ``asyncio.to_thread``"""
+    with using_shard(shard):
+        return fn(*args)
+
+
+def _by_shard(items) -> Dict[str, List[Dict[str, Any]]]:
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for shard, event in items:
+        grouped.setdefault(shard, []).append(event)
+    return grouped
+
+
+class ChannelWorker:
+    """Sends one channel's digests from its own task, one at a time"""
+
+    def __init__(self, channel: Channel, queue_size: int, timeout: float):
+        self.channel = channel
+        self.timeout = timeout
+        self.queue: "asyncio.Queue[Digest]" = asyncio.Queue(queue_size)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def free_slots(self) -> int:
+        return self.queue.maxsize - self.queue.qsize()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Release what was claimed but not sent so another worker picks it up now.
+        while not self.queue.empty():
+            await asyncio.to_thread(finish_digest, self.queue.get_nowait(), False)
+
+    async def _run(self):
+        while True:
+            digest = await self.queue.get()
+            try:
+                await asyncio.wait_for(self.channel.send(digest), self.timeout)
+                sent = True
+            except asyncio.CancelledError:
+                await asyncio.shield(asyncio.to_thread(finish_digest, digest, False))
+                raise
+            except asyncio.TimeoutError:
+                logger.warning("Sending a %s digest to user %s timed out after %ss",
+                               self.channel.name, digest.recipient_id, self.timeout)
+                sent = False
+            except Exception:
+                logger.exception("Sending a %s digest to user %s failed", self.channel.name, digest.recipient_id)
+                sent = False
+            metrics.inc("notification_digests_total", channel=self.channel.name,
+                        outcome="sent" if sent else "failed")
+            try:
+                await asyncio.to_thread(finish_digest, digest, sent)
+            except Exception:
+                logger.exception("Recording a %s digest failed", self.channel.name)
+
+
+class Notifier:
+    def __init__(self):
+        # (shard, event) pairs
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: Dict[str, ChannelWorker] = {}
+        self._tasks: List[asyncio.Task] = []
+        # Per shard: events after this id were dropped from the full queue and must be re-read.
+        self._missed_after: Dict[str, int] = {}
+
+    @property
+    def channels(self) -> List[str]:
+        return [channel for channel in get_settings().notification_channels if channel in CHANNELS]
+
+    async def start(self):
+        settings = get_settings()
+        unknown = set(settings.notification_channels) - set(CHANNELS)
+        if unknown:
+            logger.warning("Ignoring unknown notification channels: %s", ", ".join(sorted(unknown)))
+        self._queue = asyncio.Queue(settings.notification_queue_size)
+        self._workers = {
+            name: ChannelWorker(CHANNELS[name](), settings.notification_channel_queue,
+                                settings.notification_send_timeout)
+            for name in self.channels
+        }
+        for worker in self._workers.values():
+            worker.start()
+        self._tasks = [asyncio.create_task(self._ingest()), asyncio.create_task(self._send_periodically())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Store what is still queued; digests go out from whichever worker runs next.
+        if self._queue is not None and not self._queue.empty():
+            pending = [self._queue.get_nowait() for _ in range(self._queue.qsize())]
+            for shard, events in _by_shard(pending).items():
+                await asyncio.to_thread(_on_shard, shard, store_notifications, events, self.channels)
+        for worker in self._workers.values():
+            await worker.stop()
+
+    def enqueue(self, event: Dict[str, Any]):
+        """Outbox subscriber: queue an event (of the current shard) without waiting"""
+        if self._queue is None:
+            return
+        shard = current_shard.get()
+        try:
+            self._queue.put_nowait((shard, event))
+        except asyncio.QueueFull:
+            metrics.inc("notification_events_deferred_total")
+            if shard not in self._missed_after or event["id"] - 1 < self._missed_after[shard]:
+                self._missed_after[shard] = event["id"] - 1
+
+    async def _ingest(self):
+        while True:
+            batch = [await self._queue.get()]
+            while not self._queue.empty() and len(batch) < INGEST_BATCH:
+                batch.append(self._queue.get_nowait())
+            try:
+                for shard, events in _by_shard(batch).items():
+                    await asyncio.to_thread(_on_shard, shard, store_notifications, events, self.channels)
+                if self._missed_after and self._queue.empty():
+                    await self._catch_up()
+            except Exception:
+                logger.exception("Storing notifications failed")
+
+    async def _catch_up(self):
+        missed, self._missed_after = self._missed_after, {}
+        for shard, after in missed.items():
+            while True:
+                events = await asyncio.to_thread(_on_shard, shard, fetch_events, after, FETCH_BATCH, EVENT_TYPES)
+                if not events:
+                    break
+                await asyncio.to_thread(_on_shard, shard, store_notifications, events, self.channels)
+                after = events[-1]["id"]
+
+    async def _send_periodically(self):
+        interval = get_settings().notification_digest_interval
+        while True:
+            await asyncio.sleep(interval)
+            # One worker sends each round; the others skip.
+            if not get_cache().set("notifications:digest:lease", os.getpid(), ex=interval, nx=True):
+                continue
+            try:
+                await self.send_digests()
+            except Exception:
+                logger.exception("Sending notification digests failed")
+
+    async def send_digests(self) -> Dict[str, int]:
+        """Hand every channel the digests it has room for; return digests queued per channel"""
+        queued = {}
+        for name, worker in self._workers.items():
+            if not worker.free_slots:
+                # Still busy with earlier digests: leave the rows for a later, larger one.
+                metrics.inc("notification_channel_backlogged_total", channel=name)
+                queued[name] = 0
+                continue
+            queued[name] = 0
+            for shard in shards.names():
+                if not worker.free_slots:
+                    break
+                digests = await asyncio.to_thread(_on_shard, shard, claim_digests, name, worker.free_slots)
+                for digest in digests:
+                    worker.queue.put_nowait(digest)
+                queued[name] += len(digests)
+        retention = timedelta(days=get_settings().event_retention_days)
+        for shard in shards.names():
+            await asyncio.to_thread(_on_shard, shard, prune_notifications, retention)
+        return queued
+
+
+notifier = Notifier()
@@ -0,0 +1,164 @@
+"""
+Rate limiting and admission control (TECHNICAL_ARCHITECTURE.md §4.4).
+
+Every API request is matched against ``RULES`` (first match wins) and then:
+
+1. charged against a token bucket keyed by rule and caller (user from the
+   access token, client IP for anonymous requests) and the caller's role.
+   Buckets live in the shared cache so limits hold across workers. An empty
+   bucket is rejected with 429 and ``Retry-After``.
+2. admitted only while the rule's per-worker concurrency cap has room.
+   Expensive routes (bcrypt login, resume parsing, full admin listings) shed
+   excess load immediately with 503 and ``Retry-After`` instead of queueing.
+
+Shed requests are counted in ``metrics`` as ``requests_shed_total``.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import re
+import time
+from typing import Dict, NamedTuple, Optional, Pattern, Tuple
+
+import metrics
+from auth import decode_token
+from cache import get_cache
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+EXEMPT_PATHS = {"/api/health"}
+
+
+class Limit(NamedTuple):
+    per_minute: float
+    burst: float
+
+
+class Rule(NamedTuple):
+    name: str
+    method: Optional[str]
+    pattern: Pattern
+    limits: Dict[str, Limit]  # role (or "anonymous", or "*" for any user) -> limit
+    max_concurrency: Optional[int] = None
+
+
+RULES = [
+    Rule("login", "POST", re.compile(r"^/api/auth/login$"), {"anonymous": Limit(10, 5), "*": Limit(10, 5)}, max_concurrency=4),
+    Rule("upload_resume", "POST", re.compile(r"^/api/candidate/upload-resume/"), {"candidate": Limit(10, 3)}, max_concurrency=4),
+    Rule("admin_listings", "GET", re.compile(r"^/api/admin/(interviews|applications|candidates|recruiters)$"), {"admin": Limit(30, 10)}, max_concurrency=2),
+    Rule("default", None, re.compile(r"^/api/"), {"anonymous": Limit(10, 10), "*": Limit(100, 50)}),
+]
+
+
+def _configured_rules():
+    settings = get_settings()
+    rules = []
+    for rule in RULES:
+        limits = dict(rule.limits)
+        for role, (per_minute, burst) in settings.rate_limits.get(rule.name, {}).items():
+            limits[role] = Limit(per_minute, burst)
+        rules.append(rule._replace(
+            limits=limits,
+            max_concurrency=settings.concurrency_limits.get(rule.name, rule.max_concurrency),
+        ))
+    return rules
+
+
+def _take_token(limit: Limit, now: float):
+    rate = limit.per_minute / 60
+
+    def take(state):
+        tokens, updated = state or (limit.burst, now)
+        tokens = min(limit.burst, tokens + (now - updated) * rate)
+        if tokens >= 1:
+            return [tokens - 1, now], 0.0
+        return [tokens, now], (1 - tokens) / rate
+
+    return take
+
+
+def _json_response(status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+    ]
+    return status, headers, body
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.rules = _configured_rules()
+        self.in_flight: Dict[str, int] = {rule.name: 0 for rule in self.rules}
+
+    def _match(self, method: str, path: str) -> Optional[Rule]:
+        if path in EXEMPT_PATHS:
+            return None
+        for rule in self.rules:
+            if (rule.method is None or rule.method == method) and rule.pattern.match(path):
+                return rule
+        return None
+
+    @staticmethod
+    def _caller(scope) -> Tuple[str, str]:
+        """Return ``(identity, role)`` without touching the database"""
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                claims = decode_token(token) if scheme.lower() == "bearer" else None
+                if claims and claims.get("sub"):
+                    return f"user:{claims['sub']}", claims.get("role", "*")
+                break
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}", "anonymous"
+
+    async def _check_rate(self, rule: Rule, identity: str, role: str) -> float:
+        """Return 0 when admitted, otherwise seconds until a token is available"""
+        limit = rule.limits.get(role) or (rule.limits.get("*") if role != "anonymous" else None)
+        if limit is None:
+            return 0.0
+        cache = get_cache()
+        key = f"ratelimit:{rule.name}:{identity}"
+        take = _take_token(limit, time.time())
+        ttl = limit.burst / (limit.per_minute / 60)
+        try:
+            if cache.blocking:
+                return await asyncio.to_thread(cache.update, key, take, ttl)
+            return cache.update(key, take, ttl)
+        except Exception:
+            # Fail open: a cache outage must not take the API down with it.
+            logger.exception("Rate limit check failed")
+            return 0.0
+
+    async def _reject(self, send, rule: Rule, reason: str, status: int, detail: str, retry_after: float):
+        metrics.inc("requests_shed_total", rule=rule.name, reason=reason)
+        status, headers, body = _json_response(status, detail, retry_after)
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not get_settings().rate_limiting_enabled:
+            return await self.app(scope, receive, send)
+        rule = self._match(scope["method"], scope["path"])
+        if rule is None:
+            return await self.app(scope, receive, send)
+
+        identity, role = self._caller(scope)
+        retry_after = await self._check_rate(rule, identity, role)
+        if retry_after > 0:
+            return await self._reject(send, rule, "rate_limited", 429, "Too many requests", retry_after)
+
+        if rule.max_concurrency is None:
+            return await self.app(scope, receive, send)
+        if self.in_flight[rule.name] >= rule.max_concurrency:
+            return await self._reject(send, rule, "concurrency", 503, "Server busy, please retry", 1)
+        self.in_flight[rule.name] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight[rule.name] -= 1
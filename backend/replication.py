@@ -0,0 +1,216 @@
+"""
+Read replica routing (TECHNICAL_ARCHITECTURE.md §5.3).
+
+Read-only endpoints depend on ``get_read_db`` instead of ``get_db`` (and
+authenticate with ``require_read_role`` so the user is looked up on the same
+session). It hands out a replica session unless:
+
+- no replica is configured (``database_replica_url``),
+- the caller's organization lives on a shard other than the default one
+  (sharding.py; the replica copies the default database only),
+- the caller wrote to the primary within the last ``replica_max_lag``
+  seconds (read-your-writes: commits with changes on a ``get_db`` session
+  mark the caller sticky in the shared cache), or
+- the replica lags more than ``replica_max_lag`` seconds or is unreachable,
+
+in which case it is the request's own ``get_db`` session, so a request
+never holds two connections to the primary.
+
+Lag is measured with a heartbeat row that one worker rewrites on the primary
+every ``replica_heartbeat_interval`` seconds; its age as seen on the replica
+is the replication lag. Routing decisions are counted in ``metrics`` as
+``db_reads_total``.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Depends, Request
+from sqlalchemy import event, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+import metrics
+from auth import (credentials_error, decode_token_subject, get_user_from_token, oauth2_scheme, require_platform_admin,
+                  require_role)
+from cache import get_cache
+from database import ReplicaSessionLocal, SessionLocal, get_db, replica_engine
+from models import ReplicationHeartbeat, User
+from settings import get_settings
+from sharding import DEFAULT_SHARD, current_shard
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_ID = 1
+
+
+def write_heartbeat():
+    """Record the current time on the primary"""
+    db = SessionLocal()
+    try:
+        heartbeat = db.get(ReplicationHeartbeat, HEARTBEAT_ID)
+        if heartbeat is None:
+            db.add(ReplicationHeartbeat(id=HEARTBEAT_ID, beat_at=datetime.utcnow()))
+        else:
+            heartbeat.beat_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+
+class ReplicaMonitor:
+    """Per-process view of replica health, refreshed at most every ``check_interval`` seconds"""
+
+    def __init__(self, max_lag: float, check_interval: float):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag: Optional[float] = None
+        self._healthy = False
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def usable(self) -> bool:
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            # One thread refreshes; the others use the previous answer meanwhile.
+            if self._lock.acquire(blocking=False):
+                try:
+                    self._check()
+                finally:
+                    self._lock.release()
+        return self._healthy
+
+    def mark_failed(self):
+        self._healthy = False
+        self._checked_at = time.monotonic()
+
+    def _check(self):
+        try:
+            with replica_engine.connect() as conn:
+                beat_at = conn.execute(
+                    select(ReplicationHeartbeat.beat_at).where(ReplicationHeartbeat.id == HEARTBEAT_ID)
+                ).scalar()
+            self.lag = (datetime.utcnow() - beat_at).total_seconds() if beat_at else None
+            self._healthy = self.lag is not None and self.lag <= self.max_lag
+        except DBAPIError:
+            logger.warning("Replica health check failed", exc_info=True)
+            self.lag = None
+            self._healthy = False
+        self._checked_at = time.monotonic()
+
+
+monitor = ReplicaMonitor(get_settings().replica_max_lag, get_settings().replica_heartbeat_interval)
+
+
+def _sticky_key(subject: str) -> str:
+    return f"replica:sticky:{subject}"
+
+
+def _caller(authorization: Optional[str]) -> Optional[str]:
+    scheme, _, token = (authorization or "").partition(" ")
+    return decode_token_subject(token) if scheme.lower() == "bearer" else None
+
+
+def _route(request: Request) -> str:
+    if replica_engine is None:
+        return "primary"
+    if current_shard.get() != DEFAULT_SHARD:
+        return "shard"
+    subject = _caller(request.headers.get("authorization"))
+    if subject is not None and get_cache().get(_sticky_key(subject)):
+        return "sticky"
+    if not monitor.usable():
+        return "unhealthy"
+    return "replica"
+
+
+def _on_replica(db: Session) -> bool:
+    return replica_engine is not None and db.get_bind() is replica_engine
+
+
+def get_read_db(request: Request, primary: Session = Depends(get_db)):
+    """Session for read-only endpoints: the replica when it is safe to read from.
+
+    Otherwise it is the request's ``get_db`` session, so an endpoint never
+    holds two primary connections.
+    """
+    route = _route(request)
+    use_replica = route == "replica"
+    if replica_engine is not None:
+        metrics.inc("db_reads_total", target="replica" if use_replica else "primary", reason=route)
+    if not use_replica:
+        yield primary
+        return
+    db = ReplicaSessionLocal()
+    try:
+        yield db
+    except DBAPIError as e:
+        if e.connection_invalidated:
+            monitor.mark_failed()
+        raise
+    finally:
+        db.close()
+
+
+def get_read_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_read_db)) -> User:
+    """``auth.get_current_user`` for read-only endpoints, looked up on the read session"""
+    user = get_user_from_token(token, db)
+    if user is None and _on_replica(db):
+        # Accounts created within the replication lag are only on the primary
+        primary = SessionLocal()
+        try:
+            user = get_user_from_token(token, primary)
+        finally:
+            primary.close()
+    if user is None:
+        raise credentials_error()
+    return user
+
+
+def require_read_role(required_role: str):
+    return require_role(required_role, get_read_user)
+
+
+def require_platform_reader(current_user: User = Depends(require_read_role("admin"))):
+    """``auth.require_platform_admin`` for read-only endpoints"""
+    return require_platform_admin(current_user)
+
+
+def detached_read_session(db: Session) -> Session:
+    """New session on the same database as a ``get_read_db`` session, for work that
+    outlives the request (dependencies are closed before a streamed body is sent)"""
+    if _on_replica(db):
+        return ReplicaSessionLocal()
+    return SessionLocal()
+
+
+@event.listens_for(ReplicaSessionLocal, "before_flush")
+def _reject_replica_writes(session, flush_context, instances):
+    if replica_engine is not None:
+        raise RuntimeError("Replica sessions are read-only; use get_db for writes")
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _mark_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _stick_to_primary(session):
+    if session.info.pop("wrote", False) and replica_engine is not None:
+        subject = _caller(session.info.get("authorization"))
+        if subject is not None:
+            get_cache().set(_sticky_key(subject), 1, ex=get_settings().replica_max_lag)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_write_flag(session):
+    session.info.pop("wrote", None)
@@ -0,0 +1,298 @@
+"""
+Rescoring of completed interviews, e.g. after a rubric change.
+
+Recruiters (for one of their jobs) and admins (for a job or their whole
+organization) request a run; it is stored in ``rescore_runs`` and worked
+through by a scheduled job on every worker. A worker claims one run at a
+time and then, until the run is done:
+
+- reads the next ``rescore_batch`` completed interviews after the run's
+  ``last_interview_id`` (interviews go in id order, up to the newest one
+  when the run was requested; later ones were scored with the new rubric),
+- scores them on ``rescore_workers`` threads, since the scorer is a remote
+  model call that mostly waits,
+- writes the batch in one transaction: the run's progress and resume point,
+  the new interview and application scores (set-based, by primary key), and
+  an ``interview.rescored`` event per changed score, which updates the
+  leaderboards.
+
+Batches that change scores make the next analytics export rebuild its
+dataset (the export is incremental by completion time, which rescoring does
+not change); a completed run runs that export right away.
+
+Each batch commits only while the worker still holds the run, so a cancelled
+run stops at the next batch boundary without writing a partial batch. A run
+whose worker died (no batch for ``CLAIM_TIMEOUT``) is picked up where it
+stopped by another worker; cancelled and failed runs can be resumed the same
+way. Interviews the scorer fails on keep their score and are counted in
+``failed``.
+
+    python rescoring.py run    # work through all requested runs now
+"""
+
+import logging
+import sys
+import uuid
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Session
+
+from cache import LockTimeout
+from database import SessionLocal
+from events import record_event
+from models import Application, Interview, RescoreRun
+from settings import get_settings
+from startup import lazy_import
+
+scoring = lazy_import("scoring")
+analytics = lazy_import("analytics")
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("pending", "running")
+RESUMABLE_STATUSES = ("cancelled", "failed")
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+class RunInProgress(Exception):
+    """A run for the same job (or organization) is already pending or running"""
+
+
+def _interviews(query, job_id: Optional[int], organization_id: Optional[int]):
+    """Restrict ``query`` (over interviews joined to applications) to a run's completed interviews"""
+    query = query.join(Application, Application.id == Interview.application_id).filter(
+        Interview.status == "completed"
+    )
+    if job_id is not None:
+        query = query.filter(Application.job_id == job_id)
+    if organization_id is not None:
+        query = query.filter(Interview.organization_id == organization_id)
+    return query
+
+
+def _check_not_running(db: Session, job_id: Optional[int], exclude: Optional[int] = None):
+    query = db.query(RescoreRun.id).filter(RescoreRun.job_id == job_id, RescoreRun.status.in_(ACTIVE_STATUSES))
+    if exclude is not None:
+        query = query.filter(RescoreRun.id != exclude)
+    if query.first() is not None:
+        raise RunInProgress()
+
+
+def request_run(db: Session, requested_by: int, job_id: Optional[int] = None) -> RescoreRun:
+    """Queue a run over a job's (or, without ``job_id``, all of the caller's) completed interviews
+
+    ``db`` is the caller's session, so the run covers their organization only.
+    """
+    _check_not_running(db, job_id)
+    total, newest = _interviews(db.query(func.count(Interview.id), func.max(Interview.id)), job_id, None).one()
+    run = RescoreRun(job_id=job_id, requested_by=requested_by, total=total, max_interview_id=newest or 0)
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+def cancel_run(db: Session, run_id: int) -> bool:
+    """Stop a pending or running run; its worker finishes with the batch in hand"""
+    cancelled = db.query(RescoreRun).filter(
+        RescoreRun.id == run_id, RescoreRun.status.in_(ACTIVE_STATUSES)
+    ).update({
+        RescoreRun.status: "cancelled",
+        RescoreRun.claimed_by: None,
+        RescoreRun.finished_at: datetime.utcnow(),
+    }, synchronize_session=False)
+    db.commit()
+    return bool(cancelled)
+
+
+def resume_run(db: Session, run_id: int) -> bool:
+    """Queue a cancelled or failed run again; it continues after its last batch"""
+    run = db.query(RescoreRun).filter(RescoreRun.id == run_id).first()
+    if run is None or run.status not in RESUMABLE_STATUSES:
+        return False
+    _check_not_running(db, run.job_id, exclude=run.id)
+    resumed = db.query(RescoreRun).filter(
+        RescoreRun.id == run_id, RescoreRun.status.in_(RESUMABLE_STATUSES)
+    ).update({
+        RescoreRun.status: "pending",
+        RescoreRun.finished_at: None,
+        RescoreRun.error: None,
+    }, synchronize_session=False)
+    db.commit()
+    return bool(resumed)
+
+
+def serialize(run: RescoreRun) -> Dict[str, Any]:
+    return {
+        "id": run.id,
+        "job_id": run.job_id,
+        "status": run.status,
+        "total": run.total,
+        "processed": run.processed,
+        "changed": run.changed,
+        "failed": run.failed,
+        "progress": round(min(run.processed / run.total, 1.0), 4) if run.total else 1.0,
+        "requested_by": run.requested_by,
+        "created_at": run.created_at,
+        "started_at": run.started_at,
+        "finished_at": run.finished_at,
+        "error": run.error,
+    }
+
+
+# -- Worker -----------------------------------------------------------------------
+
+def claim_run(worker: str) -> Optional[int]:
+    """Take a pending run, or a running one whose worker stopped reporting; its id"""
+    now = datetime.utcnow()
+    claimable = or_(
+        RescoreRun.status == "pending",
+        and_(RescoreRun.status == "running", RescoreRun.heartbeat_at < now - CLAIM_TIMEOUT),
+    )
+    db = SessionLocal()
+    try:
+        for (run_id,) in db.query(RescoreRun.id).filter(claimable).order_by(RescoreRun.id).limit(10).all():
+            claimed = db.query(RescoreRun).filter(RescoreRun.id == run_id, claimable).update({
+                RescoreRun.status: "running",
+                RescoreRun.claimed_by: worker,
+                RescoreRun.started_at: func.coalesce(RescoreRun.started_at, now),
+                RescoreRun.heartbeat_at: now,
+            }, synchronize_session=False)
+            db.commit()
+            if claimed:
+                return run_id
+        return None
+    finally:
+        db.close()
+
+
+def _score(row):
+    try:
+        return scoring.score_interview(row.questions or [], row.answers or [])
+    except Exception:
+        logger.exception("Rescoring interview %d failed", row.id)
+        return None
+
+
+def rescore_batch(run_id: int, worker: str, executor: Executor, batch_size: int) -> bool:
+    """Rescore the run's next batch and commit it; False once the run is done or no longer ours"""
+    db = SessionLocal()
+    try:
+        run = db.query(RescoreRun).filter(RescoreRun.id == run_id).first()
+        if run is None or run.status != "running" or run.claimed_by != worker:
+            return False
+        rows = _interviews(db.query(
+            Interview.id, Interview.application_id, Interview.questions, Interview.answers, Interview.score,
+            Application.job_id, Application.candidate_id
+        ), run.job_id, run.organization_id).filter(
+            Interview.id > run.last_interview_id,
+            Interview.id <= run.max_interview_id
+        ).order_by(Interview.id).limit(batch_size).all()
+        rescored_any = run.processed > run.failed
+        # Don't hold a read transaction open while scoring
+        db.rollback()
+        results = list(executor.map(_score, rows))
+
+        now = datetime.utcnow()
+        ours = and_(RescoreRun.id == run_id, RescoreRun.claimed_by == worker, RescoreRun.status == "running")
+        if not rows:
+            completed = db.query(RescoreRun).filter(ours).update({
+                RescoreRun.status: "completed",
+                RescoreRun.claimed_by: None,
+                RescoreRun.finished_at: now,
+                RescoreRun.heartbeat_at: now,
+            }, synchronize_session=False)
+            db.commit()
+            if completed and rescored_any:
+                _export_analytics()
+            return False
+
+        scored = [(row, result) for row, result in zip(rows, results) if result is not None]
+        changed = [(row, score) for row, (score, _) in scored if score != row.score]
+        # First, so the run's row stays locked (and a cancel waits) until the batch commits
+        progressed = db.query(RescoreRun).filter(ours).update({
+            RescoreRun.processed: RescoreRun.processed + len(rows),
+            RescoreRun.changed: RescoreRun.changed + len(changed),
+            RescoreRun.failed: RescoreRun.failed + len(rows) - len(scored),
+            RescoreRun.last_interview_id: rows[-1].id,
+            RescoreRun.heartbeat_at: now,
+        }, synchronize_session=False)
+        if not progressed:
+            db.rollback()
+            return False
+        if scored:
+            # Exported scores are stale now (even if this commit fails, a rebuild is harmless)
+            analytics.request_rebuild()
+            db.execute(update(Interview), [
+                {"id": row.id, "score": score, "ai_analysis": analysis} for row, (score, analysis) in scored
+            ])
+            db.execute(update(Application), [
+                {"id": row.application_id, "score": score} for row, (score, _) in scored
+            ])
+        for row, score in changed:
+            record_event(
+                db, "interview.rescored", "interview", row.id,
+                application_id=row.application_id,
+                job_id=row.job_id,
+                candidate_id=row.candidate_id,
+                old_score=row.score,
+                score=score
+            )
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+def _export_analytics():
+    """Rebuild the analytics dataset right away, so score reports show the new scores"""
+    try:
+        analytics.export_interview_scores()
+    except LockTimeout:
+        pass  # an export is running; the next one rebuilds
+    except Exception:
+        logger.exception("Analytics export after rescoring failed")
+
+
+def _fail(run_id: int, worker: str, error: str):
+    db = SessionLocal()
+    try:
+        db.query(RescoreRun).filter(RescoreRun.id == run_id, RescoreRun.claimed_by == worker).update({
+            RescoreRun.status: "failed",
+            RescoreRun.claimed_by: None,
+            RescoreRun.finished_at: datetime.utcnow(),
+            RescoreRun.error: error[:500],
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def process_runs() -> Dict[str, int]:
+    """Work through the claimable runs on the current shard, one after the other"""
+    settings = get_settings()
+    worker = uuid.uuid4().hex
+    runs = batches = 0
+    with ThreadPoolExecutor(settings.rescore_workers, thread_name_prefix="rescore") as executor:
+        while True:
+            run_id = claim_run(worker)
+            if run_id is None:
+                break
+            runs += 1
+            try:
+                while rescore_batch(run_id, worker, executor, settings.rescore_batch):
+                    batches += 1
+            except Exception as e:
+                logger.exception("Rescoring run %d failed", run_id)
+                _fail(run_id, worker, f"{type(e).__name__}: {e}")
+    return {"runs": runs, "batches": batches}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "run":
+        print(__doc__)
+        sys.exit(1)
+    print(process_runs())
@@ -0,0 +1,284 @@
+"""
+Resume text extraction, section segmentation and skill extraction.
+
+Everything here works on a stream of text chunks so a resume is never held in
+memory as a whole: TXT is decoded incrementally, DOCX paragraphs are pulled
+from the zipped XML with ``iterparse``, PDF pages are extracted one at a time.
+
+This module only depends on the standard library (plus ``pypdf`` for PDFs,
+imported on demand) because it is loaded inside the parser process pool.
+"""
+
+import codecs
+import re
+import zipfile
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List
+from xml.etree import ElementTree
+
+PARSER_VERSION = 1
+
+CHUNK_SIZE = 64 * 1024
+MAX_LINE_LENGTH = 4096
+SECTION_EXCERPT_LENGTH = 2000
+
+SECTION_HEADINGS = {
+    "summary": ["summary", "profile", "professional summary", "about me", "objective", "career objective"],
+    "experience": ["experience", "work experience", "professional experience", "employment history", "work history", "employment"],
+    "education": ["education", "academic background", "qualifications", "education and training"],
+    "skills": ["skills", "technical skills", "core competencies", "key skills", "technologies", "tech stack"],
+    "projects": ["projects", "personal projects", "key projects"],
+    "certifications": ["certifications", "certificates", "licenses", "licenses & certifications"],
+    "languages": ["languages"],
+    "awards": ["awards", "honors", "achievements"],
+}
+
+# Canonical skill name -> lowercase aliases found in resumes.
+SKILL_DICTIONARY = {
+    "Python": ["python"],
+    "Java": ["java"],
+    "JavaScript": ["javascript", "js", "es6"],
+    "TypeScript": ["typescript"],
+    "Go": ["golang"],
+    "Rust": ["rust"],
+    "C++": ["c++", "cpp"],
+    "C#": ["c#", "csharp"],
+    ".NET": [".net", "dotnet"],
+    "Ruby": ["ruby"],
+    "PHP": ["php"],
+    "Kotlin": ["kotlin"],
+    "Swift": ["swift"],
+    "Scala": ["scala"],
+    "SQL": ["sql"],
+    "PostgreSQL": ["postgresql", "postgres"],
+    "MySQL": ["mysql"],
+    "MongoDB": ["mongodb", "mongo"],
+    "Redis": ["redis"],
+    "Elasticsearch": ["elasticsearch", "elastic search"],
+    "Kafka": ["kafka"],
+    "RabbitMQ": ["rabbitmq"],
+    "Django": ["django"],
+    "Flask": ["flask"],
+    "FastAPI": ["fastapi"],
+    "Spring": ["spring boot", "spring framework"],
+    "React": ["react", "react.js", "reactjs"],
+    "Angular": ["angular"],
+    "Vue": ["vue", "vue.js", "vuejs"],
+    "Node.js": ["node.js", "nodejs"],
+    "HTML": ["html", "html5"],
+    "CSS": ["css", "css3"],
+    "GraphQL": ["graphql"],
+    "REST": ["restful", "rest api", "rest apis"],
+    "Microservices": ["microservices", "microservice"],
+    "Docker": ["docker"],
+    "Kubernetes": ["kubernetes", "k8s"],
+    "Terraform": ["terraform"],
+    "Ansible": ["ansible"],
+    "AWS": ["aws", "amazon web services"],
+    "GCP": ["gcp", "google cloud"],
+    "Azure": ["azure"],
+    "CI/CD": ["ci/cd", "continuous integration", "continuous delivery"],
+    "Jenkins": ["jenkins"],
+    "GitHub Actions": ["github actions"],
+    "GitLab CI": ["gitlab ci"],
+    "Git": ["git"],
+    "Linux": ["linux"],
+    "Machine Learning": ["machine learning", "ml"],
+    "Deep Learning": ["deep learning"],
+    "NLP": ["nlp", "natural language processing"],
+    "TensorFlow": ["tensorflow"],
+    "PyTorch": ["pytorch"],
+    "scikit-learn": ["scikit-learn", "sklearn"],
+    "Pandas": ["pandas"],
+    "NumPy": ["numpy"],
+    "Spark": ["spark", "pyspark", "apache spark"],
+    "MLOps": ["mlops"],
+    "Data Analysis": ["data analysis", "data analytics"],
+    "Agile": ["agile", "scrum", "kanban"],
+    "Leadership": ["leadership", "team lead", "tech lead"],
+    "Communication": ["communication"],
+}
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+PHONE_RE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+WORD_RE = re.compile(r"\w+")
+
+_heading_lookup = {alias: section for section, aliases in SECTION_HEADINGS.items() for alias in aliases}
+_alias_lookup = {alias: skill for skill, aliases in SKILL_DICTIONARY.items() for alias in aliases}
+_skill_re = None
+
+
+class ResumeParseError(Exception):
+    pass
+
+
+def warm_up():
+    _skill_pattern()
+
+
+def _skill_pattern():
+    global _skill_re
+    if _skill_re is None:
+        # Longest aliases first so "react.js" wins over "react".
+        aliases = sorted(_alias_lookup, key=len, reverse=True)
+        _skill_re = re.compile(
+            r"(?<![\w+#])(" + "|".join(re.escape(alias) for alias in aliases) + r")(?![\w+#]|\.\w)",
+            re.IGNORECASE,
+        )
+    return _skill_re
+
+
+def _txt_chunks(path: str) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(CHUNK_SIZE)
+            if not block:
+                break
+            yield decoder.decode(block)
+    yield decoder.decode(b"", final=True)
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def _docx_chunks(path: str) -> Iterator[str]:
+    try:
+        archive = zipfile.ZipFile(path)
+    except zipfile.BadZipFile as e:
+        raise ResumeParseError(f"Not a valid DOCX file: {e}")
+    if "word/document.xml" not in archive.namelist():
+        archive.close()
+        raise ResumeParseError("Not a valid DOCX file: missing word/document.xml")
+    with archive, archive.open("word/document.xml") as document:
+        parts = []
+        try:
+            for event, element in ElementTree.iterparse(document, events=("end",)):
+                if element.tag == f"{_W}t" and element.text:
+                    parts.append(element.text)
+                elif element.tag == f"{_W}tab":
+                    parts.append("\t")
+                elif element.tag == f"{_W}p":
+                    yield "".join(parts) + "\n"
+                    parts = []
+                    element.clear()
+        except (ElementTree.ParseError, zipfile.BadZipFile) as e:
+            raise ResumeParseError(f"Not a valid DOCX file: {e}")
+
+
+def _pdf_chunks(path: str) -> Iterator[str]:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ResumeParseError("PDF support requires the pypdf package")
+    try:
+        reader = PdfReader(path)
+        for page in reader.pages:
+            yield (page.extract_text() or "") + "\n"
+    except Exception as e:
+        # Malformed PDFs fail in pypdf with all kinds of exceptions, not just PdfReadError
+        raise ResumeParseError(f"Could not read PDF: {e}")
+
+
+EXTRACTORS = {
+    ".txt": _txt_chunks,
+    ".text": _txt_chunks,
+    ".md": _txt_chunks,
+    ".docx": _docx_chunks,
+    ".pdf": _pdf_chunks,
+}
+
+
+def extract_text(path: str) -> Iterator[str]:
+    """Yield the text of a resume in chunks"""
+    extension = path[path.rfind("."):].lower() if "." in path else ""
+    extractor = EXTRACTORS.get(extension)
+    if extractor is None:
+        raise ResumeParseError(f"Unsupported resume format: {extension or 'unknown'}")
+    return extractor(path)
+
+
+def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        lines = pending.split("\n")
+        pending = lines.pop()
+        while len(pending) > MAX_LINE_LENGTH:
+            # Break runaway lines at a word boundary to bound memory.
+            cut = pending.rfind(" ", 0, MAX_LINE_LENGTH) + 1 or MAX_LINE_LENGTH
+            lines.append(pending[:cut])
+            pending = pending[cut:]
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+def _heading(line: str):
+    candidate = line.strip().strip(":").strip().lower()
+    if not candidate or len(candidate) > 40:
+        return None
+    return _heading_lookup.get(candidate)
+
+
+def parse_lines(lines: Iterable[str]) -> Dict:
+    """Segment resume lines into sections and extract skills in a single pass"""
+    pattern = _skill_pattern()
+    section = "header"
+    excerpts: Dict[str, List[str]] = {}
+    excerpt_sizes: Counter = Counter()
+    skill_counts: Counter = Counter()
+    skill_sections: Dict[str, set] = {}
+    word_count = 0
+    email = phone = None
+
+    for line in lines:
+        heading = _heading(line)
+        if heading:
+            section = heading
+            continue
+        text = line.strip()
+        if not text:
+            continue
+
+        word_count += len(WORD_RE.findall(text))
+        if email is None:
+            match = EMAIL_RE.search(text)
+            email = match.group(0) if match else None
+        if phone is None:
+            match = PHONE_RE.search(text)
+            phone = match.group(0).strip() if match else None
+
+        for match in pattern.finditer(text):
+            skill = _alias_lookup[match.group(1).lower()]
+            skill_counts[skill] += 1
+            skill_sections.setdefault(skill, set()).add(section)
+
+        # Keep a bounded excerpt per section rather than the full text.
+        room = SECTION_EXCERPT_LENGTH - excerpt_sizes[section]
+        if room > 0:
+            excerpts.setdefault(section, []).append(text[:room])
+            excerpt_sizes[section] += min(len(text), room) + 1
+
+    return {
+        "parser_version": PARSER_VERSION,
+        "word_count": word_count,
+        "email": email,
+        "phone": phone,
+        "sections": {name: "\n".join(parts) for name, parts in excerpts.items()},
+        "skills": [skill for skill, _ in skill_counts.most_common()],
+        "skill_counts": dict(skill_counts),
+        "skill_sections": {skill: sorted(sections) for skill, sections in skill_sections.items()},
+    }
+
+
+def find_skills(text: str) -> List[str]:
+    """Skills mentioned in free text (e.g. a job description), most frequent first"""
+    counts = Counter(_alias_lookup[match.group(1).lower()] for match in _skill_pattern().finditer(text))
+    return [skill for skill, _ in counts.most_common()]
+
+
+def parse_resume(path: str) -> Dict:
+    """Parse a resume file into a structured profile"""
+    return parse_lines(iter_lines(extract_text(path)))
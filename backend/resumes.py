@@ -0,0 +1,114 @@
+"""
+Resume processing pipeline.
+
+Uploads are hashed while they are streamed to disk; the content hash keys the
+``ParsedResume`` cache so identical files (re-uploads, the same CV sent to
+several jobs, re-scoring) are parsed only once. Parsing is CPU-bound and runs
+in a process pool so it never blocks the event loop or holds the GIL of the
+API worker.
+"""
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import resume_parser
+from models import ParsedResume
+from settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn, not fork: the API process is multi-threaded.
+                _executor = ProcessPoolExecutor(
+                    max_workers=get_settings().resume_parse_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=resume_parser.warm_up,
+                )
+    return _executor
+
+
+def warm_up():
+    resume_parser.warm_up()
+    # Start the pool processes now rather than on the first upload.
+    _get_executor().submit(resume_parser.warm_up).result()
+
+
+def shut_down():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+def save_upload(source: BinaryIO, file_path: str) -> str:
+    """Copy an upload to disk in chunks and return its sha256 hex digest"""
+    digest = hashlib.sha256()
+    with open(file_path, "wb") as buffer:
+        while True:
+            chunk = source.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            buffer.write(chunk)
+    return digest.hexdigest()
+
+
+def hash_file(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_cached_profile(db: Session, content_hash: str) -> Optional[Dict]:
+    cached = db.get(ParsedResume, content_hash)
+    if cached is None or cached.parser_version != resume_parser.PARSER_VERSION:
+        return None
+    return cached.profile
+
+
+def _store_profile(db: Session, content_hash: str, profile: Dict):
+    cached = db.get(ParsedResume, content_hash)
+    if cached is not None:
+        cached.parser_version = resume_parser.PARSER_VERSION
+        cached.profile = profile
+    else:
+        db.add(ParsedResume(content_hash=content_hash, parser_version=resume_parser.PARSER_VERSION, profile=profile))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another worker parsed the same file concurrently; its result is as good as ours.
+        db.rollback()
+
+
+async def parse_resume(db: Session, file_path: str, content_hash: Optional[str] = None) -> Tuple[str, Dict]:
+    """Return ``(content_hash, profile)`` for a stored resume, parsing it only on a cache miss"""
+    if content_hash is None:
+        content_hash = await asyncio.to_thread(hash_file, file_path)
+    profile = get_cached_profile(db, content_hash)
+    if profile is not None:
+        return content_hash, profile
+    loop = asyncio.get_running_loop()
+    profile = await loop.run_in_executor(_get_executor(), resume_parser.parse_resume, file_path)
+    profile["content_hash"] = content_hash
+    _store_profile(db, content_hash, profile)
+    return content_hash, profile
@@ -1,31 +1,56 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer_group
 from sqlalchemy import func
-from typing import List
+from datetime import datetime
+from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
 from database import get_db
-from models import User, Job, Application, Interview, UserRole
-from schemas import UserResponse, ApplicationResponse
-from auth import require_role
+from replication import get_read_db, require_platform_reader, require_read_role
+from models import (
+    User, Job, Application, ApplicationStatus, Interview, ArchivedApplication, ArchivedInterview,
+    DuplicateCandidate, RescoreRun, UserRole
+)
+from schemas import BulkStatusResult, BulkStatusUpdate, UserResponse, ApplicationResponse
+from auth import require_platform_admin, require_role
+from bulk import transition_applications
+from cache import LockTimeout
+import archive
+import rescoring
+from startup import lazy_import
+import metrics
+
+analytics = lazy_import("analytics")
+dedup = lazy_import("dedup")
 
 router = APIRouter()
 
 @router.get("/dashboard")
 def get_admin_dashboard(
-    current_user: User = Depends(require_role("admin")),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_read_role("admin")),
+    db: Session = Depends(get_read_db)
 ):
     """Get admin dashboard statistics"""
     total_candidates = db.query(User).filter(User.role == UserRole.CANDIDATE).count()
     total_recruiters = db.query(User).filter(User.role == UserRole.RECRUITER).count()
     total_jobs = db.query(Job).count()
-    total_applications = db.query(Application).count()
-    total_interviews = db.query(Interview).count()
+    archived_applications = db.query(ArchivedApplication).count()
+    archived_interviews = db.query(ArchivedInterview).count()
+    # Totals include the archive (finished applications and their interviews)
+    total_applications = db.query(Application).count() + archived_applications
+    total_interviews = db.query(Interview).count() + archived_interviews
     
     # Interviews completed
-    completed_interviews = db.query(Interview).filter(Interview.status == "completed").count()
+    completed_interviews = sum(
+        db.query(model).filter(model.status == "completed").count() for model in (Interview, ArchivedInterview)
+    )
     
     # Average score
-    avg_score = db.query(func.avg(Interview.score)).filter(Interview.score.isnot(None)).scalar() or 0
+    score_sum = score_count = 0
+    for model in (Interview, ArchivedInterview):
+        total, count = db.query(func.sum(model.score), func.count(model.score)).one()
+        score_sum += total or 0
+        score_count += count
+    avg_score = score_sum / score_count if score_count else 0
     
     return {
         "total_candidates": total_candidates,
@@ -34,13 +59,15 @@ def get_admin_dashboard(
         "total_applications": total_applications,
         "total_interviews": total_interviews,
         "completed_interviews": completed_interviews,
-        "average_score": round(float(avg_score), 2)
+        "average_score": round(float(avg_score), 2),
+        "archived_applications": archived_applications,
+        "archived_interviews": archived_interviews
     }
 
 @router.get("/candidates", response_model=List[UserResponse])
 def get_all_candidates(
-    current_user: User = Depends(require_role("admin")),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_read_role("admin")),
+    db: Session = Depends(get_read_db)
 ):
     """Get all candidates"""
     candidates = db.query(User).filter(User.role == UserRole.CANDIDATE).all()
@@ -48,8 +75,8 @@ def get_all_candidates(
 
 @router.get("/recruiters", response_model=List[UserResponse])
 def get_all_recruiters(
-    current_user: User = Depends(require_role("admin")),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_read_role("admin")),
+    db: Session = Depends(get_read_db)
 ):
     """Get all recruiters"""
     recruiters = db.query(User).filter(User.role == UserRole.RECRUITER).all()
@@ -57,15 +84,21 @@ def get_all_recruiters(
 
 @router.get("/interviews")
 def get_all_interviews(
-    current_user: User = Depends(require_role("admin")),
-    db: Session = Depends(get_db)
+    include_archived: bool = False,
+    current_user: User = Depends(require_read_role("admin")),
+    db: Session = Depends(get_read_db)
 ):
     """Get all interviews with AI analysis"""
-    interviews = db.query(Interview).all()
+    interviews = db.query(Interview).options(undefer_group("transcript")).all()
+    if include_archived:
+        interviews += db.query(ArchivedInterview).options(undefer_group("transcript")).all()
     
     result = []
     for interview in interviews:
-        application = db.query(Application).filter(Application.id == interview.application_id).first()
+        # Archived interviews' applications are archived with them (same ids)
+        archived = isinstance(interview, ArchivedInterview)
+        application_model = ArchivedApplication if archived else Application
+        application = db.query(application_model).filter(application_model.id == interview.application_id).first()
         candidate = db.query(User).filter(User.id == application.candidate_id).first()
         job = db.query(Job).filter(Job.id == application.job_id).first()
         
@@ -79,18 +112,22 @@ def get_all_interviews(
             "questions": interview.questions,
             "answers": interview.answers,
             "ai_analysis": interview.ai_analysis,
-            "completed_at": interview.completed_at
+            "completed_at": interview.completed_at,
+            "archived": archived
         })
     
     return result
 
 @router.get("/applications")
 def get_all_applications(
-    current_user: User = Depends(require_role("admin")),
-    db: Session = Depends(get_db)
+    include_archived: bool = False,
+    current_user: User = Depends(require_read_role("admin")),
+    db: Session = Depends(get_read_db)
 ):
     """Get all applications"""
     applications = db.query(Application).all()
+    if include_archived:
+        applications += db.query(ArchivedApplication).all()
     
     result = []
     for app in applications:
@@ -103,7 +140,180 @@ def get_all_applications(
             "candidate_email": candidate.email,
             "job_title": job.title,
             "status": app.status,
-            "applied_at": app.applied_at
+            "applied_at": app.applied_at,
+            "archived": isinstance(app, ArchivedApplication)
         })
     
     return result
+
+@router.get("/metrics")
+def get_metrics(current_user: User = Depends(require_platform_admin)):
+    """Get request metrics (shed requests, etc.) for the worker serving this request"""
+    return metrics.snapshot()
+
+@router.post("/reports/export")
+async def export_reports(
+    full: bool = False,
+    current_user: User = Depends(require_platform_admin)
+):
+    """Export newly completed interviews to the analytics dataset"""
+    try:
+        return await run_in_threadpool(analytics.export_interview_scores, full)
+    except LockTimeout:
+        raise HTTPException(status_code=409, detail="An export is already running")
+
+@router.get("/reports/scores")
+async def get_score_report(
+    group_by: str = "job",
+    metric: str = "score",
+    percentiles: str = "50,90",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current_user: User = Depends(require_platform_admin)
+):
+    """Get score distributions from the analytics dataset (as of the last export)"""
+    try:
+        values = [float(p) for p in percentiles.split(",") if p.strip()]
+        return await run_in_threadpool(analytics.score_report, group_by, metric, values, since, until)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="percentiles must be a comma-separated list of numbers")
+    except analytics.AnalyticsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/archive")
+async def run_archive(
+    vacuum: bool = False,
+    current_user: User = Depends(require_platform_admin)
+):
+    """Move finished applications and interviews past the retention age to the archive tables"""
+    try:
+        return await run_in_threadpool(archive.archive_finished, vacuum)
+    except LockTimeout:
+        raise HTTPException(status_code=409, detail="Archiving is already running")
+
+@router.get("/archive/stats")
+async def get_archive_stats(current_user: User = Depends(require_platform_admin)):
+    """Get row counts and sizes of the hot and archive tables"""
+    return await run_in_threadpool(archive.table_stats)
+
+@router.get("/duplicates")
+def get_duplicate_candidates(
+    current_user: User = Depends(require_platform_reader),
+    db: Session = Depends(get_read_db)
+):
+    """Get candidate accounts flagged as probably belonging to the same person"""
+    flags = db.query(DuplicateCandidate).order_by(DuplicateCandidate.detected_at.desc()).all()
+    user_ids = {flag.user_id for flag in flags} | {flag.duplicate_user_id for flag in flags}
+    users = {user.id: user for user in db.query(User).filter(User.id.in_(user_ids))}
+    job_ids = {}
+    for candidate_id, job_id in db.query(Application.candidate_id, Application.job_id).filter(
+        Application.candidate_id.in_(user_ids)
+    ):
+        job_ids.setdefault(candidate_id, set()).add(job_id)
+    
+    def describe(user_id):
+        user = users.get(user_id)
+        return {
+            "user_id": user_id,
+            "full_name": user.full_name if user else None,
+            "email": user.email if user else None
+        }
+    
+    return [{
+        "id": flag.id,
+        "candidate": describe(flag.user_id),
+        "duplicate": describe(flag.duplicate_user_id),
+        "resume_similarity": flag.resume_similarity,
+        "name_similarity": flag.name_similarity,
+        "reasons": flag.reasons,
+        "shared_job_ids": sorted(job_ids.get(flag.user_id, set()) & job_ids.get(flag.duplicate_user_id, set())),
+        "detected_at": flag.detected_at
+    } for flag in flags]
+
+@router.post("/duplicates/scan")
+async def scan_duplicate_candidates(current_user: User = Depends(require_platform_admin)):
+    """Re-index every candidate and flag all duplicate accounts"""
+    try:
+        return await run_in_threadpool(dedup.scan_all)
+    except LockTimeout:
+        raise HTTPException(status_code=409, detail="A scan is already running")
+
+@router.post("/applications/status", response_model=BulkStatusResult)
+def update_application_statuses(
+    update: BulkStatusUpdate,
+    current_user: User = Depends(require_role("admin")),
+    db: Session = Depends(get_db)
+):
+    """Accept or reject many applications at once"""
+    return transition_applications(db, update.application_ids, ApplicationStatus(update.status))
+
+@router.post("/rescore")
+def rescore_interviews(
+    job_id: Optional[int] = None,
+    current_user: User = Depends(require_role("admin")),
+    db: Session = Depends(get_db)
+):
+    """Rescore the completed interviews of a job, or of all jobs, in the background"""
+    if job_id is not None and not db.query(Job.id).filter(Job.id == job_id).first():
+        raise HTTPException(status_code=404, detail="Job not found")
+    try:
+        run = rescoring.request_run(db, current_user.id, job_id)
+    except rescoring.RunInProgress:
+        raise HTTPException(status_code=409, detail="A rescoring run for these interviews is already in progress")
+    return rescoring.serialize(run)
+
+@router.get("/rescore")
+def get_rescore_runs(
+    status: Optional[str] = None,
+    limit: int = 50,
+    current_user: User = Depends(require_role("admin")),
+    db: Session = Depends(get_db)
+):
+    """Get the latest rescoring runs and their progress"""
+    query = db.query(RescoreRun)
+    if status:
+        query = query.filter(RescoreRun.status == status)
+    return [rescoring.serialize(run) for run in query.order_by(RescoreRun.id.desc()).limit(limit)]
+
+def _run(db: Session, run_id: int) -> RescoreRun:
+    run = db.query(RescoreRun).filter(RescoreRun.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Rescoring run not found")
+    return run
+
+@router.get("/rescore/{run_id}")
+def get_rescore_run(
+    run_id: int,
+    current_user: User = Depends(require_role("admin")),
+    db: Session = Depends(get_db)
+):
+    """Get the progress of a rescoring run"""
+    return rescoring.serialize(_run(db, run_id))
+
+@router.post("/rescore/{run_id}/cancel")
+def cancel_rescore_run(
+    run_id: int,
+    current_user: User = Depends(require_role("admin")),
+    db: Session = Depends(get_db)
+):
+    """Stop a rescoring run after the batch in progress"""
+    _run(db, run_id)
+    if not rescoring.cancel_run(db, run_id):
+        raise HTTPException(status_code=409, detail="The run has already finished")
+    return rescoring.serialize(_run(db, run_id))
+
+@router.post("/rescore/{run_id}/resume")
+def resume_rescore_run(
+    run_id: int,
+    current_user: User = Depends(require_role("admin")),
+    db: Session = Depends(get_db)
+):
+    """Continue a cancelled or failed rescoring run where it stopped"""
+    _run(db, run_id)
+    try:
+        resumed = rescoring.resume_run(db, run_id)
+    except rescoring.RunInProgress:
+        raise HTTPException(status_code=409, detail="Another rescoring run for these interviews is in progress")
+    if not resumed:
+        raise HTTPException(status_code=409, detail="Only cancelled or failed runs can be resumed")
+    return rescoring.serialize(_run(db, run_id))
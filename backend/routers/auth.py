@@ -1,24 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from database import get_db
 from models import User
 from schemas import UserLogin, Token, UserResponse
-from auth import verify_password, create_access_token
+from auth import create_access_token, get_current_user
+from tenants import authenticate
 
 router = APIRouter()
 
 @router.post("/login", response_model=Token)
-def login(user_data: UserLogin, db: Session = Depends(get_db)):
+def login(user_data: UserLogin):
     """Login endpoint for all user types"""
-    user = db.query(User).filter(User.email == user_data.email).first()
+    users = authenticate(user_data.email, user_data.password, user_data.organization)
     
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    if not users:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
+    if len(users) > 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="This account exists in several organizations; specify the organization"
+        )
+    user = users[0]
     
-    access_token = create_access_token(data={"sub": user.email})
+    # The role claim lets middleware (rate limiting) classify requests without a DB lookup;
+    # the org claim tells it which organization (and shard) the request is for
+    access_token = create_access_token(
+        data={"sub": user.email, "role": user.role.value, "org": user.organization_id}
+    )
     
     return {
         "access_token": access_token,
@@ -29,5 +38,4 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
 @router.get("/me", response_model=UserResponse)
 def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current logged in user information"""
-    from auth import get_current_user
     return UserResponse.from_orm(current_user)
@@ -1,23 +1,35 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, undefer_group
 from typing import List
 from datetime import datetime
 from database import get_db
-from models import User, Job, Application, Interview, ApplicationStatus
+from replication import get_read_db, require_read_role
+from models import User, Job, Application, Interview, ArchivedApplication, ArchivedInterview, ApplicationStatus
 from schemas import JobResponse, ApplicationCreate, ApplicationResponse, AnswerSubmit
 from auth import require_role
+from settings import get_settings
+from startup import lazy_import
+import interview_sessions
+import interviews
+from events import record_event, record_status_change
+import logging
 import os
-import shutil
+
+logger = logging.getLogger(__name__)
+
+resumes = lazy_import("resumes")
+interview_engine = lazy_import("interview_engine")
+dedup = lazy_import("dedup")
 
 router = APIRouter()
 
-UPLOAD_DIR = "uploads/resumes"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+UPLOAD_DIR = get_settings().upload_dir
 
 @router.get("/dashboard")
 def get_candidate_dashboard(
-    current_user: User = Depends(require_role("candidate")),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_read_role("candidate")),
+    db: Session = Depends(get_read_db)
 ):
     """Get candidate dashboard statistics"""
     total_applications = db.query(Application).filter(Application.candidate_id == current_user.id).count()
@@ -46,8 +58,8 @@ def get_candidate_dashboard(
 
 @router.get("/jobs", response_model=List[JobResponse])
 def get_available_jobs(
-    current_user: User = Depends(require_role("candidate")),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_read_role("candidate")),
+    db: Session = Depends(get_read_db)
 ):
     """Get all available job postings"""
     jobs = db.query(Job).filter(Job.status == "active").all()
@@ -66,6 +78,12 @@ def apply_for_job(
         Application.job_id == application.job_id
     ).first()
     
+    if not existing:
+        existing = db.query(ArchivedApplication).filter(
+            ArchivedApplication.candidate_id == current_user.id,
+            ArchivedApplication.job_id == application.job_id
+        ).first()
+    
     if existing:
         raise HTTPException(status_code=400, detail="Already applied for this job")
     
@@ -75,6 +93,13 @@ def apply_for_job(
         status=ApplicationStatus.PENDING
     )
     db.add(new_application)
+    db.flush()
+    record_event(
+        db, "application.created", "application", new_application.id,
+        job_id=new_application.job_id,
+        candidate_id=current_user.id,
+        status=ApplicationStatus.PENDING.value
+    )
     db.commit()
     db.refresh(new_application)
     
@@ -100,46 +125,70 @@ async def upload_resume(
     file_extension = os.path.splitext(file.filename)[1]
     filename = f"resume_{current_user.id}_{application_id}{file_extension}"
     file_path = os.path.join(UPLOAD_DIR, filename)
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    
+    content_hash = resumes.save_upload(file.file, file_path)
     
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Parse (or reuse the cached parse of an identical file)
+    try:
+        _, application.parsed_profile = await resumes.parse_resume(db, file_path, content_hash)
+    except resumes.resume_parser.ResumeParseError as e:
+        logger.warning("Could not parse resume %s: %s", file_path, e)
+        application.parsed_profile = None
     
     # Update application
     application.resume_path = file_path
+    application.resume_hash = content_hash
+    record_status_change(db, application, application.status, ApplicationStatus.INTERVIEWING)
     application.status = ApplicationStatus.INTERVIEWING
-    db.commit()
     
-    # Create interview with sample questions
+    # Create the interview; the adaptive engine picks one question at a time
+    first_question, engine_state = interview_engine.start(application.job_id)
     interview = Interview(
         application_id=application.id,
-        questions=[
-            {"id": 1, "text": "Tell me about your experience with Python programming?", "type": "technical"},
-            {"id": 2, "text": "Describe a challenging project you worked on and how you overcame obstacles.", "type": "behavioral"},
-            {"id": 3, "text": "What interests you about this position?", "type": "general"},
-            {"id": 4, "text": "How do you stay updated with new technologies?", "type": "general"},
-            {"id": 5, "text": "Describe your experience working in a team environment.", "type": "behavioral"}
-        ],
+        questions=[first_question],
         answers=[],
+        engine_state=engine_state,
         status="in_progress",
         started_at=datetime.utcnow()
     )
     db.add(interview)
+    db.flush()
+    record_event(
+        db, "interview.started", "interview", interview.id,
+        application_id=application.id,
+        job_id=application.job_id,
+        candidate_id=current_user.id
+    )
     db.commit()
     
+    # Flag other accounts that look like this candidate (best effort)
+    try:
+        await run_in_threadpool(dedup.index_candidate, current_user.id, application.parsed_profile, content_hash)
+    except Exception:
+        logger.exception("Duplicate check failed for candidate %s", current_user.id)
+    
     return {"message": "Resume uploaded successfully", "interview_id": interview.id}
 
 @router.get("/my-applications")
 def get_my_applications(
-    current_user: User = Depends(require_role("candidate")),
-    db: Session = Depends(get_db)
+    include_archived: bool = False,
+    current_user: User = Depends(require_read_role("candidate")),
+    db: Session = Depends(get_read_db)
 ):
     """Get all applications by current candidate"""
     applications = db.query(Application).filter(Application.candidate_id == current_user.id).all()
+    if include_archived:
+        applications += db.query(ArchivedApplication).filter(
+            ArchivedApplication.candidate_id == current_user.id
+        ).all()
     
     result = []
     for app in applications:
+        archived = isinstance(app, ArchivedApplication)
+        interview_model = ArchivedInterview if archived else Interview
         job = db.query(Job).filter(Job.id == app.job_id).first()
-        interview = db.query(Interview).filter(Interview.application_id == app.id).first()
+        interview = db.query(interview_model).filter(interview_model.application_id == app.id).first()
         
         result.append({
             "application_id": app.id,
@@ -149,7 +198,8 @@ def get_my_applications(
             "applied_at": app.applied_at,
             "has_interview": interview is not None,
             "interview_id": interview.id if interview else None,
-            "interview_status": interview.status if interview else None
+            "interview_status": interview.status if interview else None,
+            "archived": archived
         })
     
     return result
@@ -161,26 +211,44 @@ def get_interview(
     db: Session = Depends(get_db)
 ):
     """Get interview questions"""
-    interview = db.query(Interview).filter(Interview.id == interview_id).first()
+    application_model = Application
+    interview = db.query(Interview).options(undefer_group("transcript")).filter(Interview.id == interview_id).first()
+    if not interview:
+        # Finished interviews may have been archived (with their application)
+        application_model = ArchivedApplication
+        interview = db.query(ArchivedInterview).options(undefer_group("transcript")).filter(
+            ArchivedInterview.id == interview_id
+        ).first()
     
     if not interview:
         raise HTTPException(status_code=404, detail="Interview not found")
     
     # Verify interview belongs to candidate
-    application = db.query(Application).filter(
-        Application.id == interview.application_id,
-        Application.candidate_id == current_user.id
+    application = db.query(application_model).filter(
+        application_model.id == interview.application_id,
+        application_model.candidate_id == current_user.id
     ).first()
     
     if not application:
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    # A live WebSocket session may hold answers not yet written to the DB
+    questions = interview.questions or []
+    answers = interview.answers or []
+    engine_state = interview.engine_state
+    session = interview_sessions.get_cached_session(interview_id)
+    if session is not None and len(session["answers"]) > len(answers):
+        answers = session["answers"]
+    if session is not None and len(session["questions"]) > len(questions):
+        questions, engine_state = session["questions"], session.get("engine_state")
+    
     return {
         "interview_id": interview.id,
-        "questions": interview.questions,
-        "answers": interview.answers,
+        "questions": questions,
+        "answers": answers,
         "status": interview.status,
-        "current_question": len(interview.answers or [])
+        "current_question": len(answers),
+        "total_questions": interviews.total_questions(questions, engine_state)
     }
 
 @router.post("/interview/{interview_id}/answer")
@@ -191,7 +259,7 @@ def submit_answer(
     db: Session = Depends(get_db)
 ):
     """Submit answer to interview question"""
-    interview = db.query(Interview).filter(Interview.id == interview_id).first()
+    interview = db.query(Interview).options(undefer_group("transcript")).filter(Interview.id == interview_id).first()
     
     if not interview:
         raise HTTPException(status_code=404, detail="Interview not found")
@@ -205,8 +273,8 @@ def submit_answer(
     if not application:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Add answer
-    answers = interview.answers or []
+    # Add answer (copy so the JSON column registers the change)
+    answers = list(interview.answers or [])
     answers.append({
         "question_id": answer.question_id,
         "answer": answer.answer,
@@ -214,22 +282,15 @@ def submit_answer(
     })
     interview.answers = answers
     
-    # Check if all questions answered
-    if len(answers) >= len(interview.questions):
-        interview.status = "completed"
-        interview.completed_at = datetime.utcnow()
-        application.status = ApplicationStatus.COMPLETED
-        
-        # Mock AI scoring
-        interview.score = 75.5
-        interview.ai_analysis = {
-            "overall_assessment": "Strong candidate with good technical knowledge",
-            "strengths": ["Clear communication", "Relevant experience", "Problem-solving skills"],
-            "areas_for_improvement": ["Could provide more specific examples", "Technical depth in certain areas"],
-            "recommendation": "Proceed to next round"
-        }
+    # Pick the next question, or finish when there is none
+    interview.questions, interview.engine_state, question = interviews.next_question(
+        interview.id, interview.questions or [], interview.engine_state, answers
+    )
+    if question is None:
+        interviews.finalize_interview(db, interview, application, answers)
     
     db.commit()
+    interview_sessions.invalidate(interview_id)
     
     return {
         "message": "Answer submitted successfully",
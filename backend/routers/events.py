@@ -0,0 +1,60 @@
+import asyncio
+import json
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+
+from auth import require_platform_admin
+from events import dispatcher, fetch_page
+from models import User
+
+router = APIRouter()
+
+SSE_KEEPALIVE_SECONDS = 15
+
+@router.get("")
+async def get_events(
+    after: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    wait: float = Query(0, ge=0, le=60),
+    type: Optional[List[str]] = Query(None),
+    current_user: User = Depends(require_platform_admin)
+):
+    """Get state-change events after a cursor, long-polling up to `wait` seconds for new ones"""
+    loop = asyncio.get_running_loop()
+    give_up_at = loop.time() + wait
+    events, cursor = await asyncio.to_thread(fetch_page, after, limit, type)
+    # Newer events of other types wake us too; keep waiting for a matching one
+    while not events and loop.time() < give_up_at:
+        if not await dispatcher.wait_for_events(cursor, give_up_at - loop.time()):
+            break
+        events, cursor = await asyncio.to_thread(fetch_page, cursor, limit, type)
+    return {
+        "events": events,
+        "next": cursor
+    }
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    after: Optional[int] = Query(None, ge=0),
+    type: Optional[List[str]] = Query(None),
+    last_event_id: Optional[int] = Header(None),
+    current_user: User = Depends(require_platform_admin)
+):
+    """Server-sent events feed; resumes from `Last-Event-ID` on reconnect"""
+    cursor = last_event_id if last_event_id is not None else (after or 0)
+
+    async def generate():
+        nonlocal cursor
+        while not await request.is_disconnected():
+            events, cursor = await asyncio.to_thread(fetch_page, cursor, 500, type)
+            for item in events:
+                yield f"id: {item['id']}\nevent: {item['type']}\ndata: {json.dumps(item)}\n\n"
+            if events:
+                continue
+            if not await dispatcher.wait_for_events(cursor, SSE_KEEPALIVE_SECONDS):
+                yield ": keepalive\n\n"
+
+    return StreamingResponse(generate(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -0,0 +1,205 @@
+"""
+Live interview channel over WebSocket.
+
+    ws://<host>/api/candidate/interview/{interview_id}/ws?token=<access token>
+
+The client authenticates once when connecting. The server then pushes
+messages and the client only ever sends answers:
+
+    server -> {"type": "session", "interview_id", "questions", "answers", "status", "current_question"}
+    server -> {"type": "question", "index", "total", "question"}
+    client -> {"type": "answer", "question_id", "answer"}
+    server -> {"type": "follow_up_delta", "question_id", "delta"}   (streamed)
+    server -> {"type": "follow_up", "question_id", "text"}
+    client -> {"type": "follow_up_answer", "question_id", "answer"}
+    server -> {"type": "completed", "interview_id"}
+    server -> {"type": "error", "detail"}
+"""
+
+import asyncio
+from datetime import datetime
+
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+from sqlalchemy.orm import undefer_group
+
+import interview_sessions
+import interviews
+from auth import get_user_from_token
+from database import SessionLocal
+from interview_sessions import answer_writer
+from models import Application, Interview, UserRole
+from startup import lazy_import
+
+scoring = lazy_import("scoring")
+
+router = APIRouter()
+
+
+def _open_session(token: str, interview_id: int):
+    db = SessionLocal()
+    try:
+        user = get_user_from_token(token, db)
+        if user is None or user.role != UserRole.CANDIDATE:
+            return None
+        return interview_sessions.load_session(db, interview_id, user.id)
+    finally:
+        db.close()
+
+
+def _complete(session):
+    db = SessionLocal()
+    try:
+        interview = db.query(Interview).options(undefer_group("transcript")).filter(
+            Interview.id == session["interview_id"]
+        ).first()
+        application = db.query(Application).filter(Application.id == session["application_id"]).first()
+        interviews.finalize_interview(db, interview, application, session["answers"])
+        db.commit()
+    finally:
+        db.close()
+
+
+def _current_question(session):
+    index = len(session["answers"])
+    if index >= len(session["questions"]):
+        return None
+    return session["questions"][index]
+
+
+async def _send_question(websocket: WebSocket, session):
+    await websocket.send_json({
+        "type": "question",
+        "index": len(session["answers"]),
+        "total": interviews.total_questions(session["questions"], session.get("engine_state")),
+        "question": _current_question(session),
+    })
+
+
+def _next_question(session):
+    # May load the job's question bank from the database on first use.
+    engine_state = session.get("engine_state")
+    session["questions"], session["engine_state"], question = interviews.next_question(
+        session["interview_id"], session["questions"], engine_state, session["answers"]
+    )
+    if session["engine_state"] is not engine_state:
+        interview_sessions.save_session(session)
+        answer_writer.checkpoint(session["interview_id"], session["questions"], session["engine_state"])
+    return question
+
+
+async def _advance(websocket: WebSocket, session):
+    """Finish the interview or push the next question"""
+    question = await asyncio.to_thread(_next_question, session)
+    if question is None:
+        await answer_writer.flush(session["interview_id"])
+        await asyncio.to_thread(_complete, session)
+        session["status"] = "completed"
+        await asyncio.to_thread(interview_sessions.save_session, session)
+        await websocket.send_json({"type": "completed", "interview_id": session["interview_id"]})
+        return True
+    await _send_question(websocket, session)
+    return False
+
+
+async def _handle_answer(websocket: WebSocket, session, message):
+    question = _current_question(session)
+    if session["pending_follow_up"] is not None:
+        await websocket.send_json({"type": "error", "detail": "Answer the follow-up question first"})
+        return False
+    if question is None or message.get("question_id") != question["id"]:
+        await websocket.send_json({"type": "error", "detail": "Unexpected question_id"})
+        return False
+
+    answer = {
+        "question_id": question["id"],
+        "answer": message.get("answer") or "",
+        "answered_at": datetime.utcnow().isoformat()
+    }
+    position = len(session["answers"])
+    session["answers"].append(answer)
+    answer_writer.add(session["interview_id"], position, answer)
+
+    # Stream an AI follow-up for incomplete answers (DESIGN_DOCUMENT.md §3.4)
+    parts = []
+    async for delta in scoring.stream_follow_up(question, answer["answer"]):
+        parts.append(delta)
+        await websocket.send_json({"type": "follow_up_delta", "question_id": question["id"], "delta": delta})
+    if parts:
+        text = "".join(parts).strip()
+        session["pending_follow_up"] = {"question_id": question["id"], "text": text}
+        await asyncio.to_thread(interview_sessions.save_session, session)
+        await websocket.send_json({"type": "follow_up", "question_id": question["id"], "text": text})
+        return False
+
+    await asyncio.to_thread(interview_sessions.save_session, session)
+    return await _advance(websocket, session)
+
+
+async def _handle_follow_up_answer(websocket: WebSocket, session, message):
+    pending = session["pending_follow_up"]
+    if pending is None or message.get("question_id") != pending["question_id"]:
+        await websocket.send_json({"type": "error", "detail": "No follow-up question pending"})
+        return False
+
+    position = len(session["answers"]) - 1
+    answer = dict(session["answers"][position])
+    answer["follow_up"] = {
+        "question": pending["text"],
+        "answer": message.get("answer") or "",
+        "answered_at": datetime.utcnow().isoformat()
+    }
+    session["answers"][position] = answer
+    session["pending_follow_up"] = None
+    answer_writer.add(session["interview_id"], position, answer)
+    await asyncio.to_thread(interview_sessions.save_session, session)
+    return await _advance(websocket, session)
+
+
+HANDLERS = {
+    "answer": _handle_answer,
+    "follow_up_answer": _handle_follow_up_answer,
+}
+
+
+@router.websocket("/interview/{interview_id}/ws")
+async def interview_socket(websocket: WebSocket, interview_id: int, token: str = Query(...)):
+    """Live interview session"""
+    session = await asyncio.to_thread(_open_session, token, interview_id)
+    if session is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    await websocket.send_json({
+        "type": "session",
+        "interview_id": session["interview_id"],
+        "questions": session["questions"],
+        "answers": session["answers"],
+        "status": session["status"],
+        "current_question": len(session["answers"]),
+    })
+    if session["status"] == "completed":
+        await websocket.close()
+        return
+
+    try:
+        if session["pending_follow_up"] is not None:
+            pending = session["pending_follow_up"]
+            await websocket.send_json({"type": "follow_up", "question_id": pending["question_id"], "text": pending["text"]})
+        elif await _advance(websocket, session):
+            await websocket.close()
+            return
+
+        while True:
+            message = await websocket.receive_json()
+            handler = HANDLERS.get(message.get("type"))
+            if handler is None:
+                await websocket.send_json({"type": "error", "detail": "Unknown message type"})
+                continue
+            if await handler(websocket, session, message):
+                await websocket.close()
+                return
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await answer_writer.flush(interview_id)
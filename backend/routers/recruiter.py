@@ -1,17 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal, Optional
 from database import get_db
-from models import User, Job, Application, Interview
-from schemas import JobCreate, JobResponse
+from exports import FORMATS, export_applicants
+from replication import detached_read_session, get_read_db, require_read_role
+from models import User, Job, Application, ApplicationStatus, ArchivedApplication, ArchivedInterview, Interview, RescoreRun
+from schemas import BulkStatusResult, BulkStatusUpdate, JobCreate, JobResponse
 from auth import require_role
+from bulk import transition_applications
+from leaderboard import leaderboards
+import rescoring
 
 router = APIRouter()
 
 @router.get("/dashboard")
 def get_recruiter_dashboard(
-    current_user: User = Depends(require_role("recruiter")),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_read_role("recruiter")),
+    db: Session = Depends(get_read_db)
 ):
     """Get recruiter dashboard statistics"""
     my_jobs = db.query(Job).filter(Job.recruiter_id == current_user.id).count()
@@ -52,8 +58,8 @@ def create_job(
 
 @router.get("/jobs", response_model=List[JobResponse])
 def get_my_jobs(
-    current_user: User = Depends(require_role("recruiter")),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_read_role("recruiter")),
+    db: Session = Depends(get_read_db)
 ):
     """Get all jobs posted by current recruiter"""
     jobs = db.query(Job).filter(Job.recruiter_id == current_user.id).all()
@@ -62,8 +68,9 @@ def get_my_jobs(
 @router.get("/jobs/{job_id}/applications")
 def get_job_applications(
     job_id: int,
-    current_user: User = Depends(require_role("recruiter")),
-    db: Session = Depends(get_db)
+    include_archived: bool = False,
+    current_user: User = Depends(require_read_role("recruiter")),
+    db: Session = Depends(get_read_db)
 ):
     """Get all applications for a specific job"""
     # Verify job belongs to recruiter
@@ -72,11 +79,16 @@ def get_job_applications(
         raise HTTPException(status_code=404, detail="Job not found")
     
     applications = db.query(Application).filter(Application.job_id == job_id).all()
+    if include_archived:
+        applications += db.query(ArchivedApplication).filter(ArchivedApplication.job_id == job_id).all()
     
     result = []
     for app in applications:
+        # Archived applications' interviews are archived with them
+        archived = isinstance(app, ArchivedApplication)
+        interview_model = ArchivedInterview if archived else Interview
         candidate = db.query(User).filter(User.id == app.candidate_id).first()
-        interview = db.query(Interview).filter(Interview.application_id == app.id).first()
+        interview = db.query(interview_model).filter(interview_model.application_id == app.id).first()
         
         result.append({
             "application_id": app.id,
@@ -85,7 +97,134 @@ def get_job_applications(
             "status": app.status,
             "applied_at": app.applied_at,
             "interview_score": interview.score if interview else None,
-            "interview_status": interview.status if interview else None
+            "interview_status": interview.status if interview else None,
+            "parsed_profile": app.parsed_profile,
+            "archived": archived
         })
     
     return result
+
+@router.get("/jobs/{job_id}/applications/export")
+def export_job_applications(
+    job_id: int,
+    file_format: Literal["csv", "xlsx"] = Query("csv", alias="format"),
+    include_archived: bool = False,
+    current_user: User = Depends(require_read_role("recruiter")),
+    db: Session = Depends(get_read_db)
+):
+    """Download all applicants of a job with interview scores as CSV or Excel"""
+    job = db.query(Job).filter(Job.id == job_id, Job.recruiter_id == current_user.id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    # Rows are read while the response streams, after `db` is closed
+    media_type, extension = FORMATS[file_format]
+    return StreamingResponse(
+        export_applicants(detached_read_session(db), job_id, file_format, include_archived),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="job-{job_id}-applicants.{extension}"'}
+    )
+
+@router.get("/jobs/{job_id}/leaderboard")
+def get_job_leaderboard(
+    job_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    application_id: Optional[int] = None,
+    current_user: User = Depends(require_read_role("recruiter")),
+    db: Session = Depends(get_read_db)
+):
+    """Get applicants for a job ranked by interview score"""
+    job = db.query(Job).filter(Job.id == job_id, Job.recruiter_id == current_user.id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    board = leaderboards.get(job_id)
+    ranked = board.range(offset, offset + limit)
+    
+    details = {
+        row.id: row for row in db.query(
+            Application.id, Application.status, User.full_name, User.email
+        ).join(User, User.id == Application.candidate_id).filter(
+            Application.id.in_([app_id for _, app_id, _ in ranked])
+        ).all()
+    }
+    
+    entries = []
+    for rank, app_id, score in ranked:
+        row = details.get(app_id)
+        entries.append({
+            "rank": rank,
+            "application_id": app_id,
+            "score": score,
+            "candidate_name": row.full_name if row else None,
+            "candidate_email": row.email if row else None,
+            "status": row.status if row else None
+        })
+    
+    result = {"job_id": job_id, "total": len(board), "entries": entries}
+    if application_id is not None:
+        rank = board.rank(application_id)
+        result["candidate"] = None if rank is None else {
+            "application_id": application_id,
+            "rank": rank,
+            "score": board.score(application_id),
+            "percentile": round(board.percentile(application_id), 2)
+        }
+    return result
+
+@router.post("/applications/status", response_model=BulkStatusResult)
+def update_application_statuses(
+    update: BulkStatusUpdate,
+    current_user: User = Depends(require_role("recruiter")),
+    db: Session = Depends(get_db)
+):
+    """Accept or reject many applications to my jobs at once"""
+    return transition_applications(
+        db, update.application_ids, ApplicationStatus(update.status), recruiter_id=current_user.id
+    )
+
+@router.post("/jobs/{job_id}/rescore")
+def rescore_job_interviews(
+    job_id: int,
+    current_user: User = Depends(require_role("recruiter")),
+    db: Session = Depends(get_db)
+):
+    """Rescore all completed interviews of a job in the background (e.g. after a rubric change)"""
+    job = db.query(Job).filter(Job.id == job_id, Job.recruiter_id == current_user.id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    try:
+        run = rescoring.request_run(db, current_user.id, job_id)
+    except rescoring.RunInProgress:
+        raise HTTPException(status_code=409, detail="This job is already being rescored")
+    return rescoring.serialize(run)
+
+def _my_run(db: Session, run_id: int, user: User) -> RescoreRun:
+    run = db.query(RescoreRun).join(Job, Job.id == RescoreRun.job_id).filter(
+        RescoreRun.id == run_id, Job.recruiter_id == user.id
+    ).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Rescoring run not found")
+    return run
+
+@router.get("/rescore/{run_id}")
+def get_rescore_run(
+    run_id: int,
+    current_user: User = Depends(require_role("recruiter")),
+    db: Session = Depends(get_db)
+):
+    """Get the progress of a rescoring run"""
+    return rescoring.serialize(_my_run(db, run_id, current_user))
+
+@router.post("/rescore/{run_id}/cancel")
+def cancel_rescore_run(
+    run_id: int,
+    current_user: User = Depends(require_role("recruiter")),
+    db: Session = Depends(get_db)
+):
+    """Stop a rescoring run after the batch in progress"""
+    _my_run(db, run_id, current_user)
+    if not rescoring.cancel_run(db, run_id):
+        raise HTTPException(status_code=409, detail="The run has already finished")
+    return rescoring.serialize(_my_run(db, run_id, current_user))
@@ -0,0 +1,69 @@
+"""
+Periodic background jobs (exports, compaction, ...).
+
+Every worker runs the scheduler, but a job runs at most once per interval
+across all of them: before running, a worker must take the job's lease in the
+shared cache, which expires after ``interval`` seconds. Jobs run once per
+shard (sharding.py), in the shard's context, unless added with
+``per_shard=False``.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, List, NamedTuple
+
+from cache import get_cache
+from sharding import DEFAULT_SHARD, current_shard, shards
+
+logger = logging.getLogger(__name__)
+
+
+class Job(NamedTuple):
+    name: str
+    interval: float
+    fn: Callable[[], object]
+    per_shard: bool = True
+
+
+class Scheduler:
+    def __init__(self):
+        self._jobs: List[Job] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def add(self, name: str, interval: float, fn: Callable[[], object], per_shard: bool = True):
+        """Run ``fn`` (in a thread) every ``interval`` seconds, on every shard or the default one"""
+        self._jobs.append(Job(name, interval, fn, per_shard))
+
+    def start(self):
+        self._tasks = [
+            asyncio.create_task(self._run(job, shard))
+            for job in self._jobs
+            for shard in (shards.names() if job.per_shard else [DEFAULT_SHARD])
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, job: Job, shard: str):
+        # The task has its own context: the lease and the job run on this shard
+        current_shard.set(shard)
+        name = job.name if shard == DEFAULT_SHARD else f"{job.name}@{shard}"
+        while True:
+            await asyncio.sleep(job.interval)
+            lease = f"job:{job.name}:lease"
+            if not get_cache().set(lease, os.getpid(), ex=job.interval, nx=True):
+                continue
+            started = time.perf_counter()
+            try:
+                result = await asyncio.to_thread(job.fn)
+                logger.info("Job %s finished in %.1fs: %s", name, time.perf_counter() - started, result)
+            except Exception:
+                logger.exception("Job %s failed", name)
+
+
+scheduler = Scheduler()
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 
 class UserBase(BaseModel):
@@ -13,9 +13,11 @@ class UserCreate(UserBase):
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
+    organization: Optional[str] = None  # slug; only needed if the email is in several
 
 class UserResponse(UserBase):
     id: int
+    organization_id: Optional[int] = None
     created_at: datetime
     
     class Config:
@@ -57,6 +59,14 @@ class ApplicationResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class BulkStatusUpdate(BaseModel):
+    application_ids: List[int] = Field(min_length=1, max_length=10000)
+    status: Literal["accepted", "rejected"]
+
+class BulkStatusResult(BaseModel):
+    updated: int
+    skipped: List[int]  # Not in a status that can move to the new one, or not found
+
 class InterviewQuestion(BaseModel):
     question_id: int
     question_text: str
@@ -0,0 +1,93 @@
+"""
+Interview scoring.
+
+Placeholder for the AI evaluator (DESIGN_DOCUMENT.md §3.6). Routers import
+this module lazily via ``startup.lazy_import`` because the real implementation
+will load LLM clients and NLP models.
+"""
+
+import asyncio
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+# Answers shorter than this get a follow-up asking for specifics (§3.4).
+FOLLOW_UP_MIN_WORDS = 15
+
+# Answers of this length get full marks for detail in ``rate_answer``.
+RATING_FULL_WORDS = 80
+EXAMPLE_RE = re.compile(r"\b(for example|for instance|when i|i built|we built|i led|\d+x)\b|\d+\s*%", re.IGNORECASE)
+
+# ai_analysis dimension scores, each rated from the answers to these question types
+DIMENSION_TOPICS = {
+    "technical_score": ("technical",),
+    "communication_score": ("behavioral", "general"),
+    "problem_solving_score": ("scenario",),
+}
+
+
+def warm_up():
+    """Load models ahead of the first request."""
+
+
+def score_interview(questions: List[Dict[str, Any]], answers: List[Dict[str, Any]]) -> Tuple[float, Dict[str, Any]]:
+    """Return the overall score and AI analysis for a completed interview"""
+    # Mock AI scoring
+    score = 75.5
+    analysis = {
+        "overall_assessment": "Strong candidate with good technical knowledge",
+        "strengths": ["Clear communication", "Relevant experience", "Problem-solving skills"],
+        "areas_for_improvement": ["Could provide more specific examples", "Technical depth in certain areas"],
+        "recommendation": "Proceed to next round"
+    }
+    analysis.update(dimension_scores(questions, answers))
+    return score, analysis
+
+
+def dimension_scores(questions: List[Dict[str, Any]], answers: List[Dict[str, Any]]) -> Dict[str, float]:
+    """0-100 per dimension: the mean ``rate_answer`` of the answers to its questions.
+
+    Dimensions none of whose question types were asked are left out.
+    """
+    by_id = {question.get("id"): question for question in questions}
+    ratings: Dict[str, List[float]] = {}
+    for answer in answers:
+        question = by_id.get(answer.get("question_id"), {})
+        follow_up = answer.get("follow_up") or {}
+        text = " ".join(filter(None, [answer.get("answer"), follow_up.get("answer")]))
+        ratings.setdefault(question.get("type"), []).append(rate_answer(question, text))
+    scores = {}
+    for dimension, topics in DIMENSION_TOPICS.items():
+        values = [rating for topic in topics for rating in ratings.get(topic, [])]
+        if values:
+            scores[dimension] = round(100 * sum(values) / len(values), 1)
+    return scores
+
+
+def rate_answer(question: Dict[str, Any], answer: str) -> float:
+    """Rate one answer from 0 (empty) to 1 (complete); drives adaptive difficulty"""
+    # Mock rating: detail and concrete evidence
+    words = len(answer.split())
+    if words == 0:
+        return 0.0
+    detail = min(words / RATING_FULL_WORDS, 1.0)
+    evidence = 0.2 if EXAMPLE_RE.search(answer) else 0.0
+    return round(min(1.0, 0.8 * detail + evidence), 3)
+
+
+def follow_up_question(question: Dict[str, Any], answer: str) -> Optional[str]:
+    """Return a follow-up question for an incomplete answer, or None to move on"""
+    if len(answer.split()) >= FOLLOW_UP_MIN_WORDS:
+        return None
+    if question.get("type") == "technical":
+        return "Could you walk me through a specific example where you applied this, including the tools you used?"
+    return "Could you give a concrete example from your own experience and what the outcome was?"
+
+
+async def stream_follow_up(question: Dict[str, Any], answer: str) -> AsyncIterator[str]:
+    """Stream a follow-up question token by token, as an LLM response would arrive"""
+    text = follow_up_question(question, answer)
+    if text is None:
+        return
+    for word in text.split(" "):
+        yield word + " "
+        await asyncio.sleep(0)
@@ -27,7 +27,10 @@ Candidates:
 
 from sqlalchemy.orm import Session
 from database import SessionLocal, engine, Base
-from models import User, Job, Application, Interview, UserRole, ApplicationStatus
+from models import (
+    User, Job, Application, Interview, ArchivedApplication, ArchivedInterview, CandidateSignature, DedupBucket,
+    DuplicateCandidate, Notification, RescoreRun, UserRole, ApplicationStatus
+)
 from auth import get_password_hash
 from datetime import datetime, timedelta
 import random
@@ -40,6 +43,13 @@ def seed_database():
     
     try:
         # Clear existing data
+        db.query(RescoreRun).delete()
+        db.query(Notification).delete()
+        db.query(DuplicateCandidate).delete()
+        db.query(DedupBucket).delete()
+        db.query(CandidateSignature).delete()
+        db.query(ArchivedInterview).delete()
+        db.query(ArchivedApplication).delete()
         db.query(Interview).delete()
         db.query(Application).delete()
         db.query(Job).delete()
@@ -171,7 +181,8 @@ def seed_database():
             job_id=jobs[0].id,
             resume_path="uploads/resumes/john_doe_resume.pdf",
             status=ApplicationStatus.COMPLETED,
-            applied_at=datetime.utcnow() - timedelta(days=8)
+            applied_at=datetime.utcnow() - timedelta(days=8),
+            score=85.5
         )
         db.add(app1)
         db.commit()
@@ -247,7 +258,8 @@ def seed_database():
             job_id=jobs[2].id,
             resume_path="uploads/resumes/mike_wilson_resume.pdf",
             status=ApplicationStatus.COMPLETED,
-            applied_at=datetime.utcnow() - timedelta(days=4)
+            applied_at=datetime.utcnow() - timedelta(days=4),
+            score=78.0
         )
         db.add(app3)
         db.commit()
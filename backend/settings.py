@@ -0,0 +1,104 @@
+"""
+Application settings, read once from the environment and ``.env``.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    database_url: str = "sqlite:///./ats_database.db"
+    # Read replica for read-only endpoints; reads fall back to the primary
+    # while it lags more than `replica_max_lag` seconds or is unreachable.
+    database_replica_url: Optional[str] = None
+    replica_max_lag: float = 5.0
+    replica_heartbeat_interval: float = 1.0
+    # Extra databases for tenants (see sharding.py), by shard name:
+    # SHARDS='{"acme": "sqlite:///./shards/acme.db"}'. Every shard, the
+    # default one included, has a connection pool of this size.
+    shards: Dict[str, str] = {}
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout: float = 30
+    secret_key: str = "your-secret-key-here"
+    access_token_expire_minutes: int = 1440  # 24 hours
+    cors_origins: List[str] = ["http://localhost:3000", "http://localhost:5173"]
+
+    upload_dir: str = "uploads/resumes"
+    resume_parse_workers: int = 2
+
+    cache_backend: str = "memory"
+    cache_url: str = "./ats_cache.db"
+
+    # Create tables in the lifespan hook. Off by default: gunicorn's master
+    # and `python main.py` do it once before any worker starts.
+    init_db_on_startup: bool = False
+    # Import and warm lazily loaded heavy modules before serving traffic.
+    warmup_on_startup: bool = True
+    # Seconds in-flight requests get to finish when a worker shuts down.
+    drain_timeout: float = 25
+
+    # Admission control. Overrides are keyed by rule name (see rate_limit.RULES):
+    # RATE_LIMITS='{"login": {"anonymous": [5, 2]}}' = 5 requests/minute, burst 2.
+    rate_limiting_enabled: bool = True
+    rate_limits: Dict[str, Dict[str, Tuple[float, float]]] = {}
+    concurrency_limits: Dict[str, int] = {}
+
+    # Request deadlines and cancellation (see deadlines.RULES). Overrides are
+    # seconds keyed by rule name, null for no deadline:
+    # REQUEST_TIMEOUTS='{"admin_listings": 5}'.
+    request_deadlines_enabled: bool = True
+    request_timeouts: Dict[str, Optional[float]] = {}
+
+    # Outbox / change feed
+    event_poll_interval: float = 0.5
+    event_retention_days: int = 30
+
+    # WebSocket interviews: cached session lifetime and answer write-behind.
+    interview_session_ttl: int = 86400
+    answer_flush_interval: float = 2.0
+    answer_flush_batch: int = 50
+
+    # Offline analytics: Parquet export of completed interviews. The export
+    # runs every `analytics_export_interval` seconds (0 = only on demand).
+    analytics_dir: str = "analytics"
+    analytics_export_interval: float = 3600
+    analytics_export_batch: int = 5000
+
+    # Archival: finished applications and their interviews move to the
+    # archive tables `archive_after_days` after they finish. The job runs
+    # every `archive_interval` seconds (0 = only on demand).
+    archive_after_days: int = 180
+    archive_interval: float = 86400
+    archive_batch: int = 500
+
+    # Notifications: recruiters get at most one digest per channel every
+    # `notification_digest_interval` seconds. Channels are keys of
+    # notifications.CHANNELS; "file" writes .eml files to `notification_dir`.
+    notification_channels: List[str] = ["file"]
+    notification_digest_interval: float = 300
+    notification_dir: str = "mail"
+    notification_sender: str = "ATS AI Interviewer <noreply@localhost>"
+    smtp_host: str = "localhost"
+    smtp_port: int = 1025
+    notification_send_timeout: float = 30
+    # Events waiting to be stored, and digests waiting per channel, before
+    # new work is deferred instead of queued.
+    notification_queue_size: int = 1000
+    notification_channel_queue: int = 100
+
+    # Rescoring runs: workers look for requested runs every
+    # `rescore_poll_interval` seconds (0 = never) and score `rescore_batch`
+    # interviews at a time, `rescore_workers` in parallel.
+    rescore_poll_interval: float = 10
+    rescore_batch: int = 200
+    rescore_workers: int = 4
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
@@ -0,0 +1,111 @@
+"""
+Database shards and the tenant a unit of work runs for.
+
+Each organization (tenant, see tenants.py) lives on one shard: the default
+database (``database_url``) or one of the databases named in ``shards``.
+Every shard gets its own engine and so its own connection pool, which lets a
+large tenant be given a database, and a pool, of its own.
+
+Which shard and tenant the current code runs for is kept in context
+variables: ``tenants.TenantMiddleware`` sets them from the caller's token for
+each request, background jobs set the shard with ``using_shard``. Sessions
+(``database.SessionLocal``) and cache keys (``cache.get_cache``) follow them.
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+import deadlines
+from settings import get_settings
+
+DEFAULT_SHARD = "default"
+
+
+class Tenant(NamedTuple):
+    organization_id: Optional[int]  # None: users created before organizations
+    shard: str
+    # Platform admins (no organization) see every organization on their shard
+    unrestricted: bool = False
+
+
+current_shard: ContextVar[str] = ContextVar("current_shard", default=DEFAULT_SHARD)
+current_tenant: ContextVar[Optional[Tenant]] = ContextVar("current_tenant", default=None)
+
+
+def create_db_engine(url: str) -> Engine:
+    settings = get_settings()
+    if "sqlite" in url and (url == "sqlite://" or ":memory:" in url):
+        # In-memory databases live in their single connection; no pool to size
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+    else:
+        engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False} if "sqlite" in url else {},
+            pool_size=settings.database_pool_size,
+            max_overflow=settings.database_max_overflow,
+            pool_timeout=settings.database_pool_timeout,
+        )
+    # Queries of a timed-out or abandoned request are interrupted
+    deadlines.install(engine)
+    return engine
+
+
+class ShardRouter:
+    """One engine (and connection pool) per shard, created on first use"""
+
+    def __init__(self, urls: Dict[str, str]):
+        self.urls = urls
+        self._engines: Dict[str, Engine] = {}
+        self._lock = threading.Lock()
+
+    def names(self) -> List[str]:
+        return list(self.urls)
+
+    def engine(self, name: Optional[str] = None) -> Engine:
+        """Engine of shard ``name`` (default: the current shard)"""
+        name = current_shard.get() if name is None else name
+        engine = self._engines.get(name)
+        if engine is None:
+            if name not in self.urls:
+                raise KeyError(f"Unknown shard {name!r}")
+            with self._lock:
+                engine = self._engines.get(name)
+                if engine is None:
+                    engine = self._engines[name] = create_db_engine(self.urls[name])
+        return engine
+
+    def dispose(self):
+        for engine in list(self._engines.values()):
+            engine.dispose()
+
+
+shards = ShardRouter({DEFAULT_SHARD: get_settings().database_url, **get_settings().shards})
+
+
+def get_engine() -> Engine:
+    """Engine of the current shard"""
+    return shards.engine()
+
+
+@contextmanager
+def using_shard(name: str) -> Iterator[None]:
+    """Run the block against shard ``name``, for no tenant in particular"""
+    with using_tenant(None, name):
+        yield
+
+
+@contextmanager
+def using_tenant(tenant: Optional[Tenant], shard: Optional[str] = None) -> Iterator[None]:
+    """Run the block for ``tenant`` (on its shard, or ``shard`` when there is none)"""
+    shard_token = current_shard.set(tenant.shard if tenant is not None else shard or DEFAULT_SHARD)
+    tenant_token = current_tenant.set(tenant)
+    try:
+        yield
+    finally:
+        current_tenant.reset(tenant_token)
+        current_shard.reset(shard_token)
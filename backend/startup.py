@@ -0,0 +1,76 @@
+"""
+Deferred initialization for heavy modules.
+
+Scoring models and document parsers pull in large dependencies. Modules that
+use them import them through ``lazy_import`` so ``import main`` stays fast;
+the real import happens on first attribute access, or earlier in
+``run_warmups`` when the app starts serving.
+
+A lazily imported module may define ``warm_up()`` to load models, compile
+patterns, etc. It is called once, right after the module is imported. A
+``shut_down()`` hook, if defined, is called on application shutdown for
+modules that were actually loaded.
+"""
+
+import importlib
+import logging
+import threading
+import time
+from types import ModuleType
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+_lazy_modules: Dict[str, "LazyModule"] = {}
+
+
+class LazyModule:
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    warm_up = getattr(module, "warm_up", None)
+                    if warm_up is not None:
+                        warm_up()
+                    logger.info("Loaded %s in %.0f ms", self._name, (time.perf_counter() - started) * 1000)
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    if name not in _lazy_modules:
+        _lazy_modules[name] = LazyModule(name)
+    return _lazy_modules[name]
+
+
+def run_warmups():
+    """Import every registered lazy module and run its warm-up hook."""
+    for module in list(_lazy_modules.values()):
+        module.load()
+
+
+def run_shutdowns():
+    """Run the shut-down hook of every lazy module that has been loaded."""
+    for module in list(_lazy_modules.values()):
+        if module.loaded:
+            shut_down = getattr(module.load(), "shut_down", None)
+            if shut_down is not None:
+                shut_down()
@@ -0,0 +1,273 @@
+"""
+Organizations (tenants) and tenant-scoped sessions.
+
+Users, jobs, applications and interviews belong to an organization
+(``organization_id``; NULL for data created before organizations existed).
+Access tokens carry the user's organization in an ``org`` claim, and for
+every request ``TenantMiddleware`` looks up the organization's shard and
+sets the current tenant (sharding.py). Sessions opened for the request then:
+
+- connect to the organization's shard (``database.ShardSession``),
+- only load rows of the organization: every ORM query gets an
+  ``organization_id`` criterion added, so a query that forgets to filter by
+  organization cannot leak another tenant's rows,
+- stamp new rows with the organization.
+
+Platform admins (admin users without an organization) are not restricted and
+see everything on the default shard; admins of an organization see only it.
+Code running outside a request (scheduled jobs, event subscribers) has no
+tenant and sees the whole shard it runs on.
+
+    python tenants.py create acme "Acme Corp" --shard acme
+    python tenants.py add-user acme recruiter@acme.com "Ada Recruiter" recruiter secret
+    python tenants.py list
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs
+
+from sqlalchemy import event
+from sqlalchemy.orm import with_loader_criteria
+
+from auth import decode_token, verify_password
+from database import SessionLocal, ShardSession
+from models import (
+    Application, ArchivedApplication, ArchivedInterview, Interview, Job, Organization, RescoreRun, User, UserRole
+)
+from sharding import DEFAULT_SHARD, Tenant, shards, using_shard, using_tenant
+
+# Models whose rows belong to an organization
+TENANT_MODELS = (User, Job, Application, Interview, ArchivedApplication, ArchivedInterview, RescoreRun)
+
+# Seconds an organization's shard is cached per process
+DIRECTORY_TTL = 60
+
+
+class OrganizationInfo(NamedTuple):
+    id: int
+    slug: str
+    name: str
+    shard: str
+
+
+class Directory:
+    """Per-process cache of organizations, read from the default shard"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[int, Tuple[Optional[OrganizationInfo], float]] = {}
+        self._lock = threading.Lock()
+
+    def cached(self, organization_id: int) -> Tuple[bool, Optional[OrganizationInfo]]:
+        """``(found in cache, organization)``; never touches the database"""
+        entry = self._entries.get(organization_id)
+        if entry is None or time.monotonic() - entry[1] >= self.ttl:
+            return False, None
+        return True, entry[0]
+
+    def get(self, organization_id: int) -> Optional[OrganizationInfo]:
+        hit, info = self.cached(organization_id)
+        if hit:
+            return info
+        info = self._load(Organization.id == organization_id)
+        with self._lock:
+            self._entries[organization_id] = (info, time.monotonic())
+        return info
+
+    def find(self, slug: str) -> Optional[OrganizationInfo]:
+        return self._load(Organization.slug == slug)
+
+    @staticmethod
+    def _load(criterion) -> Optional[OrganizationInfo]:
+        with using_shard(DEFAULT_SHARD):
+            db = SessionLocal()
+            try:
+                organization = db.query(Organization).filter(criterion).first()
+            finally:
+                db.close()
+        if organization is None:
+            return None
+        return OrganizationInfo(organization.id, organization.slug, organization.name, organization.shard)
+
+
+directory = Directory(DIRECTORY_TTL)
+
+
+def tenant_for(claims: dict, organization: Optional[OrganizationInfo]) -> Tenant:
+    """The tenant a token's holder acts as; ``organization`` is its ``org`` claim, looked up"""
+    organization_id = claims.get("org")
+    if organization_id is None:
+        return Tenant(None, DEFAULT_SHARD, unrestricted=claims.get("role") == UserRole.ADMIN.value)
+    # An organization that no longer exists matches no rows, so the token is refused.
+    return Tenant(organization_id, organization.shard if organization else DEFAULT_SHARD)
+
+
+def _token(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return token if scheme.lower() == "bearer" else None
+    if scope["type"] == "websocket":
+        # Browsers can't set headers on WebSocket requests
+        return parse_qs(scope.get("query_string", b"").decode("latin-1")).get("token", [None])[0]
+    return None
+
+
+class TenantMiddleware:
+    """Run each request as the tenant of its access token"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+        token = _token(scope)
+        claims = decode_token(token) if token else None
+        if not claims:
+            return await self.app(scope, receive, send)
+        organization = None
+        if claims.get("org") is not None:
+            hit, organization = directory.cached(claims["org"])
+            if not hit:
+                organization = await asyncio.to_thread(directory.get, claims["org"])
+        with using_tenant(tenant_for(claims, organization)):
+            await self.app(scope, receive, send)
+
+
+def find_login_users(email: str, organization: Optional[str] = None) -> List[User]:
+    """Users with this email: in ``organization`` (a slug) if given, otherwise on any shard"""
+    if organization is not None:
+        info = directory.find(organization)
+        if info is None:
+            return []
+        places = [(info.shard, info.id)]
+    else:
+        places = [(name, None) for name in shards.names()]
+    users = []
+    for shard, organization_id in places:
+        with using_shard(shard):
+            db = SessionLocal()
+            try:
+                query = db.query(User).filter(User.email == email)
+                if organization_id is not None:
+                    query = query.filter(User.organization_id == organization_id)
+                users.extend(query.all())
+            finally:
+                db.close()
+    return users
+
+
+def authenticate(email: str, password: str, organization: Optional[str] = None) -> List[User]:
+    """Users the credentials are valid for (more than one: the organization is ambiguous)"""
+    return [user for user in find_login_users(email, organization)
+            if verify_password(password, user.hashed_password)]
+
+
+# -- Tenant scoping ---------------------------------------------------------------
+
+@event.listens_for(ShardSession, "do_orm_execute")
+def _scope_to_tenant(state):
+    tenant: Optional[Tenant] = state.session.info.get("tenant")
+    if tenant is None or tenant.unrestricted:
+        return
+    if not (state.is_select or state.is_update or state.is_delete):
+        return
+    if state.is_column_load or state.is_relationship_load:
+        return  # the parent row was already scoped
+    organization_id = tenant.organization_id
+    if organization_id is None:
+        options = [with_loader_criteria(model, lambda cls: cls.organization_id.is_(None), include_aliases=True)
+                   for model in TENANT_MODELS]
+    else:
+        options = [with_loader_criteria(model, lambda cls: cls.organization_id == organization_id,
+                                        include_aliases=True)
+                   for model in TENANT_MODELS]
+    state.statement = state.statement.options(*options)
+
+
+@event.listens_for(ShardSession, "before_flush")
+def _stamp_organization(session, flush_context, instances):
+    tenant: Optional[Tenant] = session.info.get("tenant")
+    if tenant is None or tenant.organization_id is None:
+        return
+    for obj in session.new:
+        if isinstance(obj, TENANT_MODELS) and obj.organization_id is None:
+            obj.organization_id = tenant.organization_id
+
+
+# -- CLI --------------------------------------------------------------------------
+
+def create_organization(slug: str, name: str, shard: str = DEFAULT_SHARD) -> OrganizationInfo:
+    if shard not in shards.names():
+        raise ValueError(f"Unknown shard {shard!r}; configure it in the SHARDS setting first")
+    with using_shard(DEFAULT_SHARD):
+        db = SessionLocal()
+        try:
+            organization = Organization(slug=slug, name=name, shard=shard)
+            db.add(organization)
+            db.commit()
+            return OrganizationInfo(organization.id, organization.slug, organization.name, organization.shard)
+        finally:
+            db.close()
+
+
+def add_user(slug: str, email: str, full_name: str, role: str, password: str) -> int:
+    from auth import get_password_hash
+
+    info = directory.find(slug)
+    if info is None:
+        raise ValueError(f"Unknown organization {slug!r}")
+    with using_tenant(Tenant(info.id, info.shard)):
+        db = SessionLocal()
+        try:
+            user = User(email=email, full_name=full_name, role=UserRole(role),
+                        hashed_password=get_password_hash(password))
+            db.add(user)
+            db.commit()
+            return user.id
+        finally:
+            db.close()
+
+
+def main():
+    from database import init_db
+
+    parser = argparse.ArgumentParser(description="Manage organizations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create", help="create an organization")
+    create.add_argument("slug")
+    create.add_argument("name")
+    create.add_argument("--shard", default=DEFAULT_SHARD)
+    user = commands.add_parser("add-user", help="add a user to an organization")
+    user.add_argument("organization")
+    user.add_argument("email")
+    user.add_argument("full_name")
+    user.add_argument("role", choices=[role.value for role in UserRole])
+    user.add_argument("password")
+    commands.add_parser("list", help="list organizations")
+    args = parser.parse_args()
+
+    init_db()
+    if args.command == "create":
+        info = create_organization(args.slug, args.name, args.shard)
+        print(f"Created organization {info.slug} (id {info.id}) on shard {info.shard}")
+    elif args.command == "add-user":
+        user_id = add_user(args.organization, args.email, args.full_name, args.role, args.password)
+        print(f"Created user {args.email} (id {user_id}) in {args.organization}")
+    else:
+        with using_shard(DEFAULT_SHARD):
+            db = SessionLocal()
+            try:
+                for organization in db.query(Organization).order_by(Organization.id):
+                    print(f"{organization.id:>5}  {organization.slug:<20} {organization.shard:<12} {organization.name}")
+            finally:
+                db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Compressed storage for interview transcripts and AI analysis.
+
+``CompressedJSON`` stores JSON values as zstd frames. Transcripts repeat the
+same question texts, keys and analysis wording, so a dictionary trained on
+our own transcripts compresses them far better than zstd alone. Dictionaries
+live in the ``compression_dictionaries`` table and each frame records the id
+of the one it was compressed with. Ids are per database, so every shard
+trains its own dictionaries and has its own ``Codec``. Workers compress with
+the newest one (checked every ``DICTIONARY_REFRESH`` seconds) and fetch any
+other on first use to decode. Until enough transcripts exist to train the first dictionary,
+values are compressed without one; a scheduled job trains it later.
+
+Values written before compression (plain JSON text) still decode, and the
+``compress_transcripts`` migration rewrites them.
+
+    python transcripts.py train      # train a new dictionary from recent transcripts
+    python transcripts.py recompress # rewrite every transcript with the newest dictionary
+    python transcripts.py stats
+"""
+
+import json
+import logging
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import zstandard
+from sqlalchemy import JSON, LargeBinary, inspect, text
+from sqlalchemy.types import TypeDecorator
+
+from database import SessionLocal
+from sharding import current_shard, get_engine
+
+logger = logging.getLogger(__name__)
+
+LEVEL = 9
+DICTIONARY_SIZE = 64 * 1024
+TRAINING_SAMPLES = 5000
+# zstd cannot train a useful dictionary from fewer samples than this.
+MIN_TRAINING_SAMPLES = 200
+REWRITE_BATCH = 500
+# How often a worker looks for a newer dictionary to compress with.
+DICTIONARY_REFRESH = 300
+# How often the scheduler checks whether the first dictionary can be trained.
+DICTIONARY_CHECK_INTERVAL = 3600
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+COLUMNS = ("questions", "answers", "ai_analysis")
+TABLES = ("interviews", "archived_interviews")
+
+
+class Codec:
+    """Loaded dictionaries, and zstd (de)compressors per dictionary and thread"""
+
+    def __init__(self):
+        self._dictionaries: Dict[int, Optional[zstandard.ZstdCompressionDict]] = {0: None}
+        self._active_id: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _load(self, dictionary_id: Optional[int] = None):
+        from models import CompressionDictionary
+
+        db = SessionLocal()
+        try:
+            query = db.query(CompressionDictionary)
+            if dictionary_id is None:
+                row = query.order_by(CompressionDictionary.created_at.desc()).first()
+            else:
+                row = query.filter(CompressionDictionary.id == dictionary_id).first()
+        finally:
+            db.close()
+        if row is None:
+            if dictionary_id is not None:
+                raise ValueError(f"Unknown compression dictionary {dictionary_id}")
+            return 0
+        with self._lock:
+            self._dictionaries[row.id] = zstandard.ZstdCompressionDict(row.data)
+        return row.id
+
+    def active_id(self) -> int:
+        if self._active_id is None or time.monotonic() - self._checked_at > DICTIONARY_REFRESH:
+            self._active_id = self._load()
+            self._checked_at = time.monotonic()
+        return self._active_id
+
+    def reset(self):
+        """Pick up a newly trained dictionary for new values now"""
+        self._active_id = None
+
+    def _compressor(self, dictionary_id: int) -> zstandard.ZstdCompressor:
+        compressors = self._local.__dict__.setdefault("compressors", {})
+        if dictionary_id not in compressors:
+            compressors[dictionary_id] = zstandard.ZstdCompressor(
+                level=LEVEL, dict_data=self._dictionaries[dictionary_id], write_checksum=True
+            )
+        return compressors[dictionary_id]
+
+    def _decompressor(self, dictionary_id: int) -> zstandard.ZstdDecompressor:
+        if dictionary_id not in self._dictionaries:
+            self._load(dictionary_id)
+        decompressors = self._local.__dict__.setdefault("decompressors", {})
+        if dictionary_id not in decompressors:
+            decompressors[dictionary_id] = zstandard.ZstdDecompressor(dict_data=self._dictionaries[dictionary_id])
+        return decompressors[dictionary_id]
+
+    def encode(self, value: Any) -> bytes:
+        data = json.dumps(value, separators=(",", ":")).encode()
+        return self._compressor(self.active_id()).compress(data)
+
+    def decode(self, data) -> Any:
+        if isinstance(data, str):
+            return json.loads(data)
+        data = bytes(data)
+        if not data.startswith(ZSTD_MAGIC):
+            return json.loads(data)
+        dictionary_id = zstandard.get_frame_parameters(data).dict_id
+        return json.loads(self._decompressor(dictionary_id).decompress(data))
+
+
+_codecs: Dict[str, Codec] = {}
+_codecs_lock = threading.Lock()
+
+
+def get_codec() -> Codec:
+    """Codec of the current shard (sharding.py); dictionary ids are per database"""
+    shard = current_shard.get()
+    codec = _codecs.get(shard)
+    if codec is None:
+        with _codecs_lock:
+            codec = _codecs.setdefault(shard, Codec())
+    return codec
+
+
+class CompressedJSON(TypeDecorator):
+    """JSON value stored as a zstd frame (see module docstring)"""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else get_codec().encode(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else get_codec().decode(value)
+
+
+def _samples(limit: int) -> List[bytes]:
+    """Uncompressed JSON of the most recent transcripts' values"""
+    codec = get_codec()
+    engine = get_engine()
+    samples: List[bytes] = []
+    with engine.connect() as conn:
+        for table in TABLES:
+            rows = conn.execute(
+                text(f"SELECT {', '.join(COLUMNS)} FROM {table} ORDER BY id DESC LIMIT :limit"), {"limit": limit}
+            ).fetchall()
+            for row in rows:
+                for value in row:
+                    if value is not None:
+                        samples.append(json.dumps(codec.decode(value), separators=(",", ":")).encode())
+    return samples
+
+
+def train_dictionary(samples: Optional[List[bytes]] = None) -> Optional[int]:
+    """Train and store a new dictionary; return its id (None if there is too little data)"""
+    from models import CompressionDictionary
+
+    samples = _samples(TRAINING_SAMPLES) if samples is None else samples
+    if len(samples) < MIN_TRAINING_SAMPLES:
+        return None
+    trained = zstandard.train_dictionary(DICTIONARY_SIZE, samples, level=LEVEL)
+    db = SessionLocal()
+    try:
+        if db.get(CompressionDictionary, trained.dict_id()) is None:
+            db.add(CompressionDictionary(id=trained.dict_id(), data=trained.as_bytes(), samples=len(samples)))
+            db.commit()
+    finally:
+        db.close()
+    get_codec().reset()
+    logger.info("Trained compression dictionary %d from %d samples", trained.dict_id(), len(samples))
+    return trained.dict_id()
+
+
+def _dictionary_of(value) -> Optional[int]:
+    """Dictionary id of a stored value, or None if it is not compressed"""
+    if not isinstance(value, (bytes, memoryview)) or bytes(value[:4]) != ZSTD_MAGIC:
+        return None
+    return zstandard.get_frame_parameters(bytes(value)).dict_id
+
+
+def _raw(value):
+    # Postgres drivers return bytea as memoryview
+    return bytes(value) if isinstance(value, memoryview) else value
+
+
+def rewrite(only_uncompressed: bool = False) -> int:
+    """Re-encode stored values with the active dictionary; return the number of rows changed"""
+    codec = get_codec()
+    engine = get_engine()
+    active = codec.active_id()
+    changed = 0
+    for table in TABLES:
+        last_id = 0
+        while True:
+            with engine.begin() as conn:
+                rows = conn.execute(
+                    text(f"SELECT id, {', '.join(COLUMNS)} FROM {table} WHERE id > :last_id ORDER BY id LIMIT :limit"),
+                    {"last_id": last_id, "limit": REWRITE_BATCH}
+                ).fetchall()
+                for row in rows:
+                    values = row[1:]
+                    dictionaries = [_dictionary_of(value) for value in values if value is not None]
+                    if only_uncompressed:
+                        stale = None in dictionaries
+                    else:
+                        stale = any(dictionary != active for dictionary in dictionaries)
+                    if not stale:
+                        continue
+                    encoded = [None if value is None else codec.encode(codec.decode(value)) for value in values]
+                    # Only if nothing was written since the SELECT; a row that
+                    # changed is skipped and keeps the newer value.
+                    unchanged = " AND ".join(
+                        f"{column} IS NULL" if value is None else f"{column} = :old_{column}"
+                        for column, value in zip(COLUMNS, values)
+                    )
+                    result = conn.execute(
+                        text(f"UPDATE {table} SET {', '.join(f'{column} = :{column}' for column in COLUMNS)} "
+                             f"WHERE id = :id AND {unchanged}"),
+                        {**dict(zip(COLUMNS, encoded)), "id": row[0],
+                         **{f"old_{column}": _raw(value) for column, value in zip(COLUMNS, values) if value is not None}}
+                    )
+                    changed += result.rowcount
+            if len(rows) < REWRITE_BATCH:
+                break
+            last_id = rows[-1][0]
+    return changed
+
+
+def compress_existing() -> int:
+    """Migration: train a first dictionary from existing transcripts and compress them"""
+    engine = get_engine()
+    if engine.dialect.name == "postgresql":
+        # SQLite stores the frames in the old JSON columns as they are;
+        # Postgres needs the columns converted to bytea first.
+        inspector = inspect(engine)
+        with engine.begin() as conn:
+            for table in TABLES:
+                for column in inspector.get_columns(table):
+                    if column["name"] in COLUMNS and isinstance(column["type"], JSON):
+                        conn.exec_driver_sql(
+                            f"ALTER TABLE {table} ALTER COLUMN {column['name']} TYPE BYTEA "
+                            f"USING convert_to({column['name']}::text, 'UTF8')"
+                        )
+    if get_codec().active_id() == 0:
+        train_dictionary()
+    return rewrite(only_uncompressed=True)
+
+
+def ensure_dictionary() -> Optional[Dict[str, Any]]:
+    """Scheduled job: train the first dictionary once there are enough transcripts"""
+    codec = get_codec()
+    codec.reset()
+    if codec.active_id():
+        return None
+    dictionary_id = train_dictionary()
+    if dictionary_id is None:
+        return None
+    return {"dictionary_id": dictionary_id, "rewritten": rewrite()}
+
+
+def storage_stats() -> Dict[str, Any]:
+    """Stored vs. uncompressed bytes of the transcript columns"""
+    codec = get_codec()
+    engine = get_engine()
+    stored = raw = rows = 0
+    with engine.connect() as conn:
+        for table in TABLES:
+            for row in conn.exec_driver_sql(f"SELECT {', '.join(COLUMNS)} FROM {table}"):
+                rows += 1
+                for value in row:
+                    if value is None:
+                        continue
+                    stored += len(value.encode() if isinstance(value, str) else value)
+                    raw += len(json.dumps(codec.decode(value), separators=(",", ":")))
+    return {
+        "rows": rows,
+        "stored_bytes": stored,
+        "json_bytes": raw,
+        "ratio": round(raw / stored, 2) if stored else None,
+        "dictionary_id": codec.active_id() or None,
+    }
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == "train":
+        print({"dictionary_id": train_dictionary()})
+    elif command == "recompress":
+        print({"rewritten": rewrite()})
+    elif command == "stats":
+        print(storage_stats())
+    else:
+        print(__doc__)
+        sys.exit(1)
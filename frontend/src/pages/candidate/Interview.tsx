@@ -113,7 +113,8 @@ const Interview: React.FC = () => {
   }
 
   const currentQuestion = interview.questions[interview.current_question];
-  const progress = ((interview.current_question) / interview.questions.length) * 100;
+  const totalQuestions = interview.total_questions ?? interview.questions.length;
+  const progress = ((interview.current_question) / totalQuestions) * 100;
 
   return (
     <Box>
@@ -124,7 +125,7 @@ const Interview: React.FC = () => {
       <Paper sx={{ p: 3, mb: 3 }}>
         <Box display="flex" justifyContent="space-between" alignItems="center" mb={2}>
           <Typography variant="body1">
-            Question {interview.current_question + 1} of {interview.questions.length}
+            Question {interview.current_question + 1} of {totalQuestions}
           </Typography>
           <Chip
             label={`${Math.round(progress)}% Complete`}